@@ -1,10 +1,6 @@
 """Daily Digest - 每日信息摘要工具"""
 
-from .sources.hackernews import HackerNewsAPI
-from .sources.producthunt import ProductHuntAPI
-from .sources.newsletter import NewsletterFetcher
-from .generator import DigestGenerator
-from .processor import MarkProcessor
+from importlib import import_module
 
 __version__ = "1.0.0"
 __all__ = [
@@ -14,3 +10,20 @@ __all__ = [
     "DigestGenerator",
     "MarkProcessor",
 ]
+
+# 按需导入：只处理标记的命令不必加载 requests/feedparser 等抓取依赖
+_EXPORTS = {
+    "HackerNewsAPI": ".sources.hackernews",
+    "ProductHuntAPI": ".sources.producthunt",
+    "NewsletterFetcher": ".sources.newsletter",
+    "DigestGenerator": ".generator",
+    "MarkProcessor": ".processor",
+}
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
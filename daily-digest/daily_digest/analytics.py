@@ -0,0 +1,296 @@
+"""阅读行为统计 - 按摘要日期和来源增量累加的时间序列（SQLite）
+
+生成摘要时记录每个来源的条目数，处理标记时累加已读/跳过/收藏数和
+等待天数。报表只查询这张聚合表（每天每个来源一行），不需要重新
+扫描历史摘要文件。
+
+同一个库中的 items 表记录每天摘要里各条目的分数和是否被收藏，
+周汇总的本周精选直接从这里选出，不再解析每日 Markdown。
+"""
+
+import heapq
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .render import DigestItem
+
+
+STATS_DB = ".stats.db"
+
+ACTIONS = ("read", "skipped", "starred")
+
+# 精选排序：分数按来源归一化（与星级评分的满分一致，封顶 2 倍），
+# 收藏加分等于封顶值，收藏过的条目总是排在未收藏的之前
+SCORE_SCALE = {"Hacker News": 500, "Product Hunt": 300}
+MAX_SCORE_WEIGHT = 2.0
+STAR_WEIGHT = MAX_SCORE_WEIGHT
+
+# 报表的汇总周期：按天、按 ISO 周（与周汇总的周数一致）或自然月
+PERIODS = {
+    "day": "date",
+    "week": "iso_week(date)",
+    "month": "substr(date, 1, 7)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily (
+    date TEXT NOT NULL,                   -- 条目所属摘要的日期
+    source TEXT NOT NULL,
+    generated INTEGER NOT NULL DEFAULT 0,
+    read INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    starred INTEGER NOT NULL DEFAULT 0,
+    wait_days INTEGER NOT NULL DEFAULT 0, -- 已处理条目从生成到处理的天数之和
+    PRIMARY KEY (date, source)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    date TEXT NOT NULL,
+    url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    score INTEGER,                        -- HN score / PH votes，Newsletter 为空
+    comments INTEGER,
+    discussion_url TEXT NOT NULL DEFAULT '',
+    starred INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, url)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS items_discussion ON items (discussion_url) WHERE discussion_url != '';
+"""
+
+TOTALS = """
+    SUM(generated) AS generated,
+    SUM(read) AS read,
+    SUM(skipped) AS skipped,
+    SUM(starred) AS starred,
+    SUM(read + skipped + starred) AS processed,
+    SUM(wait_days) AS wait_days
+"""
+
+
+def rank(row: Dict) -> float:
+    """精选排序分：归一化分数（封顶）+ 收藏加分"""
+    value = 0.0
+    if row["score"]:
+        value = min(row["score"] / SCORE_SCALE.get(row["source"], 500), MAX_SCORE_WEIGHT)
+    if row["starred"]:
+        value += STAR_WEIGHT
+    return value
+
+
+def _rates(row: Dict) -> Dict:
+    """补充阅读率和平均等待天数"""
+    processed = row["processed"] or 0
+    row["read_rate"] = row["read"] / row["generated"] if row["generated"] else None
+    row["star_rate"] = row["starred"] / row["generated"] if row["generated"] else None
+    row["avg_wait"] = row["wait_days"] / processed if processed else None
+    return row
+
+
+def _iso_week(date_str: str) -> str:
+    """ISO 年和周数，如 2025-W01（1 月 1 日可能属于上一年的最后一周）"""
+    year, week, _ = datetime.strptime(date_str, "%Y-%m-%d").isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class StatsStore:
+    """每日阅读统计
+
+    每行是 (摘要日期, 来源) 的聚合计数：generated 在重新生成同一天的
+    摘要时覆盖，read/skipped/starred/wait_days 在每次处理标记时累加。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("iso_week", 1, _iso_week, deterministic=True)
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record_generated(self, date_str: str, counts: Dict[str, int]) -> None:
+        """记录某天摘要中各来源的条目数（重新生成时覆盖）"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO daily (date, source, generated) VALUES (?, ?, ?)
+                ON CONFLICT (date, source) DO UPDATE SET generated = excluded.generated
+                """,
+                [(date_str, source, count) for source, count in counts.items()],
+            )
+
+    def record_items(self, date_str: str, items: Iterable["DigestItem"]) -> None:
+        """记录某天摘要中的条目（重新生成时替换未收藏的旧记录，保留收藏状态）"""
+        rows = [
+            (
+                date_str,
+                item.url or item.discussion_url,
+                item.source,
+                item.title,
+                item.score if item.kind != "newsletter" else None,
+                item.comments if item.kind == "hn" else None,
+                item.discussion_url,
+            )
+            for item in items
+            if item.url or item.discussion_url
+        ]
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM items WHERE date = ? AND starred = 0", (date_str,))
+            self.conn.executemany(
+                """
+                INSERT INTO items (date, url, source, title, score, comments, discussion_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (date, url) DO UPDATE SET
+                    source = excluded.source,
+                    title = excluded.title,
+                    score = excluded.score,
+                    comments = excluded.comments,
+                    discussion_url = excluded.discussion_url
+                """,
+                rows,
+            )
+
+    def mark_starred(self, date_str: str, urls: Iterable[str]) -> None:
+        """标记某天摘要中被收藏的条目"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE items SET starred = 1 WHERE date = ? AND url = ?",
+                [(date_str, url) for url in urls],
+            )
+
+    def update_scores(self, scores: Dict[str, tuple]) -> None:
+        """按讨论页链接更新分数和评论数 {discussion_url: (score, comments)}"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE items SET score = ?, comments = ? WHERE discussion_url = ?",
+                [(score, comments, url) for url, (score, comments) in scores.items()],
+            )
+
+    def top_items(self, since: str, until: str, k: int = 10) -> List[Dict]:
+        """日期范围内排序分最高的 k 个条目（同一链接出现在多天时取最高的一次）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM items WHERE date >= ? AND date <= ?",
+                (since, until),
+            ).fetchall()
+
+        best: Dict[str, Dict] = {}
+        for row in rows:
+            row = dict(row)
+            row["rank"] = rank(row)
+            if row["rank"] <= 0:
+                continue
+            current = best.get(row["url"])
+            if current is None or row["rank"] > current["rank"]:
+                best[row["url"]] = row
+        return heapq.nlargest(k, best.values(), key=lambda row: (row["rank"], row["date"]))
+
+    def record_processed(
+        self,
+        date_str: str,
+        counts: Dict[str, Dict[str, int]],
+        processed_on: Optional[date] = None,
+    ) -> None:
+        """累加某天摘要中各来源被处理的条目数
+
+        Args:
+            date_str: 条目所属摘要的日期
+            counts: {来源: {"read": n, "skipped": n, "starred": n}}
+            processed_on: 处理日期（默认今天），用于计算等待天数
+        """
+        processed_on = processed_on or date.today()
+        wait = max(0, (processed_on - datetime.strptime(date_str, "%Y-%m-%d").date()).days)
+        rows = []
+        for source, actions in counts.items():
+            values = [actions.get(action, 0) for action in ACTIONS]
+            if any(values):
+                rows.append((date_str, source, *values, wait * sum(values)))
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO daily (date, source, read, skipped, starred, wait_days)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (date, source) DO UPDATE SET
+                    read = read + excluded.read,
+                    skipped = skipped + excluded.skipped,
+                    starred = starred + excluded.starred,
+                    wait_days = wait_days + excluded.wait_days
+                """,
+                rows,
+            )
+
+    def _where(self, since: Optional[str], until: Optional[str]) -> tuple:
+        clauses, params = [], []
+        if since:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("date <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def rollup(self, period: str = "week", since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """按 day / week / month 汇总，按时间升序"""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period!r} (expected one of {tuple(PERIODS)})")
+        where, params = self._where(since, until)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {PERIODS[period]} AS period, {TOTALS} FROM daily{where} "
+                f"GROUP BY period ORDER BY period",
+                params,
+            ).fetchall()
+        return [_rates(dict(row)) for row in rows]
+
+    def by_source(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """按来源汇总，按生成条目数降序"""
+        where, params = self._where(since, until)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT source, {TOTALS} FROM daily{where} GROUP BY source ORDER BY generated DESC, source",
+                params,
+            ).fetchall()
+        return [_rates(dict(row)) for row in rows]
+
+    def backlog(self, today: Optional[date] = None) -> Dict:
+        """当前积压：未处理条目数、最早积压的摘要日期、按条目加权的平均积压天数"""
+        today = today or date.today()
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT date, SUM(generated) - SUM(read + skipped + starred) AS pending
+                FROM daily GROUP BY date HAVING pending > 0 ORDER BY date
+                """
+            ).fetchall()
+
+        pending = sum(row["pending"] for row in rows)
+        age = sum(
+            row["pending"] * (today - datetime.strptime(row["date"], "%Y-%m-%d").date()).days
+            for row in rows
+        )
+        return {
+            "pending": pending,
+            "oldest": rows[0]["date"] if rows else None,
+            "avg_age": age / pending if pending else None,
+        }
@@ -0,0 +1,169 @@
+"""历史回填 - 按日期范围批量生成摘要"""
+
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .generator import DigestGenerator, get_week_range
+
+if TYPE_CHECKING:
+    from .sources import HackerNewsAPI, ProductHuntAPI, NewsletterFetcher
+
+
+def date_range(start: datetime, end: datetime) -> List[datetime]:
+    """[start, end] 之间的每一天（含两端，按日对齐）"""
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    last = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    days = []
+    while day <= last:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+class Backfill:
+    """日期范围回填
+
+    所有日期共享同一组客户端（同一个 HTTP 连接池和 HN item 缓存）；
+    Newsletter 只抓取一次，再按发布日期分配到各天；每天的 HN / PH
+    查询并发执行，并发数由 max_workers 限制。
+    """
+
+    def __init__(
+        self,
+        generator: DigestGenerator,
+        hn: Optional["HackerNewsAPI"] = None,
+        ph: Optional["ProductHuntAPI"] = None,
+        nf: Optional["NewsletterFetcher"] = None,
+        hn_limit: int = 20,
+        hn_categories: Sequence[str] = ("top",),
+        ph_limit: int = 10,
+        max_workers: int = 4,
+    ):
+        """
+        初始化回填任务
+
+        Args:
+            generator: 文档生成器
+            hn / ph / nf: 数据源客户端，None 表示该来源不参与回填
+            hn_limit: 每天 HN 条数
+            hn_categories: HN 分类（top/show/ask...）
+            ph_limit: 每天 PH 条数
+            max_workers: 同时生成的天数上限
+        """
+        self.generator = generator
+        self.hn = hn
+        self.ph = ph
+        self.nf = nf
+        self.hn_limit = hn_limit
+        self.hn_categories = list(hn_categories) or ["top"]
+        self.ph_limit = ph_limit
+        self.max_workers = max(1, max_workers)
+
+    def plan(self, start: datetime, end: datetime) -> Dict:
+        """规划回填：需要生成的日期、需要刷新的周汇总，以及 Newsletter 回看天数"""
+        days = date_range(start, end)
+        # 每周取范围内的第一天作为代表（周汇总的年份取自传入日期）
+        weeks: Dict[datetime, datetime] = {}
+        for day in days:
+            weeks.setdefault(get_week_range(day)[0], day)
+        weeks = [weeks[key] for key in sorted(weeks)]
+        lookback = (datetime.now() - days[0]).days + 1 if days else 0
+        return {"days": days, "weeks": weeks, "newsletter_days": max(1, lookback)}
+
+    def _bucket_newsletters(self, lookback_days: int) -> Dict[str, List[Dict]]:
+        """一次性抓取所有 feed，并按文章发布日期分桶"""
+        buckets: Dict[str, List[Dict]] = {}
+        if not self.nf:
+            return buckets
+
+        for feed in self.nf.fetch_all(days=lookback_days):
+            for article in feed.get("articles", []):
+                published = article.published
+                if not published:
+                    # 无发布日期的文章无法归到具体某一天
+                    continue
+                day_feeds = buckets.setdefault(published[:10], {})
+                day_feeds.setdefault(feed["name"], {
+                    "name": feed["name"],
+                    "url": feed.get("url", ""),
+                    "articles": [],
+                })["articles"].append(article)
+
+        return {day: list(feeds.values()) for day, feeds in buckets.items()}
+
+    def _fetch_hn(self, day: datetime) -> List[Dict]:
+        """获取某天的 HN stories（各分类合并去重）"""
+        if not self.hn:
+            return []
+
+        per_category = max(1, self.hn_limit // len(self.hn_categories))
+        seen = set()
+        stories = []
+        for category in self.hn_categories:
+            for story in self.hn.get_stories_between(
+                day, day + timedelta(days=1), limit=per_category, category=category
+            ):
+                if story.id not in seen:
+                    seen.add(story.id)
+                    stories.append(story)
+
+        stories.sort(key=lambda x: x.score, reverse=True)
+        return stories[:self.hn_limit]
+
+    def _generate_day(self, day: datetime, newsletters: List[Dict]) -> Path:
+        """抓取并生成某一天的摘要"""
+        hn_stories = self._fetch_hn(day)
+        ph_posts = (
+            self.ph.get_posts_between(day, day + timedelta(days=1), limit=self.ph_limit)
+            if self.ph else []
+        )
+        return self.generator.generate(
+            hn_stories=hn_stories,
+            ph_posts=ph_posts,
+            newsletters=newsletters,
+            date=day,
+        )
+
+    def run(
+        self,
+        start: datetime,
+        end: datetime,
+        on_day: Optional[Callable[[datetime, Optional[Path], Optional[Exception]], None]] = None,
+    ) -> Dict:
+        """执行回填，返回 {"days": {日期: 路径}, "weekly": [...], "errors": {日期: 错误}}"""
+        plan = self.plan(start, end)
+        newsletters = self._bucket_newsletters(plan["newsletter_days"])
+
+        written: Dict[str, Path] = {}
+        errors: Dict[str, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._generate_day, day, newsletters.get(day.strftime("%Y-%m-%d"), [])
+                ): day
+                for day in plan["days"]
+            }
+            for future in as_completed(futures):
+                day = futures[future]
+                date_str = day.strftime("%Y-%m-%d")
+                try:
+                    path = future.result()
+                    written[date_str] = path
+                    if on_day:
+                        on_day(day, path, None)
+                except Exception as e:
+                    errors[date_str] = str(e)
+                    if on_day:
+                        on_day(day, None, e)
+
+        # 所有日期写完后统一刷新涉及的周汇总
+        weekly = [self.generator.generate_weekly_index(week) for week in plan["weeks"]]
+
+        return {
+            "days": dict(sorted(written.items())),
+            "weekly": weekly,
+            "errors": errors,
+        }
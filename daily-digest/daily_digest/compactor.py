@@ -0,0 +1,234 @@
+"""归档压缩 - 把旧摘要和每日收藏合并为按月压缩包"""
+
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .journal import locked_journal
+from .processor import MarkProcessor
+from .search import ARCHIVE_NAME_PATTERN, extract_items
+
+
+BUNDLE_DIR = "Bundles"
+
+
+def _is_completed(path: Path) -> bool:
+    """摘要是否已处理完（按正文中剩余的操作行判断，不信任 frontmatter 的 status）"""
+    return MarkProcessor.is_completed(path.read_text(encoding="utf-8"))
+
+
+def _merge_starred(existing: bytes, new: bytes) -> bytes:
+    """把同一天新产生的收藏追加到已入包的收藏文件（跳过文件头，已包含的内容不重复追加）"""
+    text = new.decode("utf-8")
+    _, sep, body = text.partition("\n---\n\n")
+    body = (body if sep else text).strip("\n")
+    merged = existing.decode("utf-8")
+    if not body or body in merged:
+        return existing
+    return (merged.rstrip("\n") + "\n\n" + body + "\n\n").encode("utf-8")
+
+
+class Compactor:
+    """按月压缩旧文件
+
+    超过保留天数的已完成摘要和每日收藏文件会写入
+    `Daily Digest/Bundles/YYYY-MM.zip`（zip 中央目录即随机访问索引，
+    每个成员独立压缩），原文件随后删除；收藏归档目录下保留一份
+    `YYYY-MM.md` 月度汇总供 Obsidian 浏览。
+    """
+
+    def __init__(self, processor: MarkProcessor):
+        self.processor = processor
+        self.digest_dir = processor.digest_dir
+        self.archive_dir = processor.archive_dir
+        self.bundle_dir = self.digest_dir / BUNDLE_DIR
+
+    def bundle_path(self, month: str) -> Path:
+        """某月压缩包路径（month 为 YYYY-MM）"""
+        return self.bundle_dir / f"{month}.zip"
+
+    def plan(self, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Dict[str, List[Path]]]:
+        """列出需要压缩的文件，按月分组"""
+        cutoff = ((now or datetime.now()) - timedelta(days=days)).date()
+        months: Dict[str, Dict[str, List[Path]]] = {}
+
+        for path in self.processor.layout.iter_digests(end=cutoff - timedelta(days=1)):
+            if _is_completed(path):
+                months.setdefault(path.stem[:7], {"digests": [], "starred": []})["digests"].append(path)
+
+        with os.scandir(self.archive_dir) as entries:
+            for entry in entries:
+                match = ARCHIVE_NAME_PATTERN.match(entry.name)
+                if match and entry.is_file() and match.group(1) < cutoff.isoformat():
+                    # 摘要还没处理完时可能还会产生新的收藏，先不压缩
+                    digest = self.processor.layout.find(match.group(1))
+                    if digest is not None and not _is_completed(digest):
+                        continue
+                    months.setdefault(match.group(1)[:7], {"digests": [], "starred": []})["starred"].append(
+                        Path(entry.path)
+                    )
+
+        for files in months.values():
+            files["digests"].sort()
+            files["starred"].sort()
+        return dict(sorted(months.items()))
+
+    def compact(self, days: int = 30, now: Optional[datetime] = None) -> List[Dict]:
+        """执行压缩，返回每个月的处理结果"""
+        results = []
+        bundled: List[Path] = []
+        with locked_journal(self.digest_dir) as journal:
+            for month, files in self.plan(days, now).items():
+                bundle, written = self._write_bundle(month, files)
+                journal.stage(self.archive_dir / f"{month}.md", self._build_summary(month, bundle))
+                bundled.extend(written)
+                results.append({
+                    "month": month,
+                    "bundle": bundle,
+                    "digests": len(files["digests"]),
+                    "starred": len(files["starred"]),
+                })
+
+            # 压缩包和月度汇总都落盘后再删除原文件（只删除内容已在包中的文件）；
+            # 中途崩溃时原文件仍在，重跑时内容相同的成员直接跳过
+            journal.on_commit(lambda: self._remove_originals(bundled))
+        return results
+
+    def _write_bundle(self, month: str, files: Dict[str, List[Path]]) -> Tuple[Path, List[Path]]:
+        """把文件写入月度压缩包（在临时文件中修改后原子替换）
+
+        包中已有同名成员时：内容相同则跳过；收藏文件把新收藏追加到已有成员，
+        摘要用新内容替换。需要替换成员时重建整个压缩包，否则直接追加。
+
+        Returns:
+            (压缩包路径, 内容已在包中、可以删除的原文件)
+        """
+        bundle = self.bundle_path(month)
+        bundle.parent.mkdir(parents=True, exist_ok=True)
+
+        members: Dict[str, bytes] = {}
+        written: List[Path] = []
+        for kind in ("digests", "starred"):
+            for path in files[kind]:
+                members[f"{kind}/{path.name}"] = path.read_bytes()
+                written.append(path)
+
+        replace = set()
+        if bundle.exists():
+            with zipfile.ZipFile(bundle) as zf:
+                existing = set(zf.namelist())
+                for name in [name for name in members if name in existing]:
+                    old = zf.read(name)
+                    data = _merge_starred(old, members[name]) if name.startswith("starred/") else members[name]
+                    if data == old:
+                        del members[name]
+                    else:
+                        members[name] = data
+                        replace.add(name)
+
+        fd, tmp_name = tempfile.mkstemp(dir=str(bundle.parent), prefix=f".{bundle.name}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            if replace:
+                # zip 不支持原地替换成员，复制其余成员到新文件
+                with zipfile.ZipFile(bundle) as src, zipfile.ZipFile(
+                    tmp_name, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9
+                ) as dst:
+                    for info in src.infolist():
+                        if info.filename not in replace:
+                            dst.writestr(info, src.read(info))
+            elif bundle.exists():
+                shutil.copyfile(bundle, tmp_name)
+            else:
+                os.unlink(tmp_name)
+
+            with zipfile.ZipFile(tmp_name, "a", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+                for name, data in members.items():
+                    zf.writestr(name, data)
+
+            with open(tmp_name, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_name, bundle)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return bundle, written
+
+    def _build_summary(self, month: str, bundle: Path) -> str:
+        """根据压缩包内容生成月度 Markdown 汇总"""
+        digests = []
+        starred: Dict[str, List[Dict]] = {}
+        with zipfile.ZipFile(bundle) as zf:
+            for name in sorted(zf.namelist()):
+                kind, filename = name.split("/", 1)
+                if kind == "digests":
+                    digests.append(filename[:-3])
+                elif kind == "starred":
+                    match = ARCHIVE_NAME_PATTERN.match(filename)
+                    if match:
+                        content = zf.read(name).decode("utf-8")
+                        starred[match.group(1)] = extract_items(content)
+
+        total_starred = sum(len(items) for items in starred.values())
+        lines = [
+            "---",
+            f"month: {month}",
+            "type: monthly-bundle",
+            f"digests: {len(digests)}",
+            f"starred: {total_starred}",
+            "---",
+            "",
+            f"# 🗜️ {month} 月度归档",
+            "",
+            f"> 原始文件已压缩到 `{BUNDLE_DIR}/{bundle.name}`",
+            "",
+            f"📅 **已压缩摘要**: {len(digests)} 天",
+            f"⭐ **收藏条目**: {total_starred} 条",
+            "",
+            "---",
+            "",
+            "## ⭐ 收藏",
+            "",
+        ]
+
+        for date_str, items in sorted(starred.items()):
+            lines.append(f"### {date_str}")
+            lines.append("")
+            for item in items:
+                lines.append(f"- [{item['title']}]({item['url']}) · {item['source']}")
+            lines.append("")
+
+        if digests:
+            lines.extend(["## 📅 已压缩的每日摘要", ""])
+            lines.append(", ".join(digests))
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def _remove_originals(self, paths: List[Path]) -> None:
+        """删除已入包的原文件，并清理空的分片目录"""
+        parents = set()
+        for path in paths:
+            path.unlink(missing_ok=True)
+            parents.add(path.parent)
+
+        for parent in sorted(parents, reverse=True):
+            # 只清理摘要目录下的 YYYY/MM 空分片
+            for directory in (parent, parent.parent):
+                if directory != self.digest_dir and re.fullmatch(r"\d{2}|\d{4}", directory.name):
+                    try:
+                        directory.rmdir()
+                    except OSError:
+                        pass
+
+    def read(self, month: str, name: str) -> str:
+        """随机读取压缩包中的单个文件，如 read("2025-01", "2025-01-20.md")"""
+        kind = "starred" if name.endswith("-starred.md") else "digests"
+        with zipfile.ZipFile(self.bundle_path(month)) as zf:
+            return zf.read(f"{kind}/{name}").decode("utf-8")
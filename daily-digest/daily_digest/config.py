@@ -0,0 +1,50 @@
+"""配置加载 - 缓存解析后的 YAML，配置未修改时不必导入和运行 YAML 解析器"""
+
+import os
+import zlib
+import marshal
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# 缓存格式变化时递增，旧缓存自动失效
+CACHE_VERSION = 1
+
+
+def cache_dir() -> Path:
+    return Path(os.environ.get("XDG_CACHE_HOME") or "~/.cache").expanduser() / "daily-digest"
+
+
+def load_yaml(config_path: Path, use_cache: bool = True) -> Optional[Dict]:
+    """读取 YAML 配置
+
+    解析结果以 marshal 格式缓存，按配置文件的路径、mtime 和大小校验；
+    命中时只需一次文件读取，不导入 yaml。含有 marshal 不支持的值
+    （如 YAML 日期）的配置不缓存，每次照常解析。
+    """
+    config_path = Path(config_path).resolve()
+    stat = config_path.stat()
+    stamp = (CACHE_VERSION, str(config_path), stat.st_mtime_ns, stat.st_size)
+    cache_path = cache_dir() / f"config-{zlib.crc32(str(config_path).encode('utf-8')):08x}.marshal"
+
+    if use_cache:
+        try:
+            cached = marshal.loads(cache_path.read_bytes())
+            if cached[0] == stamp:
+                return cached[1]
+        except (OSError, ValueError, EOFError, TypeError, IndexError):
+            pass
+
+    import yaml
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    if use_cache:
+        from .journal import atomic_write
+
+        try:
+            atomic_write(cache_path, marshal.dumps((stamp, config)))
+        except (OSError, ValueError):
+            pass
+    return config
@@ -2,9 +2,23 @@
 
 import os
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 from pathlib import Path
 
+from .journal import locked_journal, open_temp
+from .layout import DigestLayout, LAYOUT_FLAT
+
+if TYPE_CHECKING:
+    # 渲染、统计（sqlite3）和指标在生成时才导入，只查看帮助或处理标记的命令不必加载
+    from .models import Story, Post
+    from .render import Renderer
+
+
+EXPORT_DIR = "Exports"
+
+# 周汇总中“本周精选”的条目数
+WEEKLY_TOP_K = 10
+
 
 def get_week_number(date: datetime) -> int:
     """获取年内周数"""
@@ -21,244 +35,156 @@ def get_week_range(date: datetime) -> tuple:
 class DigestGenerator:
     """每日摘要文档生成器"""
     
-    def __init__(self, vault_path: str, digest_dir: str = "Daily Digest"):
+    def __init__(
+        self,
+        vault_path: str,
+        digest_dir: str = "Daily Digest",
+        layout: str = LAYOUT_FLAT,
+        formats: Optional[List[str]] = None,
+        base_url: str = "",
+    ):
+        """
+        初始化生成器
+        
+        Args:
+            vault_path: Obsidian Vault 路径
+            digest_dir: 摘要目录（相对于 vault）
+            layout: 摘要文件布局（flat / sharded）
+            formats: 额外导出格式（html / json_feed / rss），写入 Exports 目录
+            base_url: 导出内容的主页链接，留空时 RSS 链接到 Obsidian 中的摘要
+        """
         self.vault_path = Path(vault_path).expanduser()
         self.digest_dir = self.vault_path / digest_dir
         self.digest_dir.mkdir(parents=True, exist_ok=True)
+        self.layout = DigestLayout(self.digest_dir, layout)
+        
+        from .analytics import StatsStore, STATS_DB
+        from .render import FORMAT_MARKDOWN, RENDERERS
+        
+        self.formats = [fmt for fmt in (formats or []) if fmt != FORMAT_MARKDOWN]
+        for fmt in self.formats:
+            if fmt not in RENDERERS:
+                raise ValueError(f"Unknown export format: {fmt!r} (expected one of {tuple(RENDERERS)})")
+        self.base_url = base_url
+        self.exports_dir = self.digest_dir / EXPORT_DIR
         
         # 创建子目录
         self.weekly_dir = self.digest_dir / "Weekly"
         self.weekly_dir.mkdir(exist_ok=True)
         self.archive_dir = self.digest_dir / "Archive"
         self.archive_dir.mkdir(exist_ok=True)
+        
+        # 阅读行为统计：记录每天各来源生成的条目数
+        self.stats = StatsStore(self.digest_dir / STATS_DB)
     
     def generate(
         self,
-        hn_stories: List[Dict] = None,
-        ph_posts: List[Dict] = None,
+        hn_stories: List["Story"] = None,
+        ph_posts: List["Post"] = None,
         newsletters: List[Dict] = None,
         date: Optional[datetime] = None,
     ) -> Path:
-        """生成每日摘要文档"""
+        """生成每日摘要文档（同一遍渲染写出配置的其他导出格式）"""
+        from .metrics import METRICS
+        from .render import build_digest
+        
         date = date or datetime.now()
         date_str = date.strftime("%Y-%m-%d")
         
-        content = self._build_content(
-            date_str=date_str,
-            hn_stories=hn_stories or [],
-            ph_posts=ph_posts or [],
-            newsletters=newsletters or [],
-        )
+        with METRICS.span("render", formats=len(self.formats) + 1):
+            digest = build_digest(
+                date_str=date_str,
+                hn_stories=hn_stories or [],
+                ph_posts=ph_posts or [],
+                newsletters=newsletters or [],
+            )
+            file_path = self.layout.path_for(date)
+            staged = self._render_to_temp(digest, file_path)
+        METRICS.inc("items_rendered_total", digest.total)
         
-        # 写入文件
-        file_path = self.digest_dir / f"{date_str}.md"
-        file_path.write_text(content, encoding="utf-8")
+        # 提交文件（加锁 + 原子 rename，避免与标记处理并发覆盖）
+        with METRICS.span("write", files=len(staged)):
+            with locked_journal(self.digest_dir) as journal:
+                for path, tmp_path in staged:
+                    journal.stage_file(path, tmp_path)
+                
+                counts: Dict[str, int] = {}
+                for item in digest.items():
+                    counts[item.source] = counts.get(item.source, 0) + 1
+                journal.on_commit(lambda: self.stats.record_generated(date_str, counts))
+                journal.on_commit(lambda: self.stats.record_items(date_str, digest.items()))
         
         return file_path
     
-    def _build_content(
-        self,
-        date_str: str,
-        hn_stories: List[Dict],
-        ph_posts: List[Dict],
-        newsletters: List[Dict],
-    ) -> str:
-        """构建 Markdown 内容"""
-        # 计算统计
-        total_items = len(hn_stories) + len(ph_posts)
-        for nl in newsletters:
-            total_items += len(nl.get("articles", []))
+    def _render_to_temp(self, digest, file_path: Path) -> List[Tuple[Path, Path]]:
+        """各格式边渲染边写入目标路径旁的临时文件，返回 [(目标路径, 临时文件)]
         
-        sources = []
-        if hn_stories:
-            sources.append("Hacker News")
-        if ph_posts:
-            sources.append("Product Hunt")
-        for nl in newsletters:
-            if nl.get("articles"):
-                sources.append(nl.get("name", "Newsletter"))
+        不在内存中拼接完整内容，条目很多（回填、团队汇总）时内存占用也保持平稳。
+        """
+        from .render import FORMAT_MARKDOWN, render_stream
         
-        lines = [
-            "---",
-            f"date: {date_str}",
-            "status: unread",
-            f"total: {total_items}",
-            "---",
-            "",
-            f"# 📰 每日摘要 - {date_str}",
-            "",
-            "> 💡 **Inbox模式**: 本索引只显示未处理的文章",
-            ">",
-            "> - ✅已读、❌跳过、⭐收藏的文章已自动移除",
-            "> - 👆待写作的文章仍在此处",
-            "> - 周末目标: 清空此索引 = 全部处理完",
-            "",
-            "---",
-            "",
-            f"📊 **待处理**: {total_items} 篇",
-            f"📎 **来源**: {', '.join(sources)}",
-            f"🕐 **更新时间**: {date_str}",
-            "",
-            "---",
-            "",
-        ]
-        
-        # Hacker News 部分
-        if hn_stories:
-            lines.extend(self._build_hn_section(hn_stories))
-        
-        # Product Hunt 部分
-        if ph_posts:
-            lines.extend(self._build_ph_section(ph_posts))
-        
-        # Newsletter 部分
-        if newsletters:
-            lines.extend(self._build_newsletter_section(newsletters))
-        
-        # 使用说明
-        lines.extend([
-            "",
-            "---",
-            "",
-            "## 📋 标记说明",
-            "",
-            "| 标记 | 含义 | 处理 |",
-            "|:---:|:---|:---|",
-            "| ✅ | 已读 | 删除 |",
-            "| ❌ | 跳过 | 删除 |",
-            "| ⭐ | 收藏 | 归档 |",
-            "| 👆 | 待写作 | 保留 |",
-            "",
-        ])
-        
-        return "\n".join(lines)
-    
-    def _build_hn_section(self, stories: List[Dict]) -> List[str]:
-        """构建 Hacker News 部分"""
-        lines = [
-            "## 🔥 Hacker News",
-            "",
-        ]
-        
-        for story in stories:
-            title = story.get("title", "Untitled")
-            url = story.get("url", "")
-            hn_url = story.get("hn_url", "")
-            score = story.get("score", 0)
-            comments = story.get("comments", 0)
-            
-            # 根据 score 生成星级
-            stars = self._score_to_stars(score, max_score=500)
-            
-            lines.append(f"### [{title}]({url}) {stars}")
-            lines.append("")
-            lines.append(f"- **URL**: {url}")
-            lines.append(f"- **讨论**: [HN 评论]({hn_url}) (👍 {score} | 💬 {comments})")
-            lines.append("")
-            # 添加操作选择
-            lines.extend(self._build_action_buttons())
-            lines.append("")
-        
-        return lines
-    
-    def _build_action_buttons(self) -> List[str]:
-        """构建操作按钮"""
-        return [
-            "**操作**: [ ] ✅ 已读  [ ] ❌ 跳过  [ ] ⭐ 收藏",
-        ]
+        staged = []
+        targets = []
+        try:
+            try:
+                for renderer in self._renderers(file_path):
+                    if renderer.name == FORMAT_MARKDOWN:
+                        path = file_path
+                    else:
+                        path = self.get_export_path(digest.date_str, renderer.name)
+                    tmp_path, f = open_temp(path)
+                    staged.append((path, tmp_path))
+                    targets.append((renderer, f))
+                
+                render_stream(digest, targets)
+                for _, f in targets:
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                for _, f in targets:
+                    f.close()
+        except Exception:
+            for _, tmp_path in staged:
+                tmp_path.unlink(missing_ok=True)
+            raise
+        return staged
     
-    def _score_to_stars(self, score: int, max_score: int = 500) -> str:
-        """将分数转换为星级评分"""
-        if score >= max_score:
-            filled = 5
-        else:
-            filled = min(5, max(1, int(score / max_score * 5) + 1))
+    def _renderers(self, file_path: Path) -> List["Renderer"]:
+        """每次生成新建渲染器实例（回填时多个线程并发生成）"""
+        from .render import FORMAT_JSON_FEED, FORMAT_RSS, RENDERERS, JsonFeedRenderer, MarkdownRenderer, RssRenderer
         
-        return "⭐" * filled + "☆" * (5 - filled)
+        link = self.base_url or f"obsidian://open?path={file_path.absolute()}"
+        renderers: List["Renderer"] = [MarkdownRenderer()]
+        for fmt in self.formats:
+            if fmt == FORMAT_JSON_FEED:
+                renderers.append(JsonFeedRenderer(home_page_url=self.base_url))
+            elif fmt == FORMAT_RSS:
+                renderers.append(RssRenderer(link=link))
+            else:
+                renderers.append(RENDERERS[fmt]())
+        return renderers
     
-    def _build_ph_section(self, posts: List[Dict]) -> List[str]:
-        """构建 Product Hunt 部分"""
-        lines = [
-            "## 🚀 Product Hunt",
-            "",
-        ]
-        
-        for post in posts:
-            name = post.get("name", "Untitled")
-            tagline = post.get("tagline", "")
-            url = post.get("url", "")
-            votes = post.get("votes", 0)
-            
-            # 根据 votes 生成星级
-            stars = self._score_to_stars(votes, max_score=300)
-            
-            lines.append(f"### [{name}]({url}) {stars}")
-            lines.append("")
-            if tagline:
-                lines.append(f"> {tagline}")
-                lines.append("")
-            lines.append(f"- **URL**: {url}")
-            lines.append(f"- **Votes**: ⬆️ {votes}")
-            lines.append("")
-            # 添加操作选择
-            lines.extend(self._build_action_buttons())
-            lines.append("")
+    def get_export_path(self, date_str: str, fmt: str) -> Path:
+        """导出文件路径，如 Exports/2025-01-20.html"""
+        from .render import RENDERERS
         
-        return lines
-    
-    def _build_newsletter_section(self, newsletters: List[Dict]) -> List[str]:
-        """构建 Newsletter 部分"""
-        lines = [
-            "## 📧 Newsletters",
-            "",
-        ]
-        
-        for feed in newsletters:
-            feed_name = feed.get("name", "Newsletter")
-            articles = feed.get("articles", [])
-            
-            if not articles:
-                continue
-            
-            lines.append(f"### 📰 {feed_name}")
-            lines.append("")
-            
-            for article in articles:
-                title = article.get("title", "Untitled")
-                url = article.get("url", "")
-                summary = article.get("summary", "")
-                
-                lines.append(f"#### [{title}]({url})")
-                lines.append("")
-                if summary:
-                    # 截断过长的摘要
-                    if len(summary) > 200:
-                        summary = summary[:200] + "..."
-                    lines.append(f"> {summary}")
-                    lines.append("")
-                lines.append(f"- **URL**: {url}")
-                lines.append("")
-                # 添加操作选择
-                lines.extend(self._build_action_buttons())
-                lines.append("")
-        
-        return lines
+        return self.exports_dir / f"{date_str}{RENDERERS[fmt].extension}"
     
     def get_digest_path(self, date: Optional[datetime] = None) -> Path:
         """获取指定日期的摘要文件路径"""
         date = date or datetime.now()
-        date_str = date.strftime("%Y-%m-%d")
-        return self.digest_dir / f"{date_str}.md"
+        return self.layout.find(date) or self.layout.path_for(date)
     
     def list_digests(self, limit: int = 30) -> List[Path]:
         """列出最近的摘要文件"""
-        files = sorted(self.digest_dir.glob("*.md"), reverse=True)
-        return files[:limit]
+        files = list(self.layout.iter_digests())
+        return files[::-1][:limit]
     
-    def generate_weekly_index(self, date: Optional[datetime] = None) -> Path:
-        """生成周汇总索引页"""
+    def generate_weekly_index(self, date: Optional[datetime] = None, top_k: int = WEEKLY_TOP_K) -> Path:
+        """生成周汇总索引页（本周精选从条目分数索引中选出）"""
         date = date or datetime.now()
-        year = date.year
+        # ISO 年：12 月底 / 1 月初的几天可能属于相邻年份的周
+        year = date.isocalendar()[0]
         week_num = get_week_number(date)
         week_start, week_end = get_week_range(date)
         
@@ -269,17 +195,14 @@ class DigestGenerator:
         sources = set()
         
         # 扫描本周的文件
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            day_file = self.digest_dir / f"{day.strftime('%Y-%m-%d')}.md"
-            if day_file.exists():
-                content = day_file.read_text(encoding="utf-8")
-                # 简单统计
-                total_items += content.count("###")
-                if "Hacker News" in content:
-                    sources.add("Hacker News")
-                if "Product Hunt" in content:
-                    sources.add("Product Hunt")
+        for day_file in self.layout.iter_digests(week_start, week_end):
+            content = day_file.read_text(encoding="utf-8")
+            # 简单统计
+            total_items += content.count("###")
+            if "Hacker News" in content:
+                sources.add("Hacker News")
+            if "Product Hunt" in content:
+                sources.add("Product Hunt")
         
         # 统计归档数量
         for archive_file in self.archive_dir.glob("*-starred.md"):
@@ -319,13 +242,26 @@ class DigestGenerator:
             day = week_start + timedelta(days=i)
             day_str = day.strftime("%Y-%m-%d")
             weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-            day_file = self.digest_dir / f"{day_str}.md"
-            
-            if day_file.exists():
+            if self.layout.find(day):
                 lines.append(f"- [[{day_str}]] ({weekday_names[i]})")
             else:
                 lines.append(f"- {day_str} ({weekday_names[i]}) - *未生成*")
         
+        # 本周精选：按归一化分数和收藏从索引中选出
+        top_items = self.stats.top_items(
+            week_start.strftime("%Y-%m-%d"), week_end.strftime("%Y-%m-%d"), k=top_k
+        ) if top_k else []
+        if top_items:
+            lines.extend(["", "---", "", "## 🏆 本周精选", ""])
+            for row in top_items:
+                details = [row["source"]]
+                if row["score"] is not None:
+                    details.append(f"{'⬆️' if row['source'] == 'Product Hunt' else '👍'} {row['score']}")
+                if row["starred"]:
+                    details.append("⭐ 已收藏")
+                details.append(f"[[{row['date']}]]")
+                lines.append(f"- [{row['title']}]({row['url']}) · " + " · ".join(details))
+        
         lines.extend([
             "",
             "---",
@@ -343,25 +279,26 @@ class DigestGenerator:
         
         # 写入文件
         file_path = self.weekly_dir / f"{year}-W{week_num:02d}.md"
-        file_path.write_text("\n".join(lines), encoding="utf-8")
+        with locked_journal(self.digest_dir) as journal:
+            journal.stage(file_path, "\n".join(lines))
         
         return file_path
 
 
 if __name__ == "__main__":
+    from .models import Story, Post
+    
     # 测试
     gen = DigestGenerator("./test_vault")
     
     # 模拟数据
     hn_stories = [
-        {"title": "Test Story", "url": "https://example.com", 
-         "hn_url": "https://news.ycombinator.com/item?id=123",
-         "score": 100, "comments": 50},
+        Story(id=123, title="Test Story", url="https://example.com", score=100, comments=50),
     ]
     
     ph_posts = [
-        {"name": "Cool Product", "tagline": "A cool product", 
-         "url": "https://producthunt.com/posts/cool", "votes": 200},
+        Post(id="1", name="Cool Product", tagline="A cool product", 
+             url="https://producthunt.com/posts/cool", votes=200),
     ]
     
     path = gen.generate(hn_stories=hn_stories, ph_posts=ph_posts)
@@ -0,0 +1,299 @@
+"""写前日志与文件锁 - 保证摘要改写与归档的原子性"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Iterator, Tuple, Union
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+LOCK_FILE = ".digest.lock"
+JOURNAL_FILE = ".digest.journal"
+
+# 进程内的可重入锁：flock 以打开的文件为单位，同一进程重复加锁会互相阻塞
+_registry_lock = threading.Lock()
+_thread_locks: Dict[str, threading.RLock] = {}
+_lock_depth: Dict[str, int] = {}
+_lock_handles: Dict[str, object] = {}
+
+
+def _os_lock(handle) -> None:
+    """获取系统级咨询锁（阻塞）"""
+    if os.name == "nt":
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _os_unlock(handle) -> None:
+    """释放系统级咨询锁"""
+    if os.name == "nt":
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """跨进程互斥的咨询式文件锁（同一线程可重入）"""
+    lock_path = Path(lock_path).expanduser().absolute()
+    key = str(lock_path)
+
+    with _registry_lock:
+        rlock = _thread_locks.setdefault(key, threading.RLock())
+
+    with rlock:
+        depth = _lock_depth.get(key, 0)
+        if depth == 0:
+            lock_path.parent.mkdir(parents=True, exist_ok=True)
+            handle = lock_path.open("a+b")
+            _os_lock(handle)
+            _lock_handles[key] = handle
+        _lock_depth[key] = depth + 1
+
+        try:
+            yield
+        finally:
+            _lock_depth[key] -= 1
+            if _lock_depth[key] == 0:
+                handle = _lock_handles.pop(key)
+                try:
+                    _os_unlock(handle)
+                finally:
+                    handle.close()
+
+
+def _fsync_dir(directory: Path) -> None:
+    """同步目录项，确保 rename 落盘（Windows 不支持）"""
+    if os.name == "nt":
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def open_temp(path: Path, binary: bool = False) -> Tuple[Path, IO]:
+    """在目标同目录创建临时文件，返回 (临时文件路径, 打开的文件对象)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp"
+    )
+    if binary:
+        return Path(tmp_name), os.fdopen(fd, "wb")
+    return Path(tmp_name), os.fdopen(fd, "w", encoding="utf-8", newline="")
+
+
+def _write_temp(path: Path, content: Union[str, bytes]) -> Path:
+    """在目标同目录写入临时文件并 fsync"""
+    tmp_path, f = open_temp(path, binary=isinstance(content, bytes))
+    try:
+        with f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        tmp_path.unlink()
+        raise
+    return tmp_path
+
+
+def atomic_write(path: Path, content: Union[str, bytes]) -> Path:
+    """原子写入：临时文件 + fsync + rename（content 为 bytes 时按二进制写入）"""
+    path = Path(path)
+    tmp_path = _write_temp(path, content)
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+    return path
+
+
+class WriteJournal:
+    """写前日志：一批文件的新内容先整体落盘，再批量 rename 生效
+
+    日志记录每个文件的完整新内容，重放是幂等的；崩溃后下次加锁时
+    通过 recover() 补完未完成的批次，不会出现归档重复或丢失。
+    流式写出的大文件用 stage_file() 暂存，日志中只记录临时文件路径。
+    """
+
+    def __init__(self, journal_path: Path):
+        self.journal_path = Path(journal_path)
+        self._pending: Dict[Path, str] = {}
+        self._files: Dict[Path, Path] = {}
+        self._on_commit: List[Callable[[], None]] = []
+
+    @property
+    def pending(self) -> List[Path]:
+        """待提交的文件"""
+        return list(self._pending) + list(self._files)
+
+    def read(self, path: Path) -> Optional[str]:
+        """读取文件内容（优先返回本批次中已暂存的内容）"""
+        path = Path(path)
+        if path in self._pending:
+            return self._pending[path]
+        if path in self._files:
+            return self._files[path].read_text(encoding="utf-8")
+        if path.exists():
+            return path.read_text(encoding="utf-8")
+        return None
+
+    def stage(self, path: Path, content: str) -> None:
+        """暂存文件的完整新内容"""
+        path = Path(path)
+        self._drop_file(path)
+        self._pending[path] = content
+
+    def stage_file(self, path: Path, tmp_path: Path) -> None:
+        """暂存已写好并 fsync 的临时文件（由 open_temp 创建），提交时 rename 为 path"""
+        path = Path(path)
+        self._pending.pop(path, None)
+        self._drop_file(path)
+        self._files[path] = Path(tmp_path)
+
+    def _drop_file(self, path: Path) -> None:
+        tmp_path = self._files.pop(path, None)
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+
+    def append(self, path: Path, text: str, header: str = "") -> None:
+        """暂存追加内容；文件不存在时先写入 header"""
+        current = self.read(path)
+        if current is None:
+            current = header
+        self.stage(path, current + text)
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """注册提交成功后执行的回调（如更新派生索引）"""
+        self._on_commit.append(callback)
+
+    def discard(self) -> None:
+        """丢弃未提交的修改"""
+        self._pending.clear()
+        for path in list(self._files):
+            self._drop_file(path)
+        self._on_commit.clear()
+
+    def commit(self) -> List[Path]:
+        """提交本批次：写日志 → 批量写临时文件 → rename → 删除日志"""
+        if not self._pending and not self._files:
+            self._run_callbacks()
+            return []
+
+        entries = [
+            {"path": str(path), "content": content}
+            for path, content in self._pending.items()
+        ] + [
+            {"path": str(path), "temp": str(tmp_path)}
+            for path, tmp_path in self._files.items()
+        ]
+
+        # 日志本身也原子落盘：要么完整存在，要么不存在
+        atomic_write(self.journal_path, json.dumps({"files": entries}, ensure_ascii=False))
+
+        committed = self._apply(entries)
+        self._clear_journal()
+        self._pending.clear()
+        self._files.clear()
+        self._run_callbacks()
+        return committed
+
+    def _run_callbacks(self) -> None:
+        """执行提交回调；回调失败不影响已落盘的数据"""
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Post-commit hook failed: {e}")
+
+    def recover(self) -> List[Path]:
+        """重放上次崩溃遗留的日志"""
+        if not self.journal_path.exists():
+            return []
+
+        try:
+            record = json.loads(self.journal_path.read_text(encoding="utf-8"))
+            entries = record.get("files", [])
+        except (ValueError, OSError) as e:
+            print(f"Discarding unreadable journal {self.journal_path}: {e}")
+            entries = []
+
+        recovered = self._apply(entries)
+        self._clear_journal()
+        return recovered
+
+    def _apply(self, entries: List[Dict]) -> List[Path]:
+        """批量应用：先全部写入临时文件，再统一 rename，每个目录只 fsync 一次"""
+        staged = []
+        written = []
+        try:
+            for entry in entries:
+                path = Path(entry["path"])
+                if "temp" in entry:
+                    # 临时文件已不存在说明上次已 rename 生效
+                    tmp_path = Path(entry["temp"])
+                    if tmp_path.exists():
+                        staged.append((tmp_path, path))
+                    continue
+                tmp_path = _write_temp(path, entry["content"])
+                written.append(tmp_path)
+                staged.append((tmp_path, path))
+        except Exception:
+            for tmp_path in written:
+                tmp_path.unlink(missing_ok=True)
+            raise
+
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
+
+        for directory in {path.parent for _, path in staged}:
+            _fsync_dir(directory)
+
+        return [path for _, path in staged]
+
+    def _clear_journal(self) -> None:
+        """删除日志文件"""
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+            _fsync_dir(self.journal_path.parent)
+
+    def __enter__(self) -> "WriteJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+@contextmanager
+def locked_journal(digest_dir: Path) -> Iterator[WriteJournal]:
+    """加锁并打开摘要目录的写前日志，正常退出时批量提交
+
+    所有写摘要目录的代码（生成、标记处理、周汇总）都应通过这里写入，
+    这样并发运行的 fetch_digest.py 与 process_marks.py 不会互相覆盖。
+    """
+    digest_dir = Path(digest_dir)
+    with file_lock(digest_dir / LOCK_FILE):
+        journal = WriteJournal(digest_dir / JOURNAL_FILE)
+        journal.recover()
+        with journal:
+            yield journal
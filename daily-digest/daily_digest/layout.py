@@ -0,0 +1,172 @@
+"""摘要文件布局 - 平铺或按 YYYY/MM/ 分片存放"""
+
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .journal import locked_journal
+
+
+DATE_FILE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})\.md$")
+
+LAYOUT_FLAT = "flat"
+LAYOUT_SHARDED = "sharded"
+LAYOUTS = (LAYOUT_FLAT, LAYOUT_SHARDED)
+
+DateLike = Union[date, datetime, str]
+
+
+def _to_date(value: DateLike) -> date:
+    """统一转换为 date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class DigestLayout:
+    """摘要文件的定位与发现
+
+    flat:    Daily Digest/2025-01-20.md
+    sharded: Daily Digest/2025/01/2025-01-20.md
+
+    发现文件时使用 os.scandir，分片模式下按日期范围跳过无关的年/月目录；
+    两种布局的文件会同时被识别，迁移中途中断也不会漏掉文件。
+    """
+
+    def __init__(self, digest_dir: Path, layout: str = LAYOUT_FLAT):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown digest layout: {layout!r} (expected one of {LAYOUTS})")
+        self.digest_dir = Path(digest_dir)
+        self.layout = layout
+
+    @property
+    def sharded(self) -> bool:
+        return self.layout == LAYOUT_SHARDED
+
+    def path_for(self, day: DateLike) -> Path:
+        """某天摘要应写入的路径"""
+        day = _to_date(day)
+        name = f"{day.isoformat()}.md"
+        if self.sharded:
+            return self.digest_dir / f"{day.year:04d}" / f"{day.month:02d}" / name
+        return self.digest_dir / name
+
+    def find(self, day: DateLike) -> Optional[Path]:
+        """查找某天已存在的摘要（优先当前布局）"""
+        day = _to_date(day)
+        flat = self.digest_dir / f"{day.isoformat()}.md"
+        sharded = self.digest_dir / f"{day.year:04d}" / f"{day.month:02d}" / flat.name
+        for candidate in ((sharded, flat) if self.sharded else (flat, sharded)):
+            if candidate.exists():
+                return candidate
+        return None
+
+    def iter_digests(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> Iterator[Path]:
+        """按日期升序遍历 [start, end] 范围内的摘要文件"""
+        start = _to_date(start) if start else None
+        end = _to_date(end) if end else None
+        found: Dict[str, Path] = {}
+
+        def add(name: str, path: str) -> None:
+            # 同一天同时存在两种布局的文件时，以当前布局为准
+            if name not in found or Path(path) == self.path_for(name[:10]):
+                found[name] = Path(path)
+
+        def in_range(name: str) -> bool:
+            match = DATE_FILE_PATTERN.match(name)
+            if not match:
+                return False
+            day = date(*(int(part) for part in match.groups()))
+            return (start is None or day >= start) and (end is None or day <= end)
+
+        def scan_files(directory: str) -> None:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and in_range(entry.name):
+                        add(entry.name, entry.path)
+
+        try:
+            with os.scandir(self.digest_dir) as entries:
+                top = list(entries)
+        except FileNotFoundError:
+            return iter(())
+
+        for entry in top:
+            if entry.is_file():
+                if in_range(entry.name):
+                    add(entry.name, entry.path)
+            elif entry.is_dir() and entry.name.isdigit() and len(entry.name) == 4:
+                year = int(entry.name)
+                if (start and year < start.year) or (end and year > end.year):
+                    continue
+                for month_dir in self._month_dirs(entry.path, year, start, end):
+                    scan_files(month_dir)
+
+        return iter([found[name] for name in sorted(found)])
+
+    def _month_dirs(
+        self,
+        year_dir: str,
+        year: int,
+        start: Optional[date],
+        end: Optional[date],
+    ) -> List[str]:
+        """年目录下落在范围内的月目录"""
+        months = []
+        with os.scandir(year_dir) as entries:
+            for entry in entries:
+                if not (entry.is_dir() and entry.name.isdigit() and len(entry.name) == 2):
+                    continue
+                month = int(entry.name)
+                if start and (year, month) < (start.year, start.month):
+                    continue
+                if end and (year, month) > (end.year, end.month):
+                    continue
+                months.append(entry.path)
+        return months
+
+    def shard_dirs(self) -> List[Path]:
+        """所有已存在的 YYYY/MM 分片目录"""
+        dirs = []
+        try:
+            with os.scandir(self.digest_dir) as entries:
+                years = [e.path for e in entries if e.is_dir() and e.name.isdigit() and len(e.name) == 4]
+        except FileNotFoundError:
+            return dirs
+        for year_dir in years:
+            dirs.extend(Path(p) for p in self._month_dirs(year_dir, int(Path(year_dir).name), None, None))
+        return sorted(dirs)
+
+    def migrate(self) -> List[Tuple[Path, Path]]:
+        """把所有摘要移动到当前布局下的位置，返回 [(原路径, 新路径)]"""
+        moved = []
+        # 先加锁并重放未完成的日志，避免迁移后日志把文件写回旧位置
+        with locked_journal(self.digest_dir):
+            for path in list(self.iter_digests()):
+                target = self.path_for(path.stem)
+                if path == target:
+                    continue
+                if target.exists():
+                    print(f"Skipping {path}: {target} already exists")
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, target)
+                moved.append((path, target))
+
+            # 清理迁移后留下的空分片目录
+            if not self.sharded:
+                for shard in self.shard_dirs():
+                    for directory in (shard, shard.parent):
+                        try:
+                            directory.rmdir()
+                        except OSError:
+                            pass
+        return moved
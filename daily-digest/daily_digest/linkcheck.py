@@ -0,0 +1,227 @@
+"""链接健康检查 - 并发检测摘要和收藏中的失效链接"""
+
+import re
+import json
+import time
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .journal import locked_journal, atomic_write
+from .transport import create_session
+
+
+URL_LINE_PATTERN = re.compile(r"^(- \*\*URL\*\*: )(https?://\S+?)(\s+(?:⚠️|↪️) .*)?$")
+MARKDOWN_LINK_PATTERN = re.compile(r"\]\((https?://[^)\s]+)\)")
+
+DEAD_MARK = "⚠️ 链接失效"
+REDIRECT_MARK = "↪️ 已重定向"
+
+# 这些状态码说明服务器不支持 HEAD 或拒绝了 HEAD，需要用 GET 复查
+HEAD_FALLBACK_STATUS = {403, 405, 501}
+
+
+def _normalize(url: str) -> str:
+    """忽略协议升级和末尾斜杠的差异"""
+    parts = urlsplit(url)
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}?{parts.query}"
+
+
+class LinkChecker:
+    """并发链接检查器
+
+    先 HEAD 后 GET 回退，结果缓存在 JSON 文件中，TTL 内不重复检查。
+    链接按 host 分队列，工作线程跳过已达并发上限的 host，某个 host
+    的链接很多时（如 news.ycombinator.com）不会占住所有线程。
+    """
+
+    def __init__(
+        self,
+        cache_path: Path,
+        ttl: float = 7 * 24 * 3600,
+        max_workers: int = 32,
+        per_host: int = 4,
+        timeout: int = 10,
+    ):
+        """
+        初始化检查器
+
+        Args:
+            cache_path: 结果缓存文件
+            ttl: 缓存有效期（秒）
+            max_workers: 全局并发数
+            per_host: 单个 host 的并发上限
+            timeout: 单次请求超时（秒）
+        """
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+
+        self.session = create_session(pool_maxsize=per_host, pool_connections=max_workers)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (compatible; daily-digest link checker)"
+
+        self.cache: Dict[str, Dict] = self._load_cache()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            return json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (ValueError, OSError):
+            return {}
+
+    def save_cache(self) -> None:
+        atomic_write(self.cache_path, json.dumps(self.cache, ensure_ascii=False))
+
+    def prune_cache(self, now: Optional[float] = None) -> int:
+        """删除超过 TTL 的缓存结果，返回删除数量"""
+        now = now or time.time()
+        expired = [url for url, cached in self.cache.items() if now - cached.get("checked_at", 0) >= self.ttl]
+        for url in expired:
+            del self.cache[url]
+        return len(expired)
+
+    def check(self, url: str) -> Dict:
+        """检查单个链接（不使用缓存，也不限制 host 并发）"""
+        result = {"url": url, "checked_at": time.time()}
+        try:
+            resp = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if resp.status_code in HEAD_FALLBACK_STATUS or resp.status_code >= 500:
+                resp.close()
+                resp = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+            resp.close()
+            result.update(status=resp.status_code, final_url=resp.url)
+        except requests.RequestException as e:
+            result.update(status=0, final_url=url, error=type(e).__name__)
+
+        result["dead"] = result["status"] == 0 or result["status"] >= 400
+        result["redirected"] = (
+            not result["dead"] and _normalize(result["final_url"]) != _normalize(url)
+        )
+        return result
+
+    def check_all(self, urls: Iterable[str], on_result=None) -> Dict[str, Dict]:
+        """并发检查所有链接，TTL 内的缓存结果直接复用；on_result 在调用线程中执行"""
+        pruned = self.prune_cache()
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, Deque[str]] = {}
+        for url in dict.fromkeys(urls):
+            cached = self.cache.get(url)
+            if cached:
+                results[url] = cached
+            else:
+                pending.setdefault(urlsplit(url).netloc.lower(), deque()).append(url)
+        total = sum(len(host_urls) for host_urls in pending.values())
+
+        active: Dict[str, int] = {host: 0 for host in pending}
+        ready = threading.Condition()
+        done: "queue.Queue" = queue.Queue()
+
+        def take() -> Optional[Tuple[str, str]]:
+            """取下一个未达并发上限的 host 的链接；全部饱和时等待，没有剩余时返回 None"""
+            with ready:
+                while pending:
+                    for host, host_urls in pending.items():
+                        if active[host] < self.per_host:
+                            url = host_urls.popleft()
+                            if not host_urls:
+                                del pending[host]
+                            active[host] += 1
+                            return host, url
+                    ready.wait()
+                return None
+
+        def work() -> None:
+            while True:
+                job = take()
+                if job is None:
+                    return
+                host, url = job
+                try:
+                    done.put(self.check(url))
+                except Exception as e:
+                    done.put(e)
+                finally:
+                    with ready:
+                        active[host] -= 1
+                        ready.notify_all()
+
+        workers = [
+            threading.Thread(target=work, daemon=True, name="linkcheck")
+            for _ in range(min(self.max_workers, total))
+        ]
+        for worker in workers:
+            worker.start()
+        for _ in range(total):
+            result = done.get()
+            if isinstance(result, Exception):
+                raise result
+            results[result["url"]] = result
+            self.cache[result["url"]] = result
+            if on_result:
+                on_result(result)
+        for worker in workers:
+            worker.join()
+
+        if total or pruned:
+            self.save_cache()
+        return results
+
+
+def extract_urls(paths: Iterable[Path]) -> Dict[str, List[Path]]:
+    """提取文件中的所有链接，返回 {url: [所在文件]}"""
+    urls: Dict[str, List[Path]] = {}
+    for path in paths:
+        content = path.read_text(encoding="utf-8")
+        found = set(MARKDOWN_LINK_PATTERN.findall(content))
+        for line in content.split("\n"):
+            match = URL_LINE_PATTERN.match(line)
+            if match:
+                found.add(match.group(2))
+        for url in found:
+            urls.setdefault(url, []).append(path)
+    return urls
+
+
+def annotate(content: str, results: Dict[str, Dict]) -> str:
+    """在 `- **URL**:` 行末标注失效或重定向；重复执行结果不变"""
+    lines = content.split("\n")
+    for i, line in enumerate(lines):
+        match = URL_LINE_PATTERN.match(line)
+        if not match:
+            continue
+        prefix, url = match.group(1), match.group(2)
+        result = results.get(url)
+        if result is None:
+            continue
+
+        if result["dead"]:
+            reason = result.get("error") or result["status"]
+            lines[i] = f"{prefix}{url} {DEAD_MARK} ({reason})"
+        elif result["redirected"]:
+            lines[i] = f"{prefix}{url} {REDIRECT_MARK}: {result['final_url']}"
+        else:
+            lines[i] = f"{prefix}{url}"
+    return "\n".join(lines)
+
+
+def annotate_files(digest_dir: Path, files: Iterable[Path], results: Dict[str, Dict]) -> List[Path]:
+    """批量标注并原子提交，返回发生变化的文件"""
+    changed = []
+    with locked_journal(digest_dir) as journal:
+        for path in files:
+            content = journal.read(path)
+            if content is None:
+                continue
+            new_content = annotate(content, results)
+            if new_content != content:
+                journal.stage(path, new_content)
+                changed.append(path)
+    return changed
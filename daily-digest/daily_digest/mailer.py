@@ -0,0 +1,210 @@
+"""批量邮件 - 复用已认证的 SMTP 连接给多个收件人发送各自的摘要"""
+
+import os
+import time
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+from typing import Callable, Dict, List, Optional
+
+from .metrics import METRICS
+
+
+# 服务器限流或临时不可用，稍后重试；421 还表示服务器将关闭连接
+THROTTLE_CODES = {421, 450, 451, 452}
+
+
+def build_message(mail: Dict, sender: str) -> EmailMessage:
+    """构建邮件：mail 包含 to、subject、text，可选 name、html"""
+    msg = EmailMessage()
+    msg["Subject"] = mail["subject"]
+    msg["From"] = sender
+    msg["To"] = formataddr((mail.get("name", ""), mail["to"]))
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid(domain=sender.rsplit("@", 1)[-1])
+    msg.set_content(mail.get("text", ""))
+    if mail.get("html"):
+        msg.add_alternative(mail["html"], subtype="html")
+    return msg
+
+
+class BulkMailer:
+    """批量 SMTP 发送器
+
+    每个工作线程持有一条已登录的连接（STARTTLS + 登录只做一次），
+    依次发送分配到的邮件；连续发送 max_per_connection 封后重连，
+    遇到 4xx 限流响应、断线或套接字错误时退避重试，5xx 及其他 SMTP
+    错误（如不支持 STARTTLS）视为该收件人永久失败。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        sender: Optional[str] = None,
+        starttls: bool = True,
+        pool_size: int = 1,
+        max_per_connection: int = 100,
+        retries: int = 3,
+        retry_delay: float = 2.0,
+        timeout: float = 30,
+    ):
+        """
+        初始化发送器
+
+        Args:
+            host / port: SMTP 服务器
+            username / password: 登录凭据，为空时不登录
+            sender: 发件人地址，默认同 username
+            starttls: 是否启用 STARTTLS
+            pool_size: 并行连接数
+            max_per_connection: 单条连接最多发送的邮件数
+            retries: 限流、断线或套接字错误后的重试次数
+            retry_delay: 首次重试等待秒数，之后每次翻倍
+            timeout: 网络超时（秒）
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username or f"daily-digest@{host}"
+        self.starttls = starttls
+        self.pool_size = max(1, pool_size)
+        self.max_per_connection = max_per_connection
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "BulkMailer":
+        """从 SMTP_* 环境变量创建（与 Notifier 邮件通知相同的配置）"""
+        return cls(
+            host=os.environ.get("SMTP_SERVER", "smtp.gmail.com"),
+            port=int(os.environ.get("SMTP_PORT", "587")),
+            username=os.environ.get("SMTP_USERNAME"),
+            password=os.environ.get("SMTP_PASSWORD"),
+            **kwargs,
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]) -> None:
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _send_one(self, server: smtplib.SMTP, mail: Dict) -> None:
+        server.send_message(build_message(mail, self.sender), self.sender, [mail["to"]])
+
+    def _worker(self, jobs: "queue.Queue", results: List[Optional[Dict]], on_result) -> None:
+        """单条连接上依次发送；限流时整条连接退避，断线时重连"""
+        server = None
+        sent = 0
+        while True:
+            try:
+                index, mail, attempt = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            result = {"to": mail["to"], "ok": False, "code": None, "error": "", "attempts": attempt + 1}
+            retry = False
+            try:
+                if server is None or sent >= self.max_per_connection:
+                    self._close(server)
+                    server = None
+                    server = self._connect()
+                    sent = 0
+                self._send_one(server, mail)
+                sent += 1
+                result["ok"] = True
+                result["code"] = 250
+            except smtplib.SMTPRecipientsRefused as e:
+                code, reason = e.recipients.get(mail["to"], (None, b""))
+                result.update(code=code, error=_decode(reason))
+                retry = code in THROTTLE_CODES
+                if code == 421:
+                    # smtplib 已关闭套接字，重试前需要重新连接
+                    self._close(server)
+                    server = None
+            except smtplib.SMTPResponseException as e:
+                result.update(code=e.smtp_code, error=_decode(e.smtp_error))
+                retry = e.smtp_code in THROTTLE_CODES
+                if e.smtp_code == 421:
+                    self._close(server)
+                    server = None
+            except smtplib.SMTPServerDisconnected as e:
+                result["error"] = str(e) or type(e).__name__
+                self._close(server)
+                server = None
+                retry = True
+            except smtplib.SMTPException as e:
+                # SMTPException 是 OSError 的子类，需先于套接字错误处理：
+                # 如服务器不支持 STARTTLS 或认证方式，重试也不会成功
+                result["error"] = str(e) or type(e).__name__
+                self._close(server)
+                server = None
+            except OSError as e:
+                result["error"] = str(e) or type(e).__name__
+                self._close(server)
+                server = None
+                retry = True
+
+            if retry and attempt < self.retries:
+                METRICS.inc("retries_total", component="smtp", code=result["code"] or "disconnect")
+                time.sleep(self.retry_delay * (2 ** attempt))
+                jobs.put((index, mail, attempt + 1))
+                continue
+
+            results[index] = result
+            METRICS.inc("emails_total", result="ok" if result["ok"] else "failed")
+            if on_result:
+                on_result(result)
+
+        self._close(server)
+
+    def send_all(self, mails: List[Dict], on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """发送所有邮件，按输入顺序返回每个收件人的结果
+
+        每项结果包含 to、ok、code（SMTP 状态码）、error、attempts。
+        """
+        jobs: "queue.Queue" = queue.Queue()
+        for index, mail in enumerate(mails):
+            jobs.put((index, mail, 0))
+        results: List[Optional[Dict]] = [None] * len(mails)
+
+        workers = [
+            threading.Thread(target=self._worker, args=(jobs, results, on_result), daemon=True)
+            for _ in range(min(self.pool_size, len(mails)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        return results
+
+    def send(self, mail: Dict) -> Dict:
+        """发送单封邮件"""
+        return self.send_all([mail])[0]
+
+
+def _decode(value) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
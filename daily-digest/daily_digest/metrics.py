@@ -0,0 +1,256 @@
+"""运行指标 - 阶段耗时、按 host 的请求延迟、计数器，导出为 JSON 报告和 Prometheus textfile"""
+
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .journal import atomic_write
+
+
+# 请求延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "digest_"
+
+HELP = {
+    "http_requests_total": "HTTP requests by host and status code.",
+    "http_errors_total": "HTTP requests that failed without a response.",
+    "http_request_duration_seconds": "HTTP request latency by host.",
+    "cache_hits_total": "Cache lookups served from cache.",
+    "cache_misses_total": "Cache lookups that went to the network.",
+    "retries_total": "Retried deliveries by component.",
+    "notifications_total": "Notification attempts by channel and result.",
+    "notification_duration_seconds": "Time to deliver a notification by channel.",
+    "emails_total": "Emails sent by result.",
+    "fallbacks_total": "Times a source fell back to its backup endpoint.",
+    "stage_errors_total": "Stages that raised an exception.",
+    "items_rendered_total": "Items written to digests.",
+    "items": "Items fetched per source in the last run.",
+    "source_ok": "1 if the source was fetched without error in the last run.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    """累积直方图（Prometheus 语义）"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+
+class Metrics:
+    """一次运行的指标集合（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        """开始新的一次运行"""
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.counters: Dict[Tuple[str, Labels], float] = {}
+            self.gauges: Dict[Tuple[str, Labels], float] = {}
+            self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+            self.spans: List[Dict] = []
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def observe_request(self, url: str, seconds: float, status: object) -> None:
+        """记录一次 HTTP 请求（按 host 统计次数、状态和延迟）"""
+        host = urlsplit(url).netloc.lower() or "unknown"
+        self.inc("http_requests_total", host=host, status=status)
+        self.observe("http_request_duration_seconds", seconds, host=host)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict]:
+        """记录一个阶段的耗时；嵌套时名称为 parent/child，异常会计入 stage_errors_total"""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        path = "/".join(stack + [name])
+        record = {"name": path, "start": round(time.perf_counter() - self._start, 6), **attrs}
+        stack.append(name)
+        begin = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            self.inc("stage_errors_total", stage=path)
+            raise
+        finally:
+            stack.pop()
+            record["duration"] = round(time.perf_counter() - begin, 6)
+            with self._lock:
+                self.spans.append(record)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """各阶段累计耗时（同名阶段多次执行时相加，如并发回填）"""
+        durations: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                durations[span["name"]] = durations.get(span["name"], 0) + span["duration"]
+        return durations
+
+    def report(self, **extra) -> Dict:
+        """JSON 运行报告"""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            gauges = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.gauges.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "sum": round(histogram.sum, 6),
+                    "buckets": dict(histogram.cumulative()),
+                }
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ]
+            spans = sorted(self.spans, key=lambda span: span["start"])
+
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duration": round(time.perf_counter() - self._start, 6),
+            **extra,
+            "stages": self.stage_durations(),
+            "spans": spans,
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+        }
+
+    def prometheus(self, success: bool = True) -> str:
+        """Prometheus 文本格式（供 node_exporter textfile collector 读取）"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        header("run_timestamp_seconds", "gauge", "Start time of the last digest run.")
+        lines.append(f"{PREFIX}run_timestamp_seconds {self.started_at:.3f}")
+        header("run_duration_seconds", "gauge", "Wall time of the last digest run.")
+        lines.append(f"{PREFIX}run_duration_seconds {time.perf_counter() - self._start:.6f}")
+        header("run_success", "gauge", "1 if the last digest run completed.")
+        lines.append(f"{PREFIX}run_success {int(success)}")
+
+        header("stage_duration_seconds", "gauge", "Time spent in each stage of the last run.")
+        for stage, seconds in sorted(self.stage_durations().items()):
+            lines.append(f"{PREFIX}stage_duration_seconds{_format_labels((('stage', stage),))} {seconds:.6f}")
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                header(name, "counter", HELP.get(name, name))
+                seen.add(name)
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), value in gauges:
+            if name not in seen:
+                header(name, "gauge", HELP.get(name, name))
+                seen.add(name)
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                header(name, "histogram", HELP.get(name, name))
+                seen.add(name)
+            for bound, count in histogram.cumulative():
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(
+        self,
+        json_path: Optional[Path] = None,
+        prometheus_path: Optional[Path] = None,
+        success: bool = True,
+        **extra,
+    ) -> None:
+        """原子写出 JSON 报告和/或 Prometheus textfile"""
+        if json_path:
+            report = self.report(success=success, **extra)
+            atomic_write(Path(json_path).expanduser(), json.dumps(report, ensure_ascii=False, indent=2))
+        if prometheus_path:
+            atomic_write(Path(prometheus_path).expanduser(), self.prometheus(success=success))
+
+
+# 进程内共享的指标；各模块直接记录到这里
+METRICS = Metrics()
+
+
+def instrument_session(session) -> None:
+    """为 requests.Session 挂上响应钩子，记录每个请求的 host、状态码和延迟"""
+    def record(resp, *args, **kwargs):
+        METRICS.observe_request(resp.url, resp.elapsed.total_seconds(), resp.status_code)
+
+    session.hooks["response"].append(record)
@@ -0,0 +1,81 @@
+"""条目模型 - 数据源、排序筛选和渲染共用的紧凑数据结构
+
+每条 story/post/article 都用带 __slots__ 的 dataclass 表示：没有每个实例的
+__dict__，内存约为等价 dict 的一半，属性访问也比 dict.get 快。
+Feed 这种少量的容器仍然用 dict：{"name", "url", "articles": [Article]}。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+HN_ITEM_URL = "https://news.ycombinator.com/item?id={}"
+
+
+@dataclass(slots=True)
+class Story:
+    """Hacker News story"""
+    id: int
+    title: str
+    url: str
+    score: int = 0
+    comments: int = 0
+    author: str = ""
+    time: int = 0
+    # 由 velocity.annotate 根据采样数据填入：每小时增加的分数及其变化
+    velocity: float = 0.0
+    acceleration: float = 0.0
+
+    @property
+    def hn_url(self) -> str:
+        return HN_ITEM_URL.format(self.id)
+
+    @classmethod
+    def from_item(cls, item: Dict) -> "Story":
+        """从 Firebase item 结构创建（没有外链的 Ask/Show HN 指向讨论页）"""
+        return cls(
+            id=item.get("id"),
+            title=item.get("title", ""),
+            url=item.get("url") or HN_ITEM_URL.format(item.get("id")),
+            score=item.get("score", 0),
+            comments=item.get("descendants", 0),
+            author=item.get("by", ""),
+            time=item.get("time", 0),
+        )
+
+
+@dataclass(slots=True)
+class Post:
+    """Product Hunt 产品"""
+    id: str
+    name: str
+    tagline: str
+    url: str
+    votes: int = 0
+    website: str = ""
+    topics: Tuple[str, ...] = ()
+    created_at: str = ""
+
+    @classmethod
+    def from_node(cls, node: Dict) -> "Post":
+        """从 GraphQL posts 节点创建"""
+        return cls(
+            id=node.get("id"),
+            name=node.get("name", ""),
+            tagline=node.get("tagline", ""),
+            url=node.get("url", ""),
+            votes=node.get("votesCount", 0),
+            website=node.get("website", ""),
+            topics=tuple(t["node"]["name"] for t in node.get("topics", {}).get("edges", [])),
+            created_at=node.get("createdAt", ""),
+        )
+
+
+@dataclass(slots=True)
+class Article:
+    """Newsletter/RSS 文章"""
+    title: str
+    url: str
+    summary: str = ""
+    published: Optional[str] = None
+    author: str = ""
@@ -2,23 +2,67 @@
 
 import os
 import sys
+import time
+import threading
 import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from .metrics import METRICS
 
 
 class Notifier:
-    """通知推送器"""
+    """通知推送器
+    
+    可同时配置多个渠道：notify() 并发发送并受整体超时限制；
+    enqueue() 交给后台投递队列，失败的渠道按指数退避重试，不阻塞调用方。
+    """
     
-    def __init__(self, method: str = "system"):
+    def __init__(
+        self,
+        method: Union[str, List[str]] = "system",
+        timeout: float = 10,
+        retries: int = 3,
+        retry_delay: float = 5,
+    ):
         """
         初始化通知器
         
         Args:
-            method: 通知方式 - system, slack, email
+            method: 通知方式 - system, slack, email，可为列表同时使用多个
+            timeout: 单个渠道的超时（秒）
+            retries: 后台投递失败后的重试次数
+            retry_delay: 首次重试等待秒数，之后每次翻倍
         """
-        self.method = method
+        self.methods = [method] if isinstance(method, str) else list(method)
+        self.method = self.methods[0] if self.methods else ""
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        
+        # 发送与后台投递分开两个线程池：投递线程等待发送结果，共用会互相占满
+        self._senders: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._idle = threading.Condition()
+    
+    def _send_pool(self) -> ThreadPoolExecutor:
+        if self._senders is None:
+            self._senders = ThreadPoolExecutor(
+                max_workers=max(2, 2 * len(self.methods)),
+                thread_name_prefix="notify-send",
+            )
+        return self._senders
+    
+    def _queue_pool(self) -> ThreadPoolExecutor:
+        if self._queue is None:
+            self._queue = ThreadPoolExecutor(
+                max_workers=max(1, len(self.methods)),
+                thread_name_prefix="notify-queue",
+            )
+        return self._queue
     
     def notify(
         self,
@@ -26,16 +70,104 @@ class Notifier:
         message: str,
         file_path: Optional[Path] = None,
     ) -> bool:
-        """发送通知"""
-        if self.method == "system":
-            return self._system_notify(title, message, file_path)
-        elif self.method == "slack":
-            return self._slack_notify(title, message, file_path)
-        elif self.method == "email":
-            return self._email_notify(title, message)
+        """发送通知（所有渠道都成功才返回 True）"""
+        results = self.notify_all(title, message, file_path)
+        return bool(results) and all(results.values())
+    
+    def notify_all(
+        self,
+        title: str,
+        message: str,
+        file_path: Optional[Path] = None,
+    ) -> Dict[str, bool]:
+        """并发发送到所有渠道，返回 {渠道: 是否成功}；超时的渠道记为失败"""
+        futures = {
+            self._send_pool().submit(self._send, method, title, message, file_path): method
+            for method in self.methods
+        }
+        done, _ = wait(futures, timeout=self.timeout)
+        
+        results = {}
+        for future, method in futures.items():
+            if future in done:
+                results[method] = future.result()
+            else:
+                print(f"Notification via {method} timed out after {self.timeout}s")
+                METRICS.inc("notifications_total", channel=method, result="timeout")
+                results[method] = False
+        return results
+    
+    def _send(
+        self,
+        method: str,
+        title: str,
+        message: str,
+        file_path: Optional[Path] = None,
+    ) -> bool:
+        """通过单个渠道发送"""
+        begin = time.perf_counter()
+        if method == "system":
+            ok = self._system_notify(title, message, file_path)
+        elif method == "slack":
+            ok = self._slack_notify(title, message, file_path)
+        elif method == "email":
+            ok = self._email_notify(title, message)
         else:
-            print(f"Unknown notification method: {self.method}")
-            return False
+            print(f"Unknown notification method: {method}")
+            ok = False
+        METRICS.inc("notifications_total", channel=method, result="ok" if ok else "failed")
+        METRICS.observe("notification_duration_seconds", time.perf_counter() - begin, channel=method)
+        return ok
+    
+    def enqueue(
+        self,
+        title: str,
+        message: str,
+        file_path: Optional[Path] = None,
+    ) -> None:
+        """后台投递到所有渠道，立即返回；失败的渠道单独重试"""
+        for method in self.methods:
+            with self._idle:
+                self._pending += 1
+            self._queue_pool().submit(self._deliver, method, title, message, file_path, 0)
+    
+    def _deliver(self, method: str, title: str, message: str, file_path: Optional[Path], attempt: int) -> None:
+        """后台投递单个渠道，失败时延迟后重新提交"""
+        future = self._send_pool().submit(self._send, method, title, message, file_path)
+        try:
+            ok = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            print(f"Notification via {method} timed out after {self.timeout}s")
+            ok = False
+        
+        if not ok and attempt < self.retries:
+            delay = self.retry_delay * (2 ** attempt)
+            METRICS.inc("retries_total", component="notify", channel=method)
+            timer = threading.Timer(delay, self._retry, (method, title, message, file_path, attempt + 1))
+            timer.daemon = True
+            timer.start()
+            return
+        
+        if not ok:
+            print(f"Giving up notification via {method} after {attempt + 1} attempts")
+        self._done()
+    
+    def _retry(self, method: str, title: str, message: str, file_path: Optional[Path], attempt: int) -> None:
+        try:
+            self._queue_pool().submit(self._deliver, method, title, message, file_path, attempt)
+        except RuntimeError:
+            # 解释器正在退出，放弃剩余重试
+            self._done()
+    
+    def _done(self) -> None:
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台投递（含重试）结束，返回是否已全部完成"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
     
     def _system_notify(
         self,
@@ -50,12 +182,12 @@ class Notifier:
                 script = f'''
                 display notification "{message}" with title "{title}"
                 '''
-                subprocess.run(["osascript", "-e", script], check=True)
+                subprocess.run(["osascript", "-e", script], check=True, timeout=self.timeout)
                 
                 # 如果有文件路径，打开 Obsidian
                 if file_path:
                     obsidian_uri = f"obsidian://open?path={file_path}"
-                    subprocess.run(["open", obsidian_uri])
+                    subprocess.run(["open", obsidian_uri], timeout=self.timeout)
                 
             elif sys.platform == "win32":
                 # Windows - 使用 PowerShell toast notification
@@ -85,6 +217,7 @@ class Notifier:
                     ["msg", "*", f"{title}\n{message}"],
                     shell=True,
                     capture_output=True,
+                    timeout=self.timeout,
                 )
                 
                 # 打开 Obsidian
@@ -97,11 +230,12 @@ class Notifier:
                 subprocess.run(
                     ["notify-send", title, message],
                     check=True,
+                    timeout=self.timeout,
                 )
                 
                 if file_path:
                     obsidian_uri = f"obsidian://open?path={file_path}"
-                    subprocess.run(["xdg-open", obsidian_uri])
+                    subprocess.run(["xdg-open", obsidian_uri], timeout=self.timeout)
             
             return True
             
@@ -132,7 +266,7 @@ class Notifier:
                 obsidian_uri = f"obsidian://open?path={file_path}"
                 payload["text"] += f"\n<{obsidian_uri}|📖 在 Obsidian 中打开>"
             
-            resp = requests.post(webhook_url, json=payload, timeout=10)
+            resp = requests.post(webhook_url, json=payload, timeout=self.timeout)
             return resp.status_code == 200
             
         except Exception as e:
@@ -140,32 +274,27 @@ class Notifier:
             return False
     
     def _email_notify(self, title: str, message: str) -> bool:
-        """邮件通知"""
+        """邮件通知（NOTIFY_EMAIL 可用逗号分隔多个收件人，共用一条连接）"""
         try:
-            import smtplib
-            from email.mime.text import MIMEText
+            from .mailer import BulkMailer
             
-            smtp_server = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
-            smtp_port = int(os.environ.get("SMTP_PORT", "587"))
             username = os.environ.get("SMTP_USERNAME")
             password = os.environ.get("SMTP_PASSWORD")
-            to_email = os.environ.get("NOTIFY_EMAIL")
+            to_emails = [addr.strip() for addr in os.environ.get("NOTIFY_EMAIL", "").split(",") if addr.strip()]
             
-            if not all([username, password, to_email]):
+            if not all([username, password, to_emails]):
                 print("Email configuration incomplete")
                 return False
             
-            msg = MIMEText(message)
-            msg["Subject"] = title
-            msg["From"] = username
-            msg["To"] = to_email
-            
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(username, password)
-                server.send_message(msg)
-            
-            return True
+            mailer = BulkMailer.from_env(timeout=self.timeout, retries=0)
+            results = mailer.send_all([
+                {"to": to_email, "subject": title, "text": message}
+                for to_email in to_emails
+            ])
+            for result in results:
+                if not result["ok"]:
+                    print(f"Email to {result['to']} failed: {result['code']} {result['error']}")
+            return all(result["ok"] for result in results)
             
         except Exception as e:
             print(f"Email notification failed: {e}")
@@ -191,17 +320,39 @@ class Notifier:
             return False
 
 
-def send_daily_notification(file_path: Path, method: str = "system") -> bool:
-    """发送每日摘要通知"""
-    notifier = Notifier(method=method)
+def send_daily_notification(
+    file_path: Path,
+    method: Union[str, List[str]] = "system",
+    notifier: Optional[Notifier] = None,
+    background: bool = False,
+) -> bool:
+    """发送每日摘要通知
+    
+    background=True 时交给 notifier 的后台队列后立即返回，
+    调用方在退出前用 notifier.flush() 等待投递完成。
+    """
+    notifier = notifier or Notifier(method=method)
     
     today = datetime.now().strftime("%Y-%m-%d")
     title = f"📰 每日摘要已就绪"
     message = f"{today} 的信息摘要已生成，点击在 Obsidian 中查看"
     
+    if background:
+        notifier.enqueue(title, message, file_path)
+        return True
     return notifier.notify(title, message, file_path)
 
 
+def create_notifier(notify_config: Dict) -> Notifier:
+    """根据 notification 配置创建通知器"""
+    return Notifier(
+        method=notify_config.get("method", "system"),
+        timeout=notify_config.get("timeout", 10),
+        retries=notify_config.get("retries", 3),
+        retry_delay=notify_config.get("retry_delay", 5),
+    )
+
+
 if __name__ == "__main__":
     # 测试
     notifier = Notifier(method="system")
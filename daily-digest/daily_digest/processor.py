@@ -4,9 +4,19 @@ import os
 import re
 import shutil
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional
 from pathlib import Path
 
+from .journal import WriteJournal, locked_journal
+from .layout import DigestLayout, LAYOUT_FLAT, DATE_FILE_PATTERN
+
+if TYPE_CHECKING:
+    # 快照依赖 requests，只在启用快照时由调用方导入
+    from .snapshot import Snapshotter
+    # 索引和统计依赖 sqlite3，首次使用时才导入（--stats 等只读命令用不到）
+    from .search import ArchiveIndex
+    from .analytics import StatsStore
+
 
 class MarkProcessor:
     """处理文档中的阅读标记"""
@@ -14,9 +24,15 @@ class MarkProcessor:
     # 匹配标题行 (### [Title](url) ⭐⭐⭐)
     HEADING_PATTERN = re.compile(r"^(#{2,4})\s*\[(.+?)\]\((.+?)\)", re.MULTILINE)
     
+    # 匹配任意 Markdown 标题行
+    SECTION_PATTERN = re.compile(r"^(#{1,6})\s")
+    
     # 匹配操作行 (**操作**: [x] ✅ 已读  [ ] ❌ 跳过  [ ] ⭐ 收藏)
     ACTION_PATTERN = re.compile(r"\*\*操作\*\*:\s*\[([x ])\]\s*✅\s*已读\s*\[([x ])\]\s*❌\s*跳过\s*\[([x ])\]\s*⭐\s*收藏")
     
+    # 旧格式的条目标记 (- [ ] **[Title](url)**)
+    LEGACY_MARKS = ("- [ ]", "- [✅]", "- [⭐]")
+    
     # 标记类型
     MARK_READ = "✅"       # 已读删除
     MARK_SKIP = "❌"       # 跳过删除
@@ -27,18 +43,61 @@ class MarkProcessor:
         vault_path: str,
         digest_dir: str = "Daily Digest",
         archive_dir: str = "Daily Digest/Archive",
+        layout: str = LAYOUT_FLAT,
+        search_index: bool = True,
+        snapshotter: Optional["Snapshotter"] = None,
+        stats: bool = True,
     ):
         self.vault_path = Path(vault_path).expanduser()
         self.digest_dir = self.vault_path / digest_dir
+        self.layout = DigestLayout(self.digest_dir, layout)
         self.archive_dir = self.vault_path / archive_dir
         self.archive_dir.mkdir(parents=True, exist_ok=True)
+        # 收藏全文索引（归档时增量更新）
+        self._search_index = search_index
+        self._index: Optional["ArchiveIndex"] = None
+        # 可选：收藏后在后台抓取文章快照
+        self.snapshotter = snapshotter
+        # 阅读行为统计（与生成器共用，位于摘要目录）
+        self._stats_enabled = stats
+        self._stats: Optional["StatsStore"] = None
     
-    def process_file(self, file_path: Path) -> Dict:
-        """处理单个文件中的标记"""
+    @property
+    def index(self) -> Optional["ArchiveIndex"]:
+        """收藏全文索引，未启用时为 None"""
+        if self._index is None and self._search_index:
+            from .search import ArchiveIndex
+            self._index = ArchiveIndex(self.archive_dir / ".search.db")
+        return self._index
+    
+    @property
+    def stats(self) -> Optional["StatsStore"]:
+        """阅读行为统计，未启用时为 None"""
+        if self._stats is None and self._stats_enabled:
+            from .analytics import StatsStore, STATS_DB
+            self._stats = StatsStore(self.digest_dir / STATS_DB)
+        return self._stats
+    
+    @classmethod
+    def is_completed(cls, content: str) -> bool:
+        """摘要是否已处理完：正文中不再有任何操作行（也兼容旧格式的条目标记）"""
+        if cls.ACTION_PATTERN.search(content):
+            return False
+        return not any(mark in content for mark in cls.LEGACY_MARKS)
+    
+    def process_file(self, file_path: Path, journal: Optional[WriteJournal] = None) -> Dict:
+        """处理单个文件中的标记
+        
+        传入 journal 时只暂存修改，由调用方统一提交；否则加锁后立即提交。
+        """
+        if journal is None:
+            with locked_journal(self.digest_dir) as journal:
+                return self.process_file(file_path, journal)
+        
         if not file_path.exists():
             return {"error": "File not found", "path": str(file_path)}
         
-        content = file_path.read_text(encoding="utf-8")
+        content = journal.read(file_path)
         lines = content.split("\n")
         
         starred_items = []
@@ -46,6 +105,11 @@ class MarkProcessor:
         removed_count = 0
         starred_count = 0
         skipped_count = 0
+        # 按来源统计本次处理的条目 {来源: {"read": n, "skipped": n, "starred": n}}
+        actions: Dict[str, Dict[str, int]] = {}
+        
+        # 当前所在分区（## 🔥 Hacker News / ### 📰 Feed 名称），作为条目来源
+        section = ""
         
         i = 0
         while i < len(lines):
@@ -54,6 +118,9 @@ class MarkProcessor:
             # 匹配标题行：### [Title](url)
             heading_match = self.HEADING_PATTERN.match(line)
             
+            if not heading_match and re.match(r"^#{2,3}\s", line):
+                section = re.sub(r"^#+\s*(🔥|🚀|📧|📰)?\s*", "", line).strip()
+            
             if heading_match:
                 level, title, url = heading_match.groups()
                 current_level = len(level)
@@ -66,9 +133,9 @@ class MarkProcessor:
                 while i < len(lines):
                     next_line = lines[i]
                     
-                    # 检查是否遇到同级或更高级标题
+                    # 检查是否遇到同级或更高级标题（包括 ## 📧 Newsletters 这类分区标题）
                     if next_line.startswith("#"):
-                        next_match = self.HEADING_PATTERN.match(next_line)
+                        next_match = self.SECTION_PATTERN.match(next_line)
                         if next_match:
                             next_level = len(next_match.group(1))
                             if next_level <= current_level:
@@ -88,6 +155,13 @@ class MarkProcessor:
                     item_lines.append(next_line)
                     i += 1
                 
+                if action_mark:
+                    from .search import detect_source
+                    source = section if section not in ("", "Newsletters") else detect_source("\n".join(item_lines))
+                    counts = actions.setdefault(source, {})
+                    key = {"read": "read", "skip": "skipped", "star": "starred"}[action_mark]
+                    counts[key] = counts.get(key, 0) + 1
+                
                 # 根据操作处理
                 if action_mark == "read":
                     # ✅ 已读 - 删除
@@ -120,14 +194,20 @@ class MarkProcessor:
         
         # 归档收藏的内容
         if starred_items:
-            self._archive_items(file_path.stem, starred_items)
+            self._archive_items(file_path.stem, starred_items, journal)
         
-        # 更新原文件
+        # 更新原文件（与归档在同一批次中提交）
         if removed_count > 0 or starred_count > 0:
             new_content = "\n".join(new_lines)
             # 清理连续空行
             new_content = re.sub(r"\n{3,}", "\n\n", new_content)
-            file_path.write_text(new_content, encoding="utf-8")
+            journal.stage(file_path, new_content)
+        
+        if actions and self.stats is not None and DATE_FILE_PATTERN.match(file_path.name):
+            journal.on_commit(lambda: self.stats.record_processed(file_path.stem, actions))
+            if starred_items:
+                urls = [item["url"] for item in starred_items]
+                journal.on_commit(lambda: self.stats.mark_starred(file_path.stem, urls))
         
         return {
             "path": str(file_path),
@@ -136,42 +216,80 @@ class MarkProcessor:
             "starred": starred_count,
         }
     
-    def _archive_items(self, date_str: str, items: List[Dict]) -> Path:
-        """将收藏的内容归档"""
+    def _archive_items(self, date_str: str, items: List[Dict], journal: WriteJournal) -> Path:
+        """将收藏的内容归档（暂存到 journal，随摘要改写一起提交）"""
         archive_file = self.archive_dir / f"{date_str}-starred.md"
         
         # 追加到归档文件
-        header = ""
-        if not archive_file.exists():
-            header = f"# ⭐ 收藏 - {date_str}\n\n"
-            header += f"> 归档时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
-            header += "---\n\n"
-        
-        with archive_file.open("a", encoding="utf-8") as f:
-            f.write(header)
-            for item in items:
-                title = item.get("title", "Untitled")
-                url = item.get("url", "")
-                content = item.get("content", "")
-                
-                # 移除标记符号，保留内容
-                content = re.sub(r"\s*(✅|❌|⭐|👆)\s*$", "", content, flags=re.MULTILINE)
-                f.write(content + "\n\n")
+        header = f"# ⭐ 收藏 - {date_str}\n\n"
+        header += f"> 归档时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n"
+        header += "---\n\n"
+        
+        blocks = []
+        for item in items:
+            title = item.get("title", "Untitled")
+            url = item.get("url", "")
+            content = item.get("content", "")
+            
+            # 移除标记符号，保留内容
+            content = re.sub(r"\s*(✅|❌|⭐|👆)\s*$", "", content, flags=re.MULTILINE)
+            blocks.append(content + "\n\n")
+        
+        journal.append(archive_file, "".join(blocks), header=header)
+        
+        if self.index is not None:
+            # 归档落盘后再写索引，崩溃时索引不会多出未归档的条目；
+            # 来源与 sync() 从归档文件解析时的规则一致（Newsletter 不区分订阅源）
+            from .search import detect_source
+            entries = [
+                {
+                    "title": item.get("title", "Untitled"),
+                    "url": item.get("url", ""),
+                    "source": detect_source(item.get("content", "")),
+                    "summary": " ".join(
+                        line[1:].strip()
+                        for line in item.get("content", "").split("\n")
+                        if line.startswith(">")
+                    ),
+                }
+                for item in items
+            ]
+            
+            def update_index():
+                self.index.add_items(date_str, entries)
+                self.index.record_file(archive_file)
+            
+            journal.on_commit(update_index)
+        
+        if self.snapshotter is not None:
+            journal.on_commit(lambda: self.snapshot_items(archive_file, items))
         
         return archive_file
     
+    def snapshot_items(self, archive_file: Path, items: List[Dict]) -> None:
+        """为收藏条目提交后台快照任务，完成后在归档条目中链接本地副本"""
+        from .snapshot import link_snapshot
+        
+        for item in items:
+            url = item.get("url", "")
+            if not url.startswith(("http://", "https://")):
+                continue
+            self.snapshotter.submit(
+                url,
+                on_done=lambda manifest, url=url: link_snapshot(
+                    self.digest_dir, archive_file, url, manifest["id"]
+                ),
+            )
+    
     def process_all(self, days: int = 7) -> List[Dict]:
-        """处理所有摘要文件"""
+        """处理所有摘要文件（所有修改在一个批次中提交）"""
         results = []
         
-        for file_path in sorted(self.digest_dir.glob("*.md")):
-            # 跳过非日期文件
-            if not re.match(r"\d{4}-\d{2}-\d{2}\.md", file_path.name):
-                continue
-            
-            result = self.process_file(file_path)
-            if result.get("removed", 0) > 0 or result.get("starred", 0) > 0:
-                results.append(result)
+        with locked_journal(self.digest_dir) as journal:
+            for file_path in self.layout.iter_digests():
+                result = self.process_file(file_path, journal)
+                if result.get("removed", 0) > 0 or result.get("starred", 0) > 0:
+                    results.append(result)
         
         return results
     
@@ -179,16 +297,17 @@ class MarkProcessor:
         """清理空的摘要文件（只剩 frontmatter 和说明）"""
         removed = []
         
-        for file_path in self.digest_dir.glob("*.md"):
-            content = file_path.read_text(encoding="utf-8")
-            
-            # 检查是否还有待处理的条目
-            if "- [ ]" not in content and "- [✅]" not in content and "- [⭐]" not in content:
-                # 更新状态为已完成
-                if "status: unread" in content:
-                    content = content.replace("status: unread", "status: completed")
-                    file_path.write_text(content, encoding="utf-8")
-                removed.append(file_path)
+        with locked_journal(self.digest_dir) as journal:
+            for file_path in self.layout.iter_digests():
+                content = journal.read(file_path)
+                
+                # 检查是否还有待处理的条目
+                if self.is_completed(content):
+                    # 更新状态为已完成
+                    if "status: unread" in content:
+                        content = content.replace("status: unread", "status: completed")
+                        journal.stage(file_path, content)
+                    removed.append(file_path)
         
         return removed
     
@@ -198,10 +317,7 @@ class MarkProcessor:
         total_unread = 0
         total_starred = 0
         
-        for file_path in self.digest_dir.glob("*.md"):
-            if not re.match(r"\d{4}-\d{2}-\d{2}\.md", file_path.name):
-                continue
-            
+        for file_path in self.layout.iter_digests():
             total_files += 1
             content = file_path.read_text(encoding="utf-8")
             total_unread += content.count("- [ ]")
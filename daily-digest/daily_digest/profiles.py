@@ -0,0 +1,217 @@
+"""多用户摘要 - 合并各配置的数据源需求，只抓取一次，再按用户分别筛选渲染"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .sources.hackernews import HackerNewsAPI
+from .sources.producthunt import ProductHuntAPI
+from .sources.newsletter import NewsletterFetcher
+from .generator import DigestGenerator
+
+
+def _hn_config(config: Dict) -> Dict:
+    return config.get("sources", {}).get("hacker_news", {})
+
+
+def _ph_config(config: Dict) -> Dict:
+    return config.get("sources", {}).get("product_hunt", {})
+
+
+def _nl_config(config: Dict) -> Dict:
+    return config.get("sources", {}).get("newsletters", {})
+
+
+def merge_requirements(profiles: Dict[str, Dict]) -> Dict:
+    """合并所有配置的数据源需求
+
+    HN 每个分类取各配置中最大的单分类条数，PH 取最大条数，
+    Newsletter 按 URL 去重。
+    """
+    hn_categories: Dict[str, int] = {}
+    ph_limit = 0
+    ph_token = None
+    feeds: Dict[str, Dict] = {}
+
+    for config in profiles.values():
+        hn = _hn_config(config)
+        if hn.get("enabled", True):
+            categories = hn.get("categories", ["top"])
+            per_category = hn.get("limit", 20) // len(categories)
+            for category in categories:
+                hn_categories[category] = max(hn_categories.get(category, 0), per_category)
+
+        ph = _ph_config(config)
+        if ph.get("enabled", True):
+            ph_limit = max(ph_limit, ph.get("limit", 10))
+            ph_token = ph_token or ph.get("token")
+
+        nl = _nl_config(config)
+        if nl.get("enabled", False):
+            for feed in nl.get("feeds", []):
+                if feed.get("url"):
+                    feeds.setdefault(feed["url"], feed)
+
+    return {
+        "hn_categories": hn_categories,
+        "ph_limit": ph_limit,
+        "ph_token": ph_token,
+        "feeds": list(feeds.values()),
+    }
+
+
+def _passes_filters(title: str, score: Optional[int], filters: Dict) -> bool:
+    """按配置的 filters.exclude 关键词和 filters.min_score 过滤"""
+    lowered = title.lower()
+    if any(word.lower() in lowered for word in filters.get("exclude", [])):
+        return False
+    min_score = filters.get("min_score", 0)
+    return score is None or score >= min_score
+
+
+def select_for_profile(config: Dict, shared: Dict) -> Dict:
+    """从共享抓取结果中按单个配置筛选、排序，返回 generator.generate 所需的数据"""
+    filters = config.get("filters", {})
+    data = {"hn_stories": [], "ph_posts": [], "newsletters": []}
+
+    hn = _hn_config(config)
+    if hn.get("enabled", True):
+        categories = hn.get("categories", ["top"])
+        limit = hn.get("limit", 20)
+        per_category = limit // len(categories)
+        candidates = []
+        for category in categories:
+            candidates.extend(shared["hn"].get(category, [])[:per_category])
+
+        seen = set()
+        for story in sorted(candidates, key=lambda s: s.score, reverse=True):
+            if story.id in seen or not _passes_filters(story.title, story.score, filters):
+                continue
+            seen.add(story.id)
+            data["hn_stories"].append(story)
+        data["hn_stories"] = data["hn_stories"][:limit]
+
+    ph = _ph_config(config)
+    if ph.get("enabled", True):
+        posts = shared["ph"][:ph.get("limit", 10)]
+        data["ph_posts"] = [
+            post for post in posts
+            if _passes_filters(post.name, post.votes, filters)
+        ]
+
+    nl = _nl_config(config)
+    if nl.get("enabled", False):
+        for feed in nl.get("feeds", []):
+            fetched = shared["newsletters"].get(feed.get("url"))
+            if not fetched:
+                continue
+            articles = [
+                article for article in fetched["articles"]
+                if _passes_filters(article.title, None, filters)
+            ]
+            if articles:
+                data["newsletters"].append({
+                    "name": feed.get("name") or fetched["name"],
+                    "url": fetched["url"],
+                    "articles": articles,
+                })
+
+    return data
+
+
+class ProfileRunner:
+    """为多个配置（团队成员）生成摘要
+
+    所有配置的数据源需求合并后每个来源只抓取一次（各来源并发），
+    然后按配置分别筛选、排序，并发渲染到各自的 vault。
+    """
+
+    def __init__(
+        self,
+        profiles: Dict[str, Dict],
+        generators: Dict[str, DigestGenerator],
+        hn: Optional[HackerNewsAPI] = None,
+        ph: Optional[ProductHuntAPI] = None,
+        max_workers: int = 4,
+    ):
+        """
+        初始化
+
+        Args:
+            profiles: {名称: 配置}
+            generators: {名称: 该配置的文档生成器}
+            hn / ph: 共享的数据源客户端（默认新建）
+            max_workers: 同时渲染的配置数
+        """
+        self.profiles = profiles
+        self.generators = generators
+        self.requirements = merge_requirements(profiles)
+        self.hn = hn or HackerNewsAPI()
+        self.ph = ph or ProductHuntAPI(token=self.requirements["ph_token"])
+        self.max_workers = max_workers
+
+    def fetch(self, on_error: Optional[Callable[[str, Exception], None]] = None) -> Dict:
+        """按合并后的需求抓取一次，返回 {"hn": {分类: stories}, "ph": posts, "newsletters": {url: feed}}"""
+        req = self.requirements
+        shared: Dict = {"hn": {}, "ph": [], "newsletters": {}}
+
+        def fetch_newsletters():
+            nf = NewsletterFetcher()
+            nf.add_feeds(req["feeds"])
+            return {feed["url"]: feed for feed in nf.fetch_all(days=1)}
+
+        tasks = {}
+        with ThreadPoolExecutor(max_workers=len(req["hn_categories"]) + 2) as executor:
+            for category, limit in req["hn_categories"].items():
+                tasks[executor.submit(self.hn.get_stories_by_category, category, limit)] = ("hn", category)
+            if req["ph_limit"]:
+                tasks[executor.submit(self.ph.get_today_posts, req["ph_limit"])] = ("ph", None)
+            if req["feeds"]:
+                tasks[executor.submit(fetch_newsletters)] = ("newsletters", None)
+
+            for future in as_completed(tasks):
+                kind, category = tasks[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if on_error:
+                        on_error(category or kind, e)
+                    continue
+                if kind == "hn":
+                    shared["hn"][category] = result
+                else:
+                    shared[kind] = result
+
+        return shared
+
+    def run(
+        self,
+        date: Optional[datetime] = None,
+        on_profile: Optional[Callable] = None,
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+    ) -> Dict[str, Dict]:
+        """抓取一次并为所有配置生成摘要
+
+        Returns:
+            {名称: {"path": 摘要路径, "data": 筛选后的数据}}，失败的配置为 {"error": 异常}
+        """
+        shared = self.fetch(on_error=on_error)
+        results: Dict[str, Dict] = {}
+
+        def render(name: str) -> Dict:
+            data = select_for_profile(self.profiles[name], shared)
+            path = self.generators[name].generate(date=date, **data)
+            return {"path": path, "data": data}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(render, name): name for name in self.profiles}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = {"error": e}
+                if on_profile:
+                    on_profile(name, results[name])
+
+        return results
@@ -0,0 +1,116 @@
+"""摘要刷新 - 重新获取已生成摘要中 HN 条目的分数和评论数，就地更新
+
+只修改 HN 条目的讨论行（👍/💬）和标题行末尾的星级，其余行（包括用户
+勾选的标记、手写的笔记）原样保留。
+"""
+
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .analytics import StatsStore, STATS_DB
+from .journal import locked_journal
+from .models import HN_ITEM_URL
+from .render import score_to_stars
+
+if TYPE_CHECKING:
+    from .sources.hackernews import HackerNewsAPI
+
+
+# ### [Title](url) ⭐⭐☆☆☆
+HEADING_PATTERN = re.compile(r"^(###\s+\[.*\]\(.*\)\s+)([⭐☆]{5})$")
+
+# - **讨论**: [HN 评论](https://news.ycombinator.com/item?id=123) (👍 120 | 💬 5)
+DISCUSSION_PATTERN = re.compile(
+    r"^(- \*\*讨论\*\*: \[HN 评论\]\(https://news\.ycombinator\.com/item\?id=(\d+)\)\s+)"
+    r"\(👍 \d+ \| 💬 \d+\)$"
+)
+
+
+def find_hn_items(lines: List[str]) -> Dict[int, Tuple[Optional[int], int]]:
+    """找出摘要中的 HN 条目，返回 {item id: (标题行号, 讨论行号)}"""
+    items = {}
+    heading = None
+    for i, line in enumerate(lines):
+        if line.startswith("#"):
+            heading = i if HEADING_PATTERN.match(line) else None
+            continue
+        match = DISCUSSION_PATTERN.match(line)
+        if match:
+            items[int(match.group(2))] = (heading, i)
+    return items
+
+
+def patch_lines(lines: List[str], stats: Dict[int, Dict]) -> int:
+    """按最新数据替换分数行和星级（就地修改 lines），返回有变化的条目数"""
+    changed = 0
+    for item_id, (heading, index) in find_hn_items(lines).items():
+        item = stats.get(item_id)
+        if not item:
+            continue
+        score = item.get("score", 0)
+
+        new_lines = {
+            index: DISCUSSION_PATTERN.match(lines[index]).group(1)
+            + f"(👍 {score} | 💬 {item.get('descendants', 0)})"
+        }
+        if heading is not None:
+            new_lines[heading] = HEADING_PATTERN.match(lines[heading]).group(1) + score_to_stars(score, max_score=500)
+
+        if any(lines[i] != line for i, line in new_lines.items()):
+            for i, line in new_lines.items():
+                lines[i] = line
+            changed += 1
+    return changed
+
+
+def refresh_digest(file_path: Path, digest_dir: Path, hn: "HackerNewsAPI") -> Dict:
+    """刷新一个摘要文件中 HN 条目的分数、评论数和星级
+
+    Args:
+        file_path: 摘要文件
+        digest_dir: 摘要目录（写入时加锁）
+        hn: HN 客户端，常驻进程中可复用其 item 缓存
+
+    Returns:
+        {"path", "items": 文件中的 HN 条目数, "fetched": 获取成功数, "updated": 有变化的条目数}
+    """
+    file_path = Path(file_path)
+    result = {"path": str(file_path), "items": 0, "fetched": 0, "updated": 0}
+    if not file_path.exists():
+        return result
+
+    ids = list(find_hn_items(file_path.read_text(encoding="utf-8").split("\n")))
+    result["items"] = len(ids)
+    if not ids:
+        return result
+
+    # 网络请求在锁外进行，不阻塞同时运行的标记处理
+    stats = hn.get_items(ids)
+    result["fetched"] = len(stats)
+
+    # 抓取期间文件可能已被编辑或处理过标记，加锁后重新读取再修改
+    with locked_journal(digest_dir) as journal:
+        content = journal.read(file_path)
+        if content is None:
+            return result
+        lines = content.split("\n")
+        result["updated"] = patch_lines(lines, stats)
+        if result["updated"]:
+            journal.stage(file_path, "\n".join(lines))
+            # 同步更新周精选使用的分数
+            scores = {
+                HN_ITEM_URL.format(item_id): (item.get("score", 0), item.get("descendants", 0))
+                for item_id, item in stats.items()
+            }
+
+            def update_index():
+                store = StatsStore(Path(digest_dir) / STATS_DB)
+                try:
+                    store.update_scores(scores)
+                finally:
+                    store.close()
+
+            journal.on_commit(update_index)
+
+    return result
@@ -0,0 +1,544 @@
+"""摘要渲染 - 中间模型一次遍历，同时输出 Markdown、HTML 邮件、JSON Feed 和 RSS
+
+render() 返回各格式的完整字符串；render_stream() 边遍历边把已渲染的
+片段写入文件，内存占用不随输出大小增长。
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from html import escape
+from typing import IO, Dict, Iterable, List, Optional, Tuple
+
+from .models import Story, Post
+
+
+FORMAT_MARKDOWN = "markdown"
+FORMAT_HTML = "html"
+FORMAT_JSON_FEED = "json_feed"
+FORMAT_RSS = "rss"
+
+ACTION_LINE = "**操作**: [ ] ✅ 已读  [ ] ❌ 跳过  [ ] ⭐ 收藏"
+
+# 每小时分数增加超过这个值的 HN 条目标记为“快速上升”
+RISING_RATE = 60
+
+
+@dataclass(slots=True)
+class DigestItem:
+    """摘要中的单个条目（各来源字段已归一化）"""
+
+    kind: str                      # hn / ph / newsletter
+    title: str
+    url: str
+    source: str
+    summary: str = ""
+    stars: str = ""
+    discussion_url: str = ""
+    score: int = 0
+    comments: int = 0
+    published: Optional[datetime] = None
+    velocity: float = 0.0
+    acceleration: float = 0.0
+
+    @property
+    def rising(self) -> bool:
+        return self.velocity >= RISING_RATE
+
+
+@dataclass
+class DigestGroup:
+    """分区内的分组（Newsletter 按订阅源分组，其他来源只有一个无名分组）"""
+
+    name: Optional[str]
+    items: List[DigestItem] = field(default_factory=list)
+
+
+@dataclass
+class DigestSection:
+    key: str
+    heading: str
+    groups: List[DigestGroup] = field(default_factory=list)
+
+
+@dataclass
+class Digest:
+    """一天的摘要"""
+
+    date_str: str
+    sections: List[DigestSection] = field(default_factory=list)
+    total: int = 0
+    sources: List[str] = field(default_factory=list)
+
+    def items(self) -> Iterable[DigestItem]:
+        for section in self.sections:
+            for group in section.groups:
+                yield from group.items
+
+
+def score_to_stars(score: int, max_score: int = 500) -> str:
+    """将分数转换为星级评分"""
+    if score >= max_score:
+        filled = 5
+    else:
+        filled = min(5, max(1, int(score / max_score * 5) + 1))
+
+    return "⭐" * filled + "☆" * (5 - filled)
+
+
+def _parse_time(value) -> Optional[datetime]:
+    """解析来源中的发布时间（Unix 时间戳或 ISO 字符串）"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        parsed = datetime.fromisoformat(str(value))
+    except (ValueError, OSError, OverflowError):
+        return None
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def build_digest(
+    date_str: str,
+    hn_stories: List[Story],
+    ph_posts: List[Post],
+    newsletters: List[Dict],
+) -> Digest:
+    """把各来源的原始数据整理为中间模型"""
+    digest = Digest(date_str=date_str)
+
+    if hn_stories:
+        items = [
+            DigestItem(
+                kind="hn",
+                title=story.title,
+                url=story.url,
+                source="Hacker News",
+                stars=score_to_stars(story.score, max_score=500),
+                discussion_url=story.hn_url,
+                score=story.score,
+                comments=story.comments,
+                published=_parse_time(story.time),
+                velocity=story.velocity,
+                acceleration=story.acceleration,
+            )
+            for story in hn_stories
+        ]
+        digest.sections.append(DigestSection("hn", "🔥 Hacker News", [DigestGroup(None, items)]))
+        digest.sources.append("Hacker News")
+
+    if ph_posts:
+        items = [
+            DigestItem(
+                kind="ph",
+                title=post.name,
+                url=post.url,
+                source="Product Hunt",
+                summary=post.tagline,
+                stars=score_to_stars(post.votes, max_score=300),
+                score=post.votes,
+                published=_parse_time(post.created_at),
+            )
+            for post in ph_posts
+        ]
+        digest.sections.append(DigestSection("ph", "🚀 Product Hunt", [DigestGroup(None, items)]))
+        digest.sources.append("Product Hunt")
+
+    if newsletters:
+        section = DigestSection("newsletters", "📧 Newsletters")
+        for feed in newsletters:
+            articles = feed.get("articles", [])
+            if not articles:
+                continue
+            feed_name = feed.get("name", "Newsletter")
+            group = DigestGroup(feed_name)
+            for article in articles:
+                summary = article.summary
+                # 截断过长的摘要
+                if len(summary) > 200:
+                    summary = summary[:200] + "..."
+                group.items.append(DigestItem(
+                    kind="newsletter",
+                    title=article.title,
+                    url=article.url,
+                    source=feed_name,
+                    summary=summary,
+                    published=_parse_time(article.published),
+                ))
+            section.groups.append(group)
+            digest.sources.append(feed_name)
+        digest.sections.append(section)
+
+    digest.total = sum(1 for _ in digest.items())
+    return digest
+
+
+def trend(item: DigestItem) -> str:
+    """快速上升的条目的趋势说明"""
+    text = f"🚀 快速上升 +{item.velocity:.0f}/小时"
+    return text + "，仍在加速" if item.acceleration > 0 else text
+
+
+def describe(item: DigestItem) -> str:
+    """条目的纯文本描述（HTML、JSON Feed、RSS 共用）"""
+    if item.kind == "hn":
+        text = f"👍 {item.score} | 💬 {item.comments}"
+        return f"{text} · {trend(item)}" if item.rising else text
+    if item.kind == "ph":
+        votes = f"⬆️ {item.score}"
+        return f"{item.summary} · {votes}" if item.summary else votes
+    return item.summary
+
+
+# render_stream() 每渲染多少个条目写出一次
+STREAM_BATCH = 256
+
+
+class Renderer:
+    """渲染器基类：render() 遍历模型时依次回调，finish() 返回输出内容
+
+    回调把片段追加到 parts，按 separator 连接；drain() 取出目前为止的
+    片段（流式写出时调用），finish() 返回剩余部分。
+    """
+
+    name = ""
+    extension = ""
+    separator = ""
+
+    def begin(self, digest: Digest) -> None:
+        self.digest = digest
+        self.parts: List[str] = []
+        self._drained = False
+
+    def drain(self) -> str:
+        """取出并清空已渲染的片段；各次 drain() 的结果依次拼接即为完整输出"""
+        if not self.parts:
+            return ""
+        text = self.separator.join(self.parts)
+        if self._drained:
+            text = self.separator + text
+        self._drained = True
+        self.parts = []
+        return text
+
+    def start_section(self, section: DigestSection) -> None:
+        pass
+
+    def start_group(self, group: DigestGroup) -> None:
+        pass
+
+    def item(self, item: DigestItem) -> None:
+        pass
+
+    def finish(self) -> str:
+        return self.drain()
+
+
+class MarkdownRenderer(Renderer):
+    """Obsidian Markdown（带标记操作行，供 MarkProcessor 处理）"""
+
+    name = FORMAT_MARKDOWN
+    extension = ".md"
+    separator = "\n"
+
+    FOOTER = [
+        "",
+        "---",
+        "",
+        "## 📋 标记说明",
+        "",
+        "| 标记 | 含义 | 处理 |",
+        "|:---:|:---|:---|",
+        "| ✅ | 已读 | 删除 |",
+        "| ❌ | 跳过 | 删除 |",
+        "| ⭐ | 收藏 | 归档 |",
+        "| 👆 | 待写作 | 保留 |",
+        "",
+    ]
+
+    def begin(self, digest: Digest) -> None:
+        super().begin(digest)
+        date_str = digest.date_str
+        self.parts.extend([
+            "---",
+            f"date: {date_str}",
+            "status: unread",
+            f"total: {digest.total}",
+            "---",
+            "",
+            f"# 📰 每日摘要 - {date_str}",
+            "",
+            "> 💡 **Inbox模式**: 本索引只显示未处理的文章",
+            ">",
+            "> - ✅已读、❌跳过、⭐收藏的文章已自动移除",
+            "> - 👆待写作的文章仍在此处",
+            "> - 周末目标: 清空此索引 = 全部处理完",
+            "",
+            "---",
+            "",
+            f"📊 **待处理**: {digest.total} 篇",
+            f"📎 **来源**: {', '.join(digest.sources)}",
+            f"🕐 **更新时间**: {date_str}",
+            "",
+            "---",
+            "",
+        ])
+
+    def start_section(self, section: DigestSection) -> None:
+        self.parts.extend([f"## {section.heading}", ""])
+
+    def start_group(self, group: DigestGroup) -> None:
+        self.parts.extend([f"### 📰 {group.name}", ""])
+
+    def item(self, item: DigestItem) -> None:
+        lines = self.parts
+        if item.kind == "newsletter":
+            lines.append(f"#### [{item.title}]({item.url})")
+        else:
+            lines.append(f"### [{item.title}]({item.url}) {item.stars}")
+        lines.append("")
+
+        if item.summary:
+            lines.append(f"> {item.summary}")
+            lines.append("")
+        lines.append(f"- **URL**: {item.url}")
+        if item.kind == "hn":
+            lines.append(
+                f"- **讨论**: [HN 评论]({item.discussion_url}) (👍 {item.score} | 💬 {item.comments})"
+            )
+            if item.rising:
+                lines.append(f"- **趋势**: {trend(item)}")
+        elif item.kind == "ph":
+            lines.append(f"- **Votes**: ⬆️ {item.score}")
+        lines.append("")
+        lines.append(ACTION_LINE)
+        lines.append("")
+
+    def finish(self) -> str:
+        self.parts.extend(self.FOOTER)
+        return self.drain()
+
+
+# 邮件客户端大多忽略 <style>，样式全部内联；模板在导入时预编译为 str.format
+STYLES = {
+    "body": "margin:0;padding:0;background:#f5f5f5;",
+    "container": (
+        "max-width:640px;margin:0 auto;padding:24px;background:#ffffff;"
+        "font-family:-apple-system,'Segoe UI','PingFang SC','Microsoft YaHei',sans-serif;"
+        "color:#222222;line-height:1.5;"
+    ),
+    "h1": "font-size:22px;margin:0 0 8px;",
+    "meta": "font-size:13px;color:#888888;margin:0 0 16px;",
+    "h2": "font-size:18px;margin:24px 0 8px;padding-bottom:4px;border-bottom:1px solid #eeeeee;",
+    "h3": "font-size:15px;margin:16px 0 4px;color:#555555;",
+    "item": "margin:0 0 14px;",
+    "title": "font-size:15px;font-weight:600;color:#1a0dab;text-decoration:none;",
+    "detail": "font-size:13px;color:#666666;margin:2px 0 0;",
+    "link": "color:#888888;",
+}
+
+
+def _compile(template: str):
+    """预编译模板：先代入内联样式（style="[key]"），返回绑定的 str.format"""
+    for key, style in STYLES.items():
+        template = template.replace(f'style="[{key}]"', f'style="{style}"')
+    return template.format
+
+
+HTML_HEAD = _compile(
+    '<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">\n'
+    '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+    "<title>{title}</title>\n</head>\n"
+    '<body style="[body]">\n<div style="[container]">\n'
+    '<h1 style="[h1]">{title}</h1>\n'
+    '<p style="[meta]">📊 {total} 篇 · 📎 {sources}</p>\n'
+)
+HTML_SECTION = _compile('<h2 style="[h2]">{heading}</h2>\n')
+HTML_GROUP = _compile('<h3 style="[h3]">📰 {name}</h3>\n')
+HTML_ITEM = _compile(
+    '<div style="[item]">'
+    '<a href="{url}" style="[title]">{title}</a> {stars}'
+    '<p style="[detail]">{detail}{discussion}</p></div>\n'
+)
+HTML_DISCUSSION = _compile(' · <a href="{url}" style="[link]">HN 评论</a>')
+HTML_FOOT = "</div>\n</body>\n</html>\n"
+
+
+class HtmlEmailRenderer(Renderer):
+    """内联 CSS 的 HTML 邮件正文"""
+
+    name = FORMAT_HTML
+    extension = ".html"
+
+    def begin(self, digest: Digest) -> None:
+        super().begin(digest)
+        self.parts.append(HTML_HEAD(
+            title=escape(f"📰 每日摘要 - {digest.date_str}"),
+            total=digest.total,
+            sources=escape(", ".join(digest.sources)),
+        ))
+
+    def start_section(self, section: DigestSection) -> None:
+        self.parts.append(HTML_SECTION(heading=escape(section.heading)))
+
+    def start_group(self, group: DigestGroup) -> None:
+        self.parts.append(HTML_GROUP(name=escape(group.name)))
+
+    def item(self, item: DigestItem) -> None:
+        discussion = ""
+        if item.discussion_url:
+            discussion = HTML_DISCUSSION(url=escape(item.discussion_url))
+        self.parts.append(HTML_ITEM(
+            url=escape(item.url or item.discussion_url),
+            title=escape(item.title),
+            stars=item.stars,
+            detail=escape(describe(item)),
+            discussion=discussion,
+        ))
+
+    def finish(self) -> str:
+        self.parts.append(HTML_FOOT)
+        return self.drain()
+
+
+class JsonFeedRenderer(Renderer):
+    """JSON Feed 1.1（items 逐条序列化，输出与 json.dumps 整个 feed 相同）"""
+
+    name = FORMAT_JSON_FEED
+    extension = ".json"
+
+    def __init__(self, home_page_url: str = ""):
+        self.home_page_url = home_page_url
+
+    def begin(self, digest: Digest) -> None:
+        super().begin(digest)
+        self.count = 0
+        head = json.dumps({
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": f"每日摘要 - {digest.date_str}",
+        }, ensure_ascii=False)
+        self.parts.append(head[:-1] + ', "items": [')
+
+    def item(self, item: DigestItem) -> None:
+        link = item.url or item.discussion_url
+        entry = {
+            "id": link or f"{self.digest.date_str}-{self.count}",
+            "url": link,
+            "title": item.title,
+            "content_text": describe(item),
+            "tags": [item.source],
+        }
+        if item.discussion_url and item.discussion_url != link:
+            entry["external_url"] = item.discussion_url
+        if item.published:
+            entry["date_published"] = item.published.isoformat(timespec="seconds")
+        self.parts.append((", " if self.count else "") + json.dumps(entry, ensure_ascii=False))
+        self.count += 1
+
+    def finish(self) -> str:
+        tail = "]"
+        if self.home_page_url:
+            tail += ', "home_page_url": ' + json.dumps(self.home_page_url, ensure_ascii=False)
+        self.parts.append(tail + "}")
+        return self.drain()
+
+
+RSS_HEAD = _compile(
+    '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0">\n<channel>\n'
+    "  <title>{title}</title>\n  <link>{link}</link>\n"
+    "  <description>{description}</description>\n  <pubDate>{pub_date}</pubDate>\n"
+)
+RSS_ITEM = _compile(
+    "  <item>\n    <title>{title}</title>\n    <link>{link}</link>\n"
+    '    <guid isPermaLink="{permalink}">{guid}</guid>\n'
+    "    <category>{category}</category>\n    <description>{description}</description>\n"
+    "{pub_date}  </item>\n"
+)
+RSS_FOOT = "</channel>\n</rss>\n"
+
+
+class RssRenderer(Renderer):
+    """RSS 2.0"""
+
+    name = FORMAT_RSS
+    extension = ".xml"
+
+    def __init__(self, link: str = ""):
+        self.link = link
+
+    def begin(self, digest: Digest) -> None:
+        super().begin(digest)
+        date = datetime.strptime(digest.date_str, "%Y-%m-%d").astimezone()
+        self.parts.append(RSS_HEAD(
+            title=escape(f"每日摘要 - {digest.date_str}"),
+            link=escape(self.link),
+            description=escape(f"{digest.total} 篇 · {', '.join(digest.sources)}"),
+            pub_date=format_datetime(date),
+        ))
+
+    def item(self, item: DigestItem) -> None:
+        link = item.url or item.discussion_url
+        pub_date = ""
+        if item.published:
+            pub_date = f"    <pubDate>{format_datetime(item.published)}</pubDate>\n"
+        self.parts.append(RSS_ITEM(
+            title=escape(item.title),
+            link=escape(link),
+            permalink="true" if link else "false",
+            guid=escape(link or f"{self.digest.date_str}-{item.title}"),
+            category=escape(item.source),
+            description=escape(describe(item)),
+            pub_date=pub_date,
+        ))
+
+    def finish(self) -> str:
+        self.parts.append(RSS_FOOT)
+        return self.drain()
+
+
+RENDERERS = {
+    FORMAT_MARKDOWN: MarkdownRenderer,
+    FORMAT_HTML: HtmlEmailRenderer,
+    FORMAT_JSON_FEED: JsonFeedRenderer,
+    FORMAT_RSS: RssRenderer,
+}
+
+
+def _walk(digest: Digest, renderers: List[Renderer], on_batch=None) -> None:
+    """一次遍历模型，同时驱动所有渲染器；每 STREAM_BATCH 个条目回调一次 on_batch"""
+    for renderer in renderers:
+        renderer.begin(digest)
+
+    count = 0
+    for section in digest.sections:
+        for renderer in renderers:
+            renderer.start_section(section)
+        for group in section.groups:
+            if group.name:
+                for renderer in renderers:
+                    renderer.start_group(group)
+            for item in group.items:
+                for renderer in renderers:
+                    renderer.item(item)
+                count += 1
+                if on_batch is not None and count % STREAM_BATCH == 0:
+                    on_batch()
+
+
+def render(digest: Digest, renderers: List[Renderer]) -> Dict[str, str]:
+    """一次遍历模型，同时驱动所有渲染器，返回 {格式: 内容}"""
+    _walk(digest, renderers)
+    return {renderer.name: renderer.finish() for renderer in renderers}
+
+
+def render_stream(digest: Digest, targets: List[Tuple[Renderer, IO]]) -> None:
+    """一次遍历模型，边渲染边写入各自的文件对象，返回时已写完（不关闭文件）"""
+    def flush():
+        for renderer, f in targets:
+            f.write(renderer.drain())
+
+    _walk(digest, [renderer for renderer, _ in targets], on_batch=flush)
+    for renderer, f in targets:
+        f.write(renderer.finish())
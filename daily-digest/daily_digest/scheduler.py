@@ -0,0 +1,111 @@
+"""定时调度 - 按 notification.time 预抓取并准点生成摘要"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+
+def parse_time(value: str) -> Tuple[int, int]:
+    """解析 "HH:MM" 格式的时间"""
+    try:
+        hour, minute = (int(part) for part in str(value).strip().split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid time (expected HH:MM): {value!r}")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time (expected HH:MM): {value!r}")
+    return hour, minute
+
+
+class DigestScheduler:
+    """常驻调度器
+
+    每天在 run_time 前 prefetch_lead 预先抓取数据源，到点时若数据
+    仍在 max_age 内则直接渲染并推送，否则重新抓取一次。客户端对象由
+    fetch 回调持有，进程常驻期间 HTTP 连接池与缓存保持热状态。
+    """
+
+    def __init__(
+        self,
+        run_time: str,
+        fetch: Callable[[], Dict],
+        publish: Callable[[Dict, datetime], None],
+        prefetch_lead: timedelta = timedelta(minutes=10),
+        max_age: timedelta = timedelta(minutes=30),
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            run_time: 每日推送时间 "HH:MM"（本地时间）
+            fetch: 抓取所有数据源，返回 generator.generate 所需的数据
+            publish: 渲染并推送，参数为 (数据, 计划时间)
+            prefetch_lead: 提前多久预抓取
+            max_age: 预抓取数据的有效期
+            log: 日志回调
+        """
+        self.hour, self.minute = parse_time(run_time)
+        self.fetch = fetch
+        self.publish = publish
+        self.prefetch_lead = prefetch_lead
+        self.max_age = max_age
+        self.log = log or (lambda msg: None)
+        self._stop = threading.Event()
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        """下一次推送时间"""
+        now = now or datetime.now()
+        run_at = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return run_at
+
+    def stop(self) -> None:
+        """停止调度（可从其他线程或信号处理器调用）"""
+        self._stop.set()
+
+    def _sleep_until(self, target: datetime) -> bool:
+        """睡眠到指定时间；分段等待以应对系统休眠和时钟调整。被停止时返回 False"""
+        while not self._stop.is_set():
+            remaining = (target - datetime.now()).total_seconds()
+            if remaining <= 0:
+                return True
+            self._stop.wait(min(remaining, 60))
+        return False
+
+    def _fetch(self) -> Tuple[Dict, datetime]:
+        """抓取并记录抓取时间"""
+        started = datetime.now()
+        data = self.fetch()
+        self.log(f"fetched in {(datetime.now() - started).total_seconds():.1f}s")
+        return data, datetime.now()
+
+    def run_once(self, run_at: datetime) -> bool:
+        """执行一次：预抓取 → 等到点 → 必要时刷新 → 推送"""
+        if not self._sleep_until(run_at - self.prefetch_lead):
+            return False
+
+        self.log(f"prefetching for {run_at:%Y-%m-%d %H:%M}")
+        data, fetched_at = self._fetch()
+
+        if not self._sleep_until(run_at):
+            return False
+
+        if datetime.now() - fetched_at > self.max_age:
+            self.log("prefetched data is stale, refetching")
+            data, fetched_at = self._fetch()
+
+        self.publish(data, run_at)
+        return True
+
+    def run_forever(self) -> None:
+        """按天循环执行，直到 stop() 被调用"""
+        while not self._stop.is_set():
+            run_at = self.next_run()
+            self.log(f"next digest at {run_at:%Y-%m-%d %H:%M}")
+            try:
+                self.run_once(run_at)
+            except Exception as e:
+                self.log(f"digest run failed: {e}")
+                # 避免在同一分钟内反复重试
+                self._sleep_until(run_at + timedelta(minutes=1))
@@ -0,0 +1,246 @@
+"""收藏全文检索 - 基于 SQLite FTS5"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+ARCHIVE_NAME_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})-starred\.md$")
+ITEM_HEADING_PATTERN = re.compile(r"^#{2,4}\s*\[(.+?)\]\((.+?)\)")
+
+# unicode61 不会切分中日韩文字，连续的汉字会成为一个词。索引和查询前在每个
+# CJK 字符两侧插入零宽空格（分词器视为分隔符），按单字索引、按短语查询
+CJK_BOUNDARY = re.compile(
+    r"(?<=[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])(?=\S)"
+    r"|(?<=\S)(?=[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])"
+)
+SEGMENT_MARK = "\u200b"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    UNIQUE (date, url)
+);
+CREATE INDEX IF NOT EXISTS items_date ON items (date);
+CREATE INDEX IF NOT EXISTS items_source ON items (source);
+
+-- 存放分词后的文本（与 items 中的原文不同，所以不用 external content）
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, url, summary,
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, title, url, summary)
+    VALUES (new.id, cjk_segment(new.title), new.url, cjk_segment(new.summary));
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    DELETE FROM items_fts WHERE rowid = old.id;
+END;
+
+-- 已索引的归档文件，用于增量同步
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def detect_source(block: str) -> str:
+    """根据条目内容判断来源（归档文件中不保留分区标题时使用）"""
+    if "HN 评论" in block:
+        return "Hacker News"
+    if "**Votes**" in block:
+        return "Product Hunt"
+    return "Newsletter"
+
+
+def extract_items(markdown: str) -> List[Dict]:
+    """从归档 Markdown 中提取条目（标题、链接、摘要、来源）"""
+    items = []
+    current = None
+    body: List[str] = []
+
+    def flush():
+        if current:
+            block = "\n".join(body)
+            summary = " ".join(
+                line[1:].strip() for line in body if line.startswith(">")
+            )
+            items.append({
+                "title": current[0],
+                "url": current[1],
+                "summary": summary,
+                "source": detect_source(block),
+            })
+
+    for line in markdown.split("\n"):
+        match = ITEM_HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            current = match.groups()
+            body = []
+        elif current:
+            body.append(line)
+    flush()
+
+    return items
+
+
+def segment(text: str) -> str:
+    """在 CJK 字符两侧插入零宽空格，使其按单字分词"""
+    return CJK_BOUNDARY.sub(SEGMENT_MARK, text or "")
+
+
+def unsegment(text: str) -> str:
+    """去掉 segment 插入的零宽空格"""
+    return (text or "").replace(SEGMENT_MARK, "")
+
+
+def _fts_query(query: str) -> str:
+    """把用户输入转换为安全的 FTS5 查询（各词 AND，末尾词前缀匹配；中文词按短语匹配）"""
+    terms = [segment(term).replace('"', '""') for term in query.split()]
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class ArchiveIndex:
+    """收藏条目的全文索引
+
+    MarkProcessor 归档时增量写入；search 前通过 sync() 按文件
+    mtime/size 补录索引之外新增或修改的归档文件。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("cjk_segment", 1, segment, deterministic=True)
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def add_items(self, date_str: str, items: Iterable[Dict]) -> int:
+        """写入条目（同一天同一链接只保留一条），返回新增数量"""
+        rows = [
+            (
+                date_str,
+                item.get("source") or "",
+                item.get("title", "Untitled"),
+                item.get("url", ""),
+                item.get("summary", ""),
+            )
+            for item in items
+        ]
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO items (date, source, title, url, summary) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def sync(self, archive_dir: Path) -> int:
+        """增量同步归档目录：只重新解析 mtime/size 变化的文件"""
+        archive_dir = Path(archive_dir)
+        known = {
+            row["path"]: (row["mtime_ns"], row["size"])
+            for row in self.conn.execute("SELECT path, mtime_ns, size FROM files")
+        }
+
+        added = 0
+        try:
+            entries = list(os.scandir(archive_dir))
+        except FileNotFoundError:
+            return 0
+
+        for entry in entries:
+            match = ARCHIVE_NAME_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stat = entry.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if known.get(entry.path) == signature:
+                continue
+
+            content = Path(entry.path).read_text(encoding="utf-8")
+            added += self.add_items(match.group(1), extract_items(content))
+            self.record_file(Path(entry.path))
+
+        return added
+
+    def record_file(self, path: Path) -> None:
+        """记录归档文件当前的 mtime/size，下次 sync 时跳过"""
+        stat = path.stat()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                (str(path), stat.st_mtime_ns, stat.st_size),
+            )
+
+    def search(
+        self,
+        query: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        source: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict]:
+        """按相关度（bm25，标题权重最高）检索，可按日期和来源过滤"""
+        match = _fts_query(query)
+        if not match:
+            return []
+
+        sql = [
+            "SELECT items.date, items.source, items.title, items.url,",
+            "       snippet(items_fts, 2, '**', '**', '…', 12) AS snippet,",
+            "       bm25(items_fts, 10.0, 2.0, 1.0) AS rank",
+            "FROM items_fts JOIN items ON items.id = items_fts.rowid",
+            "WHERE items_fts MATCH ?",
+        ]
+        params: List = [match]
+        if since:
+            sql.append("AND items.date >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND items.date <= ?")
+            params.append(until)
+        if source:
+            sql.append("AND items.source LIKE ?")
+            params.append(f"%{source}%")
+        sql.append("ORDER BY rank LIMIT ?")
+        params.append(limit)
+
+        rows = self.conn.execute("\n".join(sql), params).fetchall()
+        return [{**dict(row), "snippet": unsegment(row["snippet"])} for row in rows]
+
+    def count(self) -> int:
+        """已索引的条目数"""
+        return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
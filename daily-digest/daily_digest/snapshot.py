@@ -0,0 +1,308 @@
+"""离线快照 - 后台抓取收藏文章，资源按内容哈希去重压缩存储"""
+
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from .journal import atomic_write, locked_journal
+
+
+SNAPSHOT_DIR = "Snapshots"
+SNAPSHOT_MARK = "- **快照**:"
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+
+
+class _PageParser(HTMLParser):
+    """提取标题、正文段落和关键资源（图片、样式表）"""
+
+    TEXT_TAGS = {"p", "h1", "h2", "h3", "li", "blockquote", "pre"}
+    SKIP_TAGS = {"script", "style", "noscript", "nav", "footer", "header"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[str] = []
+        self.assets: List[str] = []
+        self._stack: List[str] = []
+        self._skip = 0
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skip += 1
+        if tag == "img" and attrs.get("src"):
+            self.assets.append(attrs["src"])
+        elif tag == "link" and "stylesheet" in (attrs.get("rel") or "") and attrs.get("href"):
+            self.assets.append(attrs["href"])
+        if tag in self.TEXT_TAGS or tag == "title":
+            self._stack.append(tag)
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip:
+            self._skip -= 1
+        if self._stack and self._stack[-1] == tag:
+            self._stack.pop()
+            text = " ".join("".join(self._buffer).split())
+            if tag == "title":
+                self.title = text
+            elif text:
+                prefix = {"h1": "# ", "h2": "## ", "h3": "### ", "li": "- ", "blockquote": "> "}.get(tag, "")
+                self.blocks.append(prefix + text)
+            self._buffer = []
+
+    def handle_data(self, data):
+        if self._stack and not self._skip:
+            self._buffer.append(data)
+
+
+class SnapshotStore:
+    """内容寻址的快照存储
+
+    Snapshots/objects/ab/cdef….gz  gzip 压缩的原始内容，sha256 去重
+    Snapshots/pages/<id>.json      页面清单（HTML 与资源的哈希）
+    Snapshots/<id>.md              可在 Obsidian 中阅读的正文
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.pages_dir = self.root / "pages"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def snapshot_id(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest[2:]}.gz"
+
+    def put(self, data: bytes) -> str:
+        """写入内容，已存在的相同内容不会重复存储，返回 sha256"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            return digest
+
+        compressed = gzip.compress(data, compresslevel=6)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(compressed)
+                tmp_path.replace(path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return gzip.decompress(self._object_path(digest).read_bytes())
+
+    def manifest_path(self, snapshot_id: str) -> Path:
+        return self.pages_dir / f"{snapshot_id}.json"
+
+    def note_path(self, snapshot_id: str) -> Path:
+        return self.root / f"{snapshot_id}.md"
+
+    def load_manifest(self, snapshot_id: str) -> Optional[Dict]:
+        path = self.manifest_path(snapshot_id)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def save(self, manifest: Dict, note: str) -> None:
+        atomic_write(self.manifest_path(manifest["id"]), json.dumps(manifest, ensure_ascii=False, indent=2))
+        atomic_write(self.note_path(manifest["id"]), note)
+
+    def export(self, snapshot_id: str, dest: Path) -> Path:
+        """导出完整快照（HTML + 资源，资源引用改写为本地路径）"""
+        manifest = self.load_manifest(snapshot_id)
+        if manifest is None:
+            raise FileNotFoundError(f"Snapshot not found: {snapshot_id}")
+
+        dest = Path(dest)
+        (dest / "assets").mkdir(parents=True, exist_ok=True)
+        html = self.get(manifest["html"]).decode(manifest.get("encoding") or "utf-8", "replace")
+        for original, digest in manifest.get("assets", {}).items():
+            local = f"assets/{digest[:16]}"
+            (dest / local).write_bytes(self.get(digest))
+            html = html.replace(original, local)
+
+        index = dest / "index.html"
+        index.write_text(html, encoding="utf-8")
+        return index
+
+
+class Snapshotter:
+    """后台快照抓取，并发数受限"""
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        max_workers: int = 4,
+        max_assets: int = 20,
+        max_asset_bytes: int = 5 * 1024 * 1024,
+        max_page_bytes: int = 10 * 1024 * 1024,
+        timeout: int = 15,
+    ):
+        """
+        初始化快照抓取器
+
+        Args:
+            store: 快照存储
+            max_workers: 同时抓取的页面数
+            max_assets: 每个页面最多保存的资源数
+            max_asset_bytes: 单个资源大小上限
+            max_page_bytes: 页面 HTML 大小上限
+            timeout: 请求超时（秒）
+        """
+        self.store = store
+        self.max_assets = max_assets
+        self.max_asset_bytes = max_asset_bytes
+        self.max_page_bytes = max_page_bytes
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (compatible; daily-digest snapshot)"
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot")
+        self._futures: List[Future] = []
+        self.saved = 0
+
+    def submit(self, url: str, on_done: Optional[Callable[[Dict], None]] = None) -> Future:
+        """提交后台快照任务；on_done 在成功后于工作线程中调用"""
+        def task():
+            manifest = self.snapshot(url)
+            if on_done:
+                on_done(manifest)
+            return manifest
+
+        # 长时间运行（--watch）时先收走已完成的任务，列表不随提交次数增长
+        pending = []
+        for done in self._futures:
+            if done.done():
+                self._collect(done)
+            else:
+                pending.append(done)
+        future = self._executor.submit(task)
+        self._futures = pending + [future]
+        return future
+
+    def _collect(self, future: Future) -> Optional[Dict]:
+        """取出已完成任务的结果，成功时计入 saved"""
+        try:
+            manifest = future.result()
+        except Exception as e:
+            print(f"Snapshot failed: {e}")
+            return None
+        self.saved += 1
+        return manifest
+
+    def wait(self) -> List[Dict]:
+        """等待尚未收走的任务完成，返回其中成功的快照清单（累计成功数见 saved）"""
+        futures, self._futures = self._futures, []
+        manifests = [self._collect(future) for future in futures]
+        return [manifest for manifest in manifests if manifest is not None]
+
+    def _fetch(self, url: str, limit: Optional[int] = None) -> requests.Response:
+        resp = self.session.get(url, timeout=self.timeout, stream=True)
+        resp.raise_for_status()
+        length = int(resp.headers.get("Content-Length") or 0)
+        if limit and length > limit:
+            resp.close()
+            raise ValueError(f"Response too large: {url}")
+        return resp
+
+    @staticmethod
+    def _read(resp: requests.Response, limit: int) -> bytes:
+        """流式读取响应体，超过 limit 字节时中止（chunked 响应没有 Content-Length）"""
+        chunks = []
+        size = 0
+        try:
+            for chunk in resp.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > limit:
+                    raise ValueError(f"Response too large: {resp.url}")
+                chunks.append(chunk)
+        finally:
+            resp.close()
+        return b"".join(chunks)
+
+    def snapshot(self, url: str) -> Dict:
+        """抓取页面和关键资源并存储，已有快照直接返回"""
+        snapshot_id = self.store.snapshot_id(url)
+        existing = self.store.load_manifest(snapshot_id)
+        if existing:
+            return existing
+
+        resp = self._fetch(url, limit=self.max_page_bytes)
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_TYPES:
+            resp.close()
+            raise ValueError(f"Not an HTML page ({content_type}): {url}")
+        html = self._read(resp, self.max_page_bytes)
+        encoding = resp.encoding or "utf-8"
+        parser = _PageParser()
+        parser.feed(html.decode(encoding, "replace"))
+
+        assets: Dict[str, str] = {}
+        for src in dict.fromkeys(parser.assets):
+            if len(assets) >= self.max_assets or src.startswith("data:"):
+                continue
+            try:
+                asset = self._fetch(urljoin(resp.url, src), limit=self.max_asset_bytes)
+                assets[src] = self.store.put(self._read(asset, self.max_asset_bytes))
+            except (requests.RequestException, ValueError):
+                continue
+
+        manifest = {
+            "id": snapshot_id,
+            "url": url,
+            "final_url": resp.url,
+            "title": parser.title,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            "encoding": encoding,
+            "html": self.store.put(html),
+            "assets": assets,
+        }
+
+        note = [
+            f"# {parser.title or url}",
+            "",
+            f"> 原文: {url}",
+            f"> 快照时间: {manifest['fetched_at']}",
+            "",
+        ]
+        note.extend(block + "\n" for block in parser.blocks)
+        self.store.save(manifest, "\n".join(note))
+        return manifest
+
+
+def link_snapshot(digest_dir: Path, archive_file: Path, url: str, snapshot_id: str) -> bool:
+    """在归档条目的 URL 行后插入本地快照链接，已存在时不重复添加"""
+    with locked_journal(digest_dir) as journal:
+        content = journal.read(archive_file)
+        if content is None:
+            return False
+
+        lines = content.split("\n")
+        link = f"{SNAPSHOT_MARK} [本地快照]({SNAPSHOT_DIR}/{snapshot_id}.md)"
+
+        start = next((i for i, line in enumerate(lines) if line.startswith("#") and f"]({url})" in line), None)
+        if start is None:
+            return False
+        end = next((i for i in range(start + 1, len(lines)) if lines[i].startswith("#")), len(lines))
+        block = lines[start:end]
+        if any(line.startswith(SNAPSHOT_MARK) for line in block):
+            return False
+
+        url_line = next((i for i, line in enumerate(block) if line.startswith("- **URL**:")), 0)
+        lines.insert(start + url_line + 1, link)
+        journal.stage(archive_file, "\n".join(lines))
+        return True
@@ -1,7 +1,20 @@
 """数据源模块"""
 
-from .hackernews import HackerNewsAPI
-from .producthunt import ProductHuntAPI
-from .newsletter import NewsletterFetcher
+from importlib import import_module
 
 __all__ = ["HackerNewsAPI", "ProductHuntAPI", "NewsletterFetcher"]
+
+# 按需导入：未启用的数据源不加载其依赖
+_EXPORTS = {
+    "HackerNewsAPI": ".hackernews",
+    "ProductHuntAPI": ".producthunt",
+    "NewsletterFetcher": ".newsletter",
+}
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,86 +1,178 @@
 """Hacker News API 抓取模块"""
 
+import time
 import requests
+from datetime import datetime
 from typing import List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from ..metrics import METRICS
+from ..models import Story
+from ..transport import create_session
+
 
 class HackerNewsAPI:
     """Hacker News API 客户端"""
     
     BASE_URL = "https://hacker-news.firebaseio.com/v0"
+    # Firebase API 不支持按日期查询，历史数据走 Algolia 搜索
+    ALGOLIA_URL = "https://hn.algolia.com/api/v1"
+    ALGOLIA_TAGS = {
+        "top": "story",
+        "best": "story",
+        "new": "story",
+        "show": "show_hn",
+        "ask": "ask_hn",
+    }
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, cache_ttl: float = 0):
+        """
+        初始化客户端
+        
+        Args:
+            timeout: 请求超时（秒）
+            cache_ttl: item 缓存有效期（秒），0 表示不缓存
+        """
         self.timeout = timeout
-        self.session = requests.Session()
+        self.cache_ttl = cache_ttl
+        self.session = create_session()
+        self._item_cache: Dict[int, tuple] = {}
     
     def _get(self, endpoint: str) -> dict:
         """发送 GET 请求"""
         url = f"{self.BASE_URL}/{endpoint}.json"
-        resp = self.session.get(url, timeout=self.timeout)
+        try:
+            resp = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            METRICS.inc("http_errors_total", source="hacker_news", error=type(e).__name__)
+            raise
         resp.raise_for_status()
         return resp.json()
     
     def get_item(self, item_id: int) -> Optional[Dict]:
         """获取单个 item 详情"""
+        if self.cache_ttl:
+            cached = self._item_cache.get(item_id)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                METRICS.inc("cache_hits_total", cache="hn_item")
+                return cached[1]
+            METRICS.inc("cache_misses_total", cache="hn_item")
+        
         try:
-            return self._get(f"item/{item_id}")
+            item = self._get(f"item/{item_id}")
         except Exception:
             return None
+        
+        if self.cache_ttl and item:
+            self._item_cache[item_id] = (time.monotonic(), item)
+        return item
     
-    def get_top_stories(self, limit: int = 20) -> List[Dict]:
+    def get_top_stories(self, limit: int = 20) -> List[Story]:
         """获取 Top Stories"""
         ids = self._get("topstories")[:limit]
         return self._fetch_items(ids)
     
-    def get_new_stories(self, limit: int = 20) -> List[Dict]:
+    def get_new_stories(self, limit: int = 20) -> List[Story]:
         """获取 New Stories"""
         ids = self._get("newstories")[:limit]
         return self._fetch_items(ids)
     
-    def get_best_stories(self, limit: int = 20) -> List[Dict]:
+    def get_best_stories(self, limit: int = 20) -> List[Story]:
         """获取 Best Stories"""
         ids = self._get("beststories")[:limit]
         return self._fetch_items(ids)
     
-    def get_ask_stories(self, limit: int = 20) -> List[Dict]:
+    def get_ask_stories(self, limit: int = 20) -> List[Story]:
         """获取 Ask HN"""
         ids = self._get("askstories")[:limit]
         return self._fetch_items(ids)
     
-    def get_show_stories(self, limit: int = 20) -> List[Dict]:
+    def get_show_stories(self, limit: int = 20) -> List[Story]:
         """获取 Show HN"""
         ids = self._get("showstories")[:limit]
         return self._fetch_items(ids)
     
-    def _fetch_items(self, ids: List[int]) -> List[Dict]:
-        """并发获取多个 items"""
-        items = []
+    def prune_cache(self) -> None:
+        """清理过期的 item 缓存"""
+        now = time.monotonic()
+        expired = [k for k, (ts, _) in self._item_cache.items() if now - ts >= self.cache_ttl]
+        for key in expired:
+            self._item_cache.pop(key, None)
+    
+    def get_items(self, ids: List[int]) -> Dict[int, Dict]:
+        """并发获取多个 item 的原始数据（经过缓存），返回 {id: item}，失败的 id 不包含在内"""
+        if self.cache_ttl:
+            self.prune_cache()
+        
+        items = {}
         with ThreadPoolExecutor(max_workers=10) as executor:
             futures = {executor.submit(self.get_item, id_): id_ for id_ in ids}
             for future in as_completed(futures):
                 item = future.result()
-                if item and item.get("type") == "story":
-                    items.append(self._format_item(item))
+                if item:
+                    items[futures[future]] = item
+        return items
+    
+    def _fetch_items(self, ids: List[int]) -> List[Story]:
+        """并发获取多个 items"""
+        items = [
+            self._format_item(item)
+            for item in self.get_items(ids).values()
+            if item.get("type") == "story"
+        ]
         
         # 按 score 排序
-        items.sort(key=lambda x: x.get("score", 0), reverse=True)
+        items.sort(key=lambda x: x.score, reverse=True)
         return items
     
-    def _format_item(self, item: Dict) -> Dict:
+    def _format_item(self, item: Dict) -> Story:
         """格式化 item 数据"""
+        return Story.from_item(item)
+    
+    @classmethod
+    def between_params(cls, start: datetime, end: datetime, limit: int = 20, category: str = "top") -> Dict:
+        """按时间范围搜索的 Algolia 查询参数（离线自检构造回放数据时也使用）"""
         return {
-            "id": item.get("id"),
-            "title": item.get("title", ""),
-            "url": item.get("url", f"https://news.ycombinator.com/item?id={item.get('id')}"),
-            "hn_url": f"https://news.ycombinator.com/item?id={item.get('id')}",
-            "score": item.get("score", 0),
-            "comments": item.get("descendants", 0),
-            "author": item.get("by", ""),
-            "time": item.get("time", 0),
+            "tags": cls.ALGOLIA_TAGS.get(category, "story"),
+            "numericFilters": f"created_at_i>={int(start.timestamp())},created_at_i<{int(end.timestamp())}",
+            "hitsPerPage": limit,
         }
     
-    def get_stories_by_category(self, category: str, limit: int = 20) -> List[Dict]:
+    def get_stories_between(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: int = 20,
+        category: str = "top",
+    ) -> List[Story]:
+        """获取 [start, end) 期间发布的热门 stories（用于回填历史摘要）"""
+        params = self.between_params(start, end, limit, category)
+        resp = self.session.get(f"{self.ALGOLIA_URL}/search", params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        
+        items = []
+        now = time.monotonic()
+        for hit in resp.json().get("hits", []):
+            # 转换为 Firebase item 结构，并写入共享的 item 缓存
+            item = {
+                "id": int(hit.get("objectID", 0)),
+                "type": "story",
+                "title": hit.get("title") or "",
+                "score": hit.get("points") or 0,
+                "descendants": hit.get("num_comments") or 0,
+                "by": hit.get("author", ""),
+                "time": hit.get("created_at_i", 0),
+            }
+            if hit.get("url"):
+                item["url"] = hit["url"]
+            if self.cache_ttl:
+                self._item_cache[item["id"]] = (now, item)
+            items.append(self._format_item(item))
+        
+        items.sort(key=lambda x: x.score, reverse=True)
+        return items
+    
+    def get_stories_by_category(self, category: str, limit: int = 20) -> List[Story]:
         """根据分类获取 stories"""
         category_map = {
             "top": self.get_top_stories,
@@ -98,5 +190,5 @@ if __name__ == "__main__":
     hn = HackerNewsAPI()
     stories = hn.get_top_stories(limit=5)
     for s in stories:
-        print(f"[{s['score']}] {s['title']}")
-        print(f"    {s['url']}")
+        print(f"[{s.score}] {s.title}")
+        print(f"    {s.url}")
@@ -6,12 +6,16 @@ from datetime import datetime, timedelta
 from dateutil import parser as date_parser
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from ..models import Article
+from ..transport import create_session
+
 
 class NewsletterFetcher:
     """RSS/Atom Feed 抓取器"""
     
     def __init__(self, timeout: int = 15):
         self.timeout = timeout
+        self.session = create_session()
         self.feeds: List[Dict] = []
     
     def add_feed(self, url: str, name: Optional[str] = None) -> None:
@@ -35,7 +39,10 @@ class NewsletterFetcher:
         name = feed_info.get("name", url)
         
         try:
-            parsed = feedparser.parse(url)
+            # 通过 Session 下载（超时、指标、录制/回放），feedparser 只负责解析
+            resp = self.session.get(url, timeout=self.timeout)
+            resp.raise_for_status()
+            parsed = feedparser.parse(resp.content, response_headers={"content-type": resp.headers.get("Content-Type", "")})
             
             if parsed.bozo and not parsed.entries:
                 return {"name": name, "url": url, "articles": [], "error": str(parsed.bozo_exception)}
@@ -51,13 +58,13 @@ class NewsletterFetcher:
                 if pub_date and pub_date < cutoff:
                     continue
                 
-                articles.append({
-                    "title": entry.get("title", "Untitled"),
-                    "url": entry.get("link", ""),
-                    "summary": self._clean_summary(entry.get("summary", "")),
-                    "published": pub_date.isoformat() if pub_date else None,
-                    "author": entry.get("author", ""),
-                })
+                articles.append(Article(
+                    title=entry.get("title", "Untitled"),
+                    url=entry.get("link", ""),
+                    summary=self._clean_summary(entry.get("summary", "")),
+                    published=pub_date.isoformat() if pub_date else None,
+                    author=entry.get("author", ""),
+                ))
             
             return {
                 "name": name,
@@ -92,7 +99,11 @@ class NewsletterFetcher:
             if date_str:
                 try:
                     if isinstance(date_str, str):
-                        return date_parser.parse(date_str)
+                        parsed = date_parser.parse(date_str)
+                        # 带时区的日期转为本地时间，便于与 naive 的截止时间比较
+                        if parsed.tzinfo is not None:
+                            parsed = parsed.astimezone().replace(tzinfo=None)
+                        return parsed
                     elif hasattr(date_str, "tm_year"):
                         # struct_time
                         return datetime(*date_str[:6])
@@ -134,5 +145,5 @@ if __name__ == "__main__":
     for feed in results:
         print(f"\n=== {feed['name']} ===")
         for article in feed.get("articles", [])[:3]:
-            print(f"  - {article['title']}")
-            print(f"    {article['url']}")
+            print(f"  - {article.title}")
+            print(f"    {article.url}")
@@ -4,6 +4,10 @@ import requests
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
 
+from ..metrics import METRICS
+from ..models import Post
+from ..transport import create_session
+
 
 class ProductHuntAPI:
     """Product Hunt GraphQL API 客户端"""
@@ -12,7 +16,7 @@ class ProductHuntAPI:
     
     def __init__(self, token: Optional[str] = None, timeout: int = 15):
         self.timeout = timeout
-        self.session = requests.Session()
+        self.session = create_session()
         
         # 设置 headers
         headers = {
@@ -29,11 +33,15 @@ class ProductHuntAPI:
         if variables:
             payload["variables"] = variables
         
-        resp = self.session.post(self.API_URL, json=payload, timeout=self.timeout)
+        try:
+            resp = self.session.post(self.API_URL, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            METRICS.inc("http_errors_total", source="product_hunt", error=type(e).__name__)
+            raise
         resp.raise_for_status()
         return resp.json()
     
-    def get_today_posts(self, limit: int = 10) -> List[Dict]:
+    def get_today_posts(self, limit: int = 10) -> List[Post]:
         """获取今日产品"""
         query = """
         query GetPosts($first: Int!) {
@@ -66,27 +74,55 @@ class ProductHuntAPI:
             return [self._format_post(edge["node"]) for edge in posts]
         except Exception as e:
             print(f"Product Hunt API error: {e}")
+            METRICS.inc("fallbacks_total", source="product_hunt")
             return self._fallback_scrape(limit)
     
-    def _format_post(self, post: Dict) -> Dict:
-        """格式化产品数据"""
-        topics = [
-            t["node"]["name"] 
-            for t in post.get("topics", {}).get("edges", [])
-        ]
+    def get_posts_between(self, start: datetime, end: datetime, limit: int = 10) -> List[Post]:
+        """获取 [start, end) 期间发布的产品（需要 API Token，失败返回空列表）"""
+        query = """
+        query GetPostsBetween($first: Int!, $after: DateTime!, $before: DateTime!) {
+            posts(first: $first, order: VOTES, postedAfter: $after, postedBefore: $before) {
+                edges {
+                    node {
+                        id
+                        name
+                        tagline
+                        url
+                        votesCount
+                        website
+                        createdAt
+                        topics {
+                            edges {
+                                node {
+                                    name
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        """
         
-        return {
-            "id": post.get("id"),
-            "name": post.get("name", ""),
-            "tagline": post.get("tagline", ""),
-            "url": post.get("url", ""),
-            "website": post.get("website", ""),
-            "votes": post.get("votesCount", 0),
-            "topics": topics,
-            "created_at": post.get("createdAt", ""),
+        variables = {
+            "first": limit,
+            "after": start.astimezone(timezone.utc).isoformat(),
+            "before": end.astimezone(timezone.utc).isoformat(),
         }
+        
+        try:
+            result = self._query(query, variables)
+            posts = (result.get("data") or {}).get("posts", {}).get("edges", [])
+            return [self._format_post(edge["node"]) for edge in posts]
+        except Exception as e:
+            print(f"Product Hunt API error: {e}")
+            return []
+    
+    def _format_post(self, post: Dict) -> Post:
+        """格式化产品数据"""
+        return Post.from_node(post)
     
-    def _fallback_scrape(self, limit: int = 10) -> List[Dict]:
+    def _fallback_scrape(self, limit: int = 10) -> List[Post]:
         """备用方案：从网页抓取（无需 API Token）"""
         try:
             # 使用公开的 JSON endpoint
@@ -120,14 +156,13 @@ class ProductHuntAPI:
                 data = resp.json()
                 edges = data.get("data", {}).get("homefeed", {}).get("edges", [])
                 return [
-                    {
-                        "id": e["node"].get("id"),
-                        "name": e["node"].get("name", ""),
-                        "tagline": e["node"].get("tagline", ""),
-                        "url": f"https://www.producthunt.com/posts/{e['node'].get('slug', '')}",
-                        "votes": e["node"].get("votesCount", 0),
-                        "topics": [],
-                    }
+                    Post(
+                        id=e["node"].get("id"),
+                        name=e["node"].get("name", ""),
+                        tagline=e["node"].get("tagline", ""),
+                        url=f"https://www.producthunt.com/posts/{e['node'].get('slug', '')}",
+                        votes=e["node"].get("votesCount", 0),
+                    )
                     for e in edges if e.get("node")
                 ]
         except Exception:
@@ -141,6 +176,6 @@ if __name__ == "__main__":
     ph = ProductHuntAPI()
     posts = ph.get_today_posts(limit=5)
     for p in posts:
-        print(f"[⬆️ {p['votes']}] {p['name']}")
-        print(f"    {p['tagline']}")
-        print(f"    {p['url']}")
+        print(f"[⬆️ {p.votes}] {p.name}")
+        print(f"    {p.tagline}")
+        print(f"    {p.url}")
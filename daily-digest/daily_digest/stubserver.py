@@ -0,0 +1,254 @@
+"""本地桩服务器 - 回放录制的 Firebase / GraphQL / RSS 响应，可注入延迟和错误"""
+
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+
+import requests
+
+from .transport import Cassette
+
+
+class StubServer:
+    """在 127.0.0.1 上回放 cassette
+
+    请求路径形如 /https/hacker-news.firebaseio.com/v0/item/1.json
+    （由 transport.StubAdapter 改写），还原为原始 URL 后在 cassette 中查找。
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        port: int = 0,
+    ):
+        """
+        初始化桩服务器
+
+        Args:
+            cassette: 回放的录制数据
+            latency: 每个响应的固定延迟（秒）
+            jitter: 在固定延迟上随机增加 0~jitter 秒
+            error_rate: 返回 503 的概率
+            seed: 随机数种子（保证多次基准测试可复现）
+            port: 监听端口，0 表示自动分配
+        """
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "missing": 0}
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _roll(self):
+        """返回本次请求的 (延迟秒数, 是否注入错误)"""
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            failed = self._random.random() < self.error_rate
+        return delay, failed
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, headers: Dict, content: bytes):
+                self.send_response(status)
+                for key, value in headers.items():
+                    if key.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                        self.send_header(key, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+
+                scheme, _, rest = self.path.lstrip("/").partition("/")
+                url = f"{scheme}://{rest}"
+                delay, failed = stub._roll()
+                stub.stats["requests"] += 1
+                if delay:
+                    time.sleep(delay)
+
+                if failed:
+                    stub.stats["errors"] += 1
+                    self._reply(503, {"Content-Type": "text/plain"}, b"injected error")
+                    return
+                entry = stub.cassette.find(self.command, url, body)
+                if entry is None:
+                    stub.stats["missing"] += 1
+                    self._reply(404, {"Content-Type": "text/plain"}, f"Not recorded: {url}".encode())
+                    return
+                self._reply(entry["status"], entry["headers"], Cassette.content(entry))
+
+            do_GET = _serve
+            do_POST = _serve
+            do_HEAD = _serve
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="stub-server")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def synthetic_cassette(config: Dict, stories: int = 60, posts: int = 20, articles: int = 10) -> Cassette:
+    """按配置构造合成响应（HN Firebase、PH GraphQL、各 RSS 源），无录制数据时用于基准测试"""
+    from .sources.hackernews import HackerNewsAPI
+    from .sources.producthunt import ProductHuntAPI
+
+    cassette = Cassette()
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    base = HackerNewsAPI.BASE_URL
+    ids = list(range(40_000_001, 40_000_001 + stories))
+    for category in ("top", "new", "best", "ask", "show"):
+        cassette.add_text("GET", f"{base}/{category}stories.json", json.dumps(ids))
+    for item_id in ids:
+        cassette.add_text("GET", f"{base}/item/{item_id}.json", json.dumps({
+            "id": item_id,
+            "type": "story",
+            "title": f"Synthetic story {item_id} about systems performance",
+            "url": f"https://example.com/story/{item_id}",
+            "score": rng.randint(5, 900),
+            "descendants": rng.randint(0, 400),
+            "by": "bench",
+            "time": int((now - timedelta(minutes=rng.randint(0, 1440))).timestamp()),
+        }))
+
+    edges = [
+        {"node": {
+            "id": str(i),
+            "name": f"Product {i}",
+            "tagline": "A synthetic product for benchmarking",
+            "url": f"https://www.producthunt.com/posts/product-{i}",
+            "votesCount": rng.randint(10, 600),
+            "website": f"https://product{i}.example.com",
+            "createdAt": now.isoformat(),
+            "topics": {"edges": [{"node": {"name": "Developer Tools"}}]},
+        }}
+        for i in range(posts)
+    ]
+    cassette.add_text("POST", ProductHuntAPI.API_URL, json.dumps({"data": {"posts": {"edges": edges}}}))
+
+    feeds = config.get("sources", {}).get("newsletters", {}).get("feeds", [])
+    for feed in feeds:
+        items = "".join(
+            "<item>"
+            f"<title>{escape(feed.get('name', 'Feed'))} article {i}</title>"
+            f"<link>https://example.com/{abs(hash(feed['url'])) % 10000}/{i}</link>"
+            f"<description>{'Synthetic newsletter summary. ' * 8}</description>"
+            f"<pubDate>{format_datetime(now - timedelta(hours=i))}</pubDate>"
+            "</item>"
+            for i in range(articles)
+        )
+        rss = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(feed.get('name', 'Feed'))}</title><link>{escape(feed['url'])}</link>"
+            f"{items}</channel></rss>"
+        )
+        cassette.add_text("GET", feed["url"], rss, content_type="application/rss+xml")
+
+    return cassette
+
+
+def backfill_cassette(
+    days: List[datetime],
+    categories: Sequence[str] = ("top",),
+    limit: int = 20,
+    posts: int = 5,
+) -> Tuple[Cassette, Dict[str, List[str]]]:
+    """按日期构造 HN Algolia 搜索和 PH GraphQL 的合成响应，用于离线验证回填
+
+    Returns:
+        (cassette, {日期: 当天应出现在摘要中的 HN 标题})
+    """
+    from .sources.hackernews import HackerNewsAPI
+    from .sources.producthunt import ProductHuntAPI
+
+    cassette = Cassette()
+    expected: Dict[str, List[str]] = {}
+    rng = random.Random(42)
+    categories = list(categories) or ["top"]
+    per_category = max(1, limit // len(categories))
+    next_id = 30_000_001
+
+    for day in days:
+        date_str = day.strftime("%Y-%m-%d")
+        start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=1)
+        for category in categories:
+            hits = []
+            for i in range(per_category):
+                hits.append({
+                    "objectID": str(next_id),
+                    "title": f"Backfill {category} story {date_str} #{i + 1}",
+                    "url": f"https://example.com/{date_str}/{next_id}",
+                    "points": rng.randint(5, 900),
+                    "num_comments": rng.randint(0, 400),
+                    "author": "backfill",
+                    "created_at_i": int(start.timestamp()) + rng.randint(0, 86399),
+                })
+                next_id += 1
+            expected.setdefault(date_str, []).extend(hit["title"] for hit in hits)
+            url = requests.Request(
+                "GET",
+                f"{HackerNewsAPI.ALGOLIA_URL}/search",
+                params=HackerNewsAPI.between_params(start, end, per_category, category),
+            ).prepare().url
+            cassette.add_text("GET", url, json.dumps({"hits": hits}))
+
+    # GraphQL 请求体各天不同，按 URL 宽松匹配，所有日期返回同一组产品
+    edges = [
+        {"node": {
+            "id": str(i),
+            "name": f"Backfill product {i}",
+            "tagline": "A synthetic product for backfill checks",
+            "url": f"https://www.producthunt.com/posts/backfill-{i}",
+            "votesCount": rng.randint(10, 600),
+            "website": "",
+            "createdAt": days[0].isoformat() if days else "",
+            "topics": {"edges": []},
+        }}
+        for i in range(posts)
+    ]
+    cassette.add_text("POST", ProductHuntAPI.API_URL, json.dumps({"data": {"posts": {"edges": edges}}}))
+
+    return cassette, expected
@@ -0,0 +1,145 @@
+"""本地桩 SMTP 服务器 - 模拟限流和拒收，用于离线验证批量发送"""
+
+import threading
+import socketserver
+from typing import Dict, List, Optional, Sequence
+
+
+class StubSMTPServer:
+    """在 127.0.0.1 上模拟 SMTP 服务器
+
+    只实现 EHLO/HELO、MAIL、RCPT、DATA、RSET、NOOP、QUIT，不支持 STARTTLS
+    和登录。throttle 按收件人给出前几次 RCPT 依次返回的临时错误码（421 回复后
+    服务器断开连接），reject 中的收件人始终返回 550。
+    """
+
+    def __init__(
+        self,
+        throttle: Optional[Dict[str, Sequence[int]]] = None,
+        reject: Sequence[str] = (),
+        port: int = 0,
+    ):
+        """
+        初始化桩服务器
+
+        Args:
+            throttle: {收件人: [第 1 次 RCPT 的错误码, 第 2 次..., ...]}，用完后正常接收
+            reject: 永久拒收的收件人
+            port: 监听端口，0 表示自动分配
+        """
+        self.throttle = {addr.lower(): list(codes) for addr, codes in (throttle or {}).items()}
+        self.reject = {addr.lower() for addr in reject}
+        self.messages: List[Dict] = []
+        self.stats = {"connections": 0, "throttled": 0, "rejected": 0, "delivered": 0}
+        self._lock = threading.Lock()
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def _rcpt_code(self, addr: str) -> int:
+        """本次 RCPT 的响应码"""
+        with self._lock:
+            codes = self.throttle.get(addr.lower())
+            if codes:
+                self.stats["throttled"] += 1
+                return codes.pop(0)
+            if addr.lower() in self.reject:
+                self.stats["rejected"] += 1
+                return 550
+        return 250
+
+    def _handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _reply(self, code: int, text: str):
+                self.wfile.write(f"{code} {text}\r\n".encode())
+
+            def _read_data(self) -> bytes:
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    # 去掉 dot-stuffing
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                return b"".join(lines)
+
+            def handle(self):
+                with stub._lock:
+                    stub.stats["connections"] += 1
+                self._reply(220, "stub ESMTP ready")
+                sender, recipients = None, []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    verb, _, arg = line.decode("utf-8", "replace").strip().partition(" ")
+                    verb = verb.upper()
+
+                    if verb == "EHLO":
+                        self.wfile.write(b"250-stub\r\n250 8BITMIME\r\n")
+                    elif verb == "HELO":
+                        self._reply(250, "stub")
+                    elif verb == "MAIL":
+                        sender, recipients = arg.partition(":")[2].strip().strip("<>"), []
+                        self._reply(250, "OK")
+                    elif verb == "RCPT":
+                        addr = arg.partition(":")[2].strip().strip("<>")
+                        code = stub._rcpt_code(addr)
+                        if code == 250:
+                            recipients.append(addr)
+                            self._reply(250, "OK")
+                        elif code == 550:
+                            self._reply(550, f"{addr}: mailbox unavailable")
+                        else:
+                            self._reply(code, "too many messages, try again later")
+                            if code == 421:
+                                return
+                    elif verb == "DATA":
+                        if sender is None or not recipients:
+                            self._reply(503, "need MAIL and RCPT first")
+                            continue
+                        self._reply(354, "end data with <CR><LF>.<CR><LF>")
+                        data = self._read_data()
+                        with stub._lock:
+                            stub.messages.append({"from": sender, "to": recipients, "data": data})
+                            stub.stats["delivered"] += len(recipients)
+                        sender, recipients = None, []
+                        self._reply(250, "OK queued")
+                    elif verb == "RSET":
+                        sender, recipients = None, []
+                        self._reply(250, "OK")
+                    elif verb == "NOOP":
+                        self._reply(250, "OK")
+                    elif verb == "QUIT":
+                        self._reply(221, "bye")
+                        return
+                    else:
+                        self._reply(502, "command not implemented")
+
+        return Handler
+
+    def start(self) -> "StubSMTPServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="stub-smtp")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,194 @@
+"""HTTP 传输层 - 统一创建数据源的 Session，支持录制/回放和本地桩服务器
+
+所有数据源客户端都通过 create_session() 获取 Session。默认直连网络；
+use_transport() 切换为：
+
+- record: 正常请求并把响应录制到 cassette 文件
+- replay: 只从 cassette 返回响应，不访问网络
+- stub:   请求改写到本地 StubServer（回放 cassette，可注入延迟和错误）
+"""
+
+import json
+import base64
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .journal import atomic_write
+from .metrics import instrument_session
+
+
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_STUB = "stub"
+
+# 回放时保留的响应头
+KEPT_HEADERS = ("Content-Type", "Content-Encoding", "Location")
+
+
+def _body_hash(body) -> str:
+    if not body:
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha1(body).hexdigest()
+
+
+class Cassette:
+    """录制的 HTTP 响应集合（JSON 文件）
+
+    按 (method, url, 请求体哈希) 精确匹配；找不到时退回到只按
+    (method, url) 匹配，这样 GraphQL 查询文本变化后旧录制仍可用。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.entries: List[Dict] = []
+        self._exact: Dict[Tuple[str, str, str], Dict] = {}
+        self._loose: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            for entry in json.loads(self.path.read_text(encoding="utf-8")).get("entries", []):
+                self._index(entry)
+
+    def _index(self, entry: Dict) -> None:
+        self.entries.append(entry)
+        method, url = entry["method"], entry["url"]
+        self._exact[(method, url, entry.get("body_hash", ""))] = entry
+        self._loose.setdefault((method, url), entry)
+
+    def add(self, method: str, url: str, body, status: int, headers: Dict, content: bytes) -> None:
+        entry = {
+            "method": method.upper(),
+            "url": url,
+            "body_hash": _body_hash(body),
+            "status": status,
+            "headers": {key: headers[key] for key in KEPT_HEADERS if key in headers},
+            "content": base64.b64encode(content).decode("ascii"),
+        }
+        with self._lock:
+            self._index(entry)
+
+    def add_text(self, method: str, url: str, text: str, content_type: str = "application/json", status: int = 200) -> None:
+        """添加一条文本响应（用于构造合成数据）"""
+        self.add(method, url, None, status, {"Content-Type": content_type}, text.encode("utf-8"))
+
+    def find(self, method: str, url: str, body=None) -> Optional[Dict]:
+        method = method.upper()
+        return self._exact.get((method, url, _body_hash(body))) or self._loose.get((method, url))
+
+    @staticmethod
+    def content(entry: Dict) -> bytes:
+        return base64.b64decode(entry["content"])
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        path = Path(path or self.path)
+        with self._lock:
+            data = json.dumps({"entries": self.entries}, ensure_ascii=False, indent=1)
+        atomic_write(path, data)
+        return path
+
+
+def _build_response(request: requests.PreparedRequest, status: int, headers: Dict, content: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.headers.pop("Content-Encoding", None)
+    resp._content = content
+    resp.url = request.url
+    resp.request = request
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    return resp
+
+
+class RecordingAdapter(HTTPAdapter):
+    """正常发送请求，同时把响应写入 cassette"""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        content = resp.content
+        self.cassette.add(request.method, request.url, request.body, resp.status_code, resp.headers, content)
+        return resp
+
+
+class ReplayAdapter(HTTPAdapter):
+    """只从 cassette 返回响应，未录制的请求视为连接失败"""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        entry = self.cassette.find(request.method, request.url, request.body)
+        if entry is None:
+            raise requests.ConnectionError(f"Not recorded: {request.method} {request.url}", request=request)
+        return _build_response(request, entry["status"], entry["headers"], Cassette.content(entry))
+
+
+class StubAdapter(HTTPAdapter):
+    """把 https://host/path 改写为 http://stub/https/host/path 发往本地桩服务器"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        original = request.url
+        parts = urlsplit(original)
+        request.url = f"{self.base_url}/{parts.scheme}/{parts.netloc}{parts.path}" + (
+            f"?{parts.query}" if parts.query else ""
+        )
+        resp = super().send(request, **kwargs)
+        # 对调用方保持原始 URL（按 host 统计的指标也归到真实 host）
+        resp.url = original
+        request.url = original
+        return resp
+
+
+_active: Dict = {"mode": MODE_LIVE}
+
+
+def use_transport(mode: str = MODE_LIVE, cassette: Optional[Cassette] = None, stub_url: str = "") -> None:
+    """切换之后创建的 Session 所使用的传输方式"""
+    if mode not in (MODE_LIVE, MODE_RECORD, MODE_REPLAY, MODE_STUB):
+        raise ValueError(f"Unknown transport mode: {mode!r}")
+    if mode in (MODE_RECORD, MODE_REPLAY) and cassette is None:
+        raise ValueError(f"{mode} mode needs a cassette")
+    if mode == MODE_STUB and not stub_url:
+        raise ValueError("stub mode needs stub_url")
+    _active.clear()
+    _active.update(mode=mode, cassette=cassette, stub_url=stub_url)
+
+
+def create_session(pool_maxsize: int = 10, pool_connections: int = 10) -> requests.Session:
+    """创建数据源使用的 Session（带指标钩子和当前传输方式）
+
+    pool_connections 为缓存连接池的 host 数，pool_maxsize 为每个 host 的连接数。
+    """
+    session = requests.Session()
+    mode = _active["mode"]
+    pools = {"pool_connections": pool_connections, "pool_maxsize": pool_maxsize}
+    if mode == MODE_RECORD:
+        adapter = RecordingAdapter(_active["cassette"], **pools)
+    elif mode == MODE_REPLAY:
+        adapter = ReplayAdapter(_active["cassette"])
+    elif mode == MODE_STUB:
+        adapter = StubAdapter(_active["stub_url"], **pools)
+    else:
+        adapter = HTTPAdapter(**pools)
+
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    instrument_session(session)
+    return session
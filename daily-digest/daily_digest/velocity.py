@@ -0,0 +1,356 @@
+"""热度变化 - 定期采样 HN 候选条目的分数和评论数，计算上升速度和加速度
+
+采样按天分段追加写入二进制文件（.velocity/YYYY-MM-DD.bin）。每条记录是
+一次采样：相对上一次采样的时间差，以及分数或评论数有变化的条目——条目
+id 按升序存差值，分数和评论数存相对本段上一次取值的差值（zigzag varint）。
+没有变化的条目不写入，一条 100 个条目的采样通常只有几百字节。
+
+每条记录带长度前缀，写到一半崩溃时读取会忽略末尾不完整的记录。超过
+retention_days 天或总大小超过 max_bytes 的旧分段会被删除。
+"""
+
+import os
+import bisect
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .journal import file_lock
+from .metrics import METRICS
+
+if TYPE_CHECKING:
+    from .models import Story
+    from .sources.hackernews import HackerNewsAPI
+
+
+VELOCITY_DIR = ".velocity"
+LOCK_FILE = ".lock"
+
+# 计算速度的时间窗口，以及条目首次出现后至少观察多久才给出速度
+WINDOW = 3600
+MIN_SPAN = 600
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _segment_name(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d") + ".bin"
+
+
+@dataclass(slots=True)
+class Velocity:
+    """条目的热度变化特征"""
+    score_rate: float = 0.0      # 每小时增加的分数
+    comment_rate: float = 0.0    # 每小时增加的评论数
+    acceleration: float = 0.0    # 分数增速的变化（每小时²）
+
+
+class VelocityStore:
+    """分数采样存储（按天分段的追加写文件）"""
+
+    def __init__(
+        self,
+        directory: Path,
+        retention_days: int = 3,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        """
+        初始化存储
+
+        Args:
+            directory: 分段文件目录
+            retention_days: 保留最近几天的分段
+            max_bytes: 所有分段的总大小上限，超出时从最旧的分段开始删除
+        """
+        self.directory = Path(directory)
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._loaded = False
+        # 每个条目取值变化的时间点 {id: [(时间, 分数, 评论数)]}
+        self._history: Dict[int, List[Tuple[int, int, int]]] = {}
+        self._sample_times: List[int] = []
+        # 当前分段的解码状态（追加写入时需要和文件保持一致）
+        self._segment: Optional[Path] = None
+        self._segment_size = 0
+        self._segment_time = 0
+        self._segment_values: Dict[int, Tuple[int, int]] = {}
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("*.bin"))
+
+    def _replay(self, path: Path, history: bool = True) -> None:
+        """解码一个分段；history=True 时把取值变化并入历史"""
+        data = path.read_bytes() if path.exists() else b""
+        last_time = 0
+        values: Dict[int, Tuple[int, int]] = {}
+        pos = 0
+        while pos < len(data):
+            try:
+                length, start = _read_varint(data, pos)
+                end = start + length
+                if end > len(data):
+                    break
+                delta, cursor = _read_varint(data, start)
+                count, cursor = _read_varint(data, cursor)
+                timestamp = last_time + delta
+                item_id = 0
+                changes = []
+                for _ in range(count):
+                    id_delta, cursor = _read_varint(data, cursor)
+                    score_delta, cursor = _read_varint(data, cursor)
+                    comments_delta, cursor = _read_varint(data, cursor)
+                    item_id += id_delta
+                    score, comments = values.get(item_id, (0, 0))
+                    changes.append((item_id, score + _unzigzag(score_delta), comments + _unzigzag(comments_delta)))
+            except IndexError:
+                break
+            for item_id, score, comments in changes:
+                values[item_id] = (score, comments)
+                if history:
+                    self._history.setdefault(item_id, []).append((timestamp, score, comments))
+            if history:
+                self._sample_times.append(timestamp)
+            last_time = timestamp
+            pos = end
+
+        self._segment = path
+        self._segment_size = pos
+        self._segment_time = last_time
+        self._segment_values = values
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        for path in self._segments():
+            self._replay(path)
+        self._loaded = True
+
+    def append(self, values: Dict[int, Tuple[int, int]], timestamp: Optional[int] = None) -> int:
+        """追加一次采样 {id: (分数, 评论数)}，返回写入的字节数"""
+        timestamp = int(timestamp or time.time())
+        path = self.directory / _segment_name(timestamp)
+
+        with self._lock, file_lock(self.directory / LOCK_FILE):
+            self._ensure_loaded()
+            # 其他进程（如 cron 采样）也可能写过这个分段，重新解码以保持差值基准一致
+            if path != self._segment or (path.exists() and path.stat().st_size != self._segment_size):
+                self._replay(path, history=False)
+
+            changes = sorted(
+                (item_id, score, comments)
+                for item_id, (score, comments) in values.items()
+                if self._segment_values.get(item_id) != (score, comments)
+            )
+            payload = bytearray()
+            _write_varint(max(0, timestamp - self._segment_time), payload)
+            _write_varint(len(changes), payload)
+            previous_id = 0
+            for item_id, score, comments in changes:
+                last_score, last_comments = self._segment_values.get(item_id, (0, 0))
+                _write_varint(item_id - previous_id, payload)
+                _write_varint(_zigzag(score - last_score), payload)
+                _write_varint(_zigzag(comments - last_comments), payload)
+                previous_id = item_id
+
+            record = bytearray()
+            _write_varint(len(payload), record)
+            record += payload
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with path.open("r+b" if path.exists() else "wb") as f:
+                # 丢弃末尾不完整的记录（上次写到一半崩溃），否则新记录会接在残片之后
+                f.truncate(self._segment_size)
+                f.seek(self._segment_size)
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+
+            timestamp = max(timestamp, self._segment_time)
+            for item_id, score, comments in changes:
+                self._segment_values[item_id] = (score, comments)
+                self._history.setdefault(item_id, []).append((timestamp, score, comments))
+            self._sample_times.append(timestamp)
+            self._segment_time = timestamp
+            self._segment_size += len(record)
+
+            self._prune(timestamp)
+
+        METRICS.inc("velocity_samples_total")
+        METRICS.inc("velocity_bytes_written_total", len(record))
+        return len(record)
+
+    def _prune(self, now: int) -> None:
+        """删除过期分段；总大小超限时从最旧的分段开始删除（当前分段保留）"""
+        cutoff = _segment_name(now - self.retention_days * 86400)
+        segments = self._segments()
+        sizes = {path: path.stat().st_size for path in segments}
+        total = sum(sizes.values())
+        removed = False
+        for path in segments[:-1]:
+            if path.name >= cutoff and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= sizes[path]
+            removed = True
+        if removed:
+            # 内存中的历史也随之丢弃，下次查询时从剩下的分段重新加载
+            self._history.clear()
+            self._sample_times.clear()
+            self._loaded = False
+        METRICS.set("velocity_store_bytes", total)
+
+    def usage(self) -> Dict:
+        """存储占用：分段数、总字节数、采样次数、跟踪的条目数"""
+        with self._lock:
+            self._ensure_loaded()
+            segments = self._segments()
+            return {
+                "segments": len(segments),
+                "bytes": sum(path.stat().st_size for path in segments),
+                "samples": len(self._sample_times),
+                "items": len(self._history),
+            }
+
+    def features(self, ids: Iterable[int], window: int = WINDOW) -> Dict[int, Velocity]:
+        """按最近一次采样计算条目的上升速度和加速度（没有足够数据的条目不返回）"""
+        with self._lock:
+            self._ensure_loaded()
+            if not self._sample_times:
+                return {}
+            now = self._sample_times[-1]
+            # 采样已经停止太久，速度没有参考价值
+            if time.time() - now > window:
+                return {}
+
+            result = {}
+            for item_id in ids:
+                points = self._history.get(item_id)
+                if not points:
+                    continue
+                velocity = self._velocity(points, now, window)
+                if velocity is not None:
+                    result[item_id] = velocity
+            return result
+
+    @staticmethod
+    def _velocity(points: List[Tuple[int, int, int]], now: int, window: int) -> Optional[Velocity]:
+        times = [point[0] for point in points]
+
+        def value_at(moment: int) -> Optional[Tuple[int, int, int]]:
+            """moment 时的取值（取值只在变化时记录，之间保持不变）"""
+            index = bisect.bisect_right(times, moment) - 1
+            return points[index] if index >= 0 else None
+
+        _, score, comments = points[-1]
+        start = value_at(now - window)
+        if start is None:
+            # 条目出现还不到一个窗口：从首次出现开始算
+            start = points[0]
+            span = now - start[0]
+            if span < MIN_SPAN:
+                return None
+        else:
+            span = window
+
+        hours = span / 3600
+        score_rate = (score - start[1]) / hours
+        comment_rate = (comments - start[2]) / hours
+
+        acceleration = 0.0
+        earlier = value_at(now - 2 * window)
+        if span == window and earlier is not None:
+            previous_rate = (start[1] - earlier[1]) / hours
+            acceleration = (score_rate - previous_rate) / hours
+        return Velocity(score_rate, comment_rate, acceleration)
+
+
+def annotate(stories: List["Story"], store: VelocityStore, window: int = WINDOW) -> None:
+    """把速度特征写入 Story.velocity / Story.acceleration"""
+    features = store.features([story.id for story in stories], window=window)
+    for story in stories:
+        velocity = features.get(story.id)
+        if velocity is not None:
+            story.velocity = velocity.score_rate
+            story.acceleration = velocity.acceleration
+
+
+class VelocitySampler:
+    """定期采样 HN 候选条目（各分类榜单的前 pool_size 条）"""
+
+    def __init__(
+        self,
+        hn: "HackerNewsAPI",
+        store: VelocityStore,
+        categories: Iterable[str] = ("top", "new"),
+        pool_size: int = 100,
+    ):
+        """
+        初始化采样器
+
+        Args:
+            hn: HN 客户端（不应开启 item 缓存，否则采到的是旧数据）
+            store: 采样存储
+            categories: 候选池来自哪些榜单
+            pool_size: 每个榜单取前多少条
+        """
+        self.hn = hn
+        self.store = store
+        self.categories = list(categories)
+        self.pool_size = pool_size
+        self._stop = threading.Event()
+
+    def sample_once(self) -> int:
+        """采样一次，返回采样的条目数"""
+        values: Dict[int, Tuple[int, int]] = {}
+        for category in self.categories:
+            for story in self.hn.get_stories_by_category(category, limit=self.pool_size):
+                values[story.id] = (story.score, story.comments)
+        if values:
+            self.store.append(values)
+        return len(values)
+
+    def run(self, interval: float, log=None) -> None:
+        """每 interval 秒采样一次，直到 stop()"""
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                if log:
+                    log(f"velocity sample failed: {e}")
+            self._stop.wait(interval)
+
+    def start(self, interval: float, log=None) -> threading.Thread:
+        """在后台线程中运行"""
+        thread = threading.Thread(target=self.run, args=(interval, log), daemon=True, name="velocity-sampler")
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,233 @@
+"""目录监听 - 文件保存后立即处理标记"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .processor import MarkProcessor
+from .layout import DATE_FILE_PATTERN
+
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifySource:
+    """基于 Linux inotify 的变更源（零轮询开销）"""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, directories: List[Path]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._watches: Dict[int, Path] = {}
+        try:
+            for directory in directories:
+                self.add_directory(directory)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def add_directory(self, directory: Path) -> None:
+        """追加监听目录（inotify 不递归，分片目录需逐个添加）"""
+        directory = Path(directory)
+        if directory in self._watches.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, str(directory).encode(), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+        self._watches[wd] = directory
+
+    def wait(self, timeout: float) -> List[Path]:
+        """等待变更，返回发生变化的文件"""
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_len
+            if name and wd in self._watches:
+                changed.append(self._watches[wd] / name)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingSource:
+    """轮询变更源（inotify 不可用时的备用方案）"""
+
+    def __init__(self, directories: List[Path], interval: float = 1.0):
+        self.directories: List[Path] = []
+        self.interval = interval
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        for directory in directories:
+            self.add_directory(directory)
+        self._next_scan = time.monotonic() + interval
+
+    def add_directory(self, directory: Path) -> None:
+        """追加扫描目录"""
+        directory = Path(directory)
+        if directory not in self.directories:
+            self.directories.append(directory)
+            self._snapshot.update(self._scan_dir(directory))
+
+    def _scan_dir(self, directory: Path) -> Dict[str, Tuple[int, int]]:
+        """记录目录下每个文件的 (mtime_ns, size)"""
+        snapshot = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            snapshot.update(self._scan_dir(directory))
+        return snapshot
+
+    def wait(self, timeout: float) -> List[Path]:
+        """等待到下一次扫描（或超时），返回发生变化的文件"""
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(max(0.0, timeout))
+            return []
+        time.sleep(max(0.0, delay))
+        self._next_scan = time.monotonic() + self.interval
+
+        snapshot = self._scan()
+        changed = [
+            Path(path)
+            for path, sig in snapshot.items()
+            if self._snapshot.get(path) != sig
+        ]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class MarkWatcher:
+    """监听摘要目录，防抖后只处理发生变化的文件"""
+
+    # 分片布局下重新发现新建月份目录的间隔（秒）
+    RESCAN_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        processor: MarkProcessor,
+        debounce: float = 0.5,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+    ):
+        """
+        初始化监听器
+
+        Args:
+            processor: 标记处理器
+            debounce: 文件最后一次写入后等待的秒数（合并 Obsidian 的连续保存）
+            poll_interval: 轮询模式下的扫描间隔
+            use_inotify: 是否优先使用 inotify
+        """
+        self.processor = processor
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = None
+
+    def _watch_dirs(self) -> List[Path]:
+        """需要监听的目录：摘要根目录 + 所有分片目录"""
+        return [self.processor.digest_dir] + self.processor.layout.shard_dirs()
+
+    def _open_source(self):
+        """打开变更源，inotify 不可用时回退到轮询"""
+        directories = self._watch_dirs()
+        if self.use_inotify:
+            try:
+                source = InotifySource(directories)
+                self.mode = "inotify"
+                return source
+            except (OSError, AttributeError):
+                pass
+        self.mode = "polling"
+        return PollingSource(directories, interval=self.poll_interval)
+
+    def run(
+        self,
+        on_result: Optional[Callable[[Dict], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> None:
+        """阻塞运行，直到 stop_event 被设置或收到 KeyboardInterrupt"""
+        stop_event = stop_event or threading.Event()
+        source = self._open_source()
+        pending: Dict[Path, float] = {}
+        next_rescan = time.monotonic() + self.RESCAN_INTERVAL
+
+        try:
+            while not stop_event.is_set():
+                now = time.monotonic()
+                if now >= next_rescan:
+                    for directory in self._watch_dirs():
+                        source.add_directory(directory)
+                    next_rescan = now + self.RESCAN_INTERVAL
+
+                timeout = min(pending.values()) - now if pending else 1.0
+
+                for path in source.wait(max(0.0, min(timeout, 1.0))):
+                    if DATE_FILE_PATTERN.match(path.name):
+                        pending[path] = time.monotonic() + self.debounce
+
+                now = time.monotonic()
+                for path in [p for p, deadline in pending.items() if deadline <= now]:
+                    del pending[path]
+                    result = self.process(path)
+                    if result and on_result:
+                        on_result(result)
+        finally:
+            source.close()
+
+    def process(self, path: Path) -> Optional[Dict]:
+        """处理单个变化的文件，没有任何标记变化时返回 None"""
+        if not path.exists():
+            return None
+        try:
+            result = self.processor.process_file(path)
+        except Exception as e:
+            return {"path": str(path), "error": str(e)}
+        if result.get("removed", 0) > 0 or result.get("starred", 0) > 0:
+            return result
+        return None
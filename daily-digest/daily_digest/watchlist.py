@@ -0,0 +1,300 @@
+"""关注词提醒 - 抓取后立即扫描所有条目，命中关注词时推送通知
+
+所有规则的关注词编译成一个 Aho–Corasick 自动机，每个条目的标题和摘要
+只扫描一遍，耗时与文本长度成正比，与关注词数量无关。屏蔽规则（域名、
+最低分数）在同一遍中按条目判断；同一规则对同一条目只提醒一次。
+
+配置示例：
+
+    watchlist:
+      mute:
+        domains: [medium.com]
+      rules:
+        - name: 我们的产品
+          terms: [acme, acme cloud]
+        - name: 安全公告
+          terms: [CVE-2025-1234, openssl]
+          min_score: 20
+          mute_domains: [example.com]
+"""
+
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .journal import atomic_write
+from .metrics import METRICS
+from .models import Story, Post
+
+if TYPE_CHECKING:
+    from .notifier import Notifier
+
+
+ALERT_LOG = ".watchlist.json"
+
+
+class AhoCorasick:
+    """多模式串匹配自动机（模式串按小写匹配）"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        index: Dict[str, int] = {}
+        for pattern in patterns:
+            pattern = pattern.lower()
+            if pattern and pattern not in index:
+                index[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self._insert(pattern, index[pattern])
+        self._build()
+
+    def _insert(self, pattern: str, pattern_id: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (pattern_id,)
+
+    def _build(self) -> None:
+        """按 BFS 计算失败指针，并把失败链上的输出合并到每个状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """扫描已转为小写的文本，逐个返回 (起始位置, 结束位置, 模式串序号)"""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in out[state]:
+                yield end - len(patterns[pattern_id]), end, pattern_id
+
+
+def _is_word_char(ch: str) -> bool:
+    """ASCII 字母数字（str.isalnum 对汉字也返回 True）"""
+    return ch.isascii() and ch.isalnum()
+
+
+def _domain(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _domain_muted(domain: str, muted: frozenset) -> bool:
+    """域名或其任一上级域名被屏蔽"""
+    while domain:
+        if domain in muted:
+            return True
+        domain = domain.partition(".")[2]
+    return False
+
+
+@dataclass(slots=True)
+class WatchRule:
+    """一条关注规则"""
+    name: str
+    terms: Tuple[str, ...]
+    min_score: int = 0
+    mute_domains: frozenset = frozenset()
+
+
+@dataclass(slots=True)
+class WatchHit:
+    """规则命中的条目"""
+    rule: str
+    term: str
+    key: str          # 条目标识，用于去重
+    title: str
+    url: str
+    source: str
+
+
+def _fields(item) -> Tuple[str, str, str, str, Optional[int], str]:
+    """条目的 (标识, 标题, 待扫描文本, 链接, 分数, 来源)"""
+    if isinstance(item, Story):
+        return f"hn:{item.id}", item.title, item.title, item.url, item.score, "Hacker News"
+    if isinstance(item, Post):
+        text = " \n ".join((item.name, item.tagline, *item.topics))
+        return f"ph:{item.id}", item.name, text, item.url, item.votes, "Product Hunt"
+    text = f"{item.title} \n {item.summary}"
+    return item.url or item.title, item.title, text, item.url, None, "Newsletter"
+
+
+class Watchlist:
+    """编译后的关注规则集"""
+
+    def __init__(
+        self,
+        rules: List[WatchRule],
+        mute_domains: Iterable[str] = (),
+        min_score: int = 0,
+        word_boundary: bool = True,
+    ):
+        """
+        初始化规则集
+
+        Args:
+            rules: 关注规则
+            mute_domains: 全局屏蔽的域名（含子域名）
+            min_score: 全局最低分数（只对有分数的 HN/PH 条目生效）
+            word_boundary: 英文词只匹配完整单词（acme 不匹配 acmesoft，中文词不受影响）
+        """
+        self.rules = rules
+        self.mute_domains = frozenset(domain.lower() for domain in mute_domains)
+        self.min_score = min_score
+        self.word_boundary = word_boundary
+
+        self.automaton = AhoCorasick(term for rule in rules for term in rule.terms)
+        # 模式串序号 -> 使用该词的规则序号（同一个词可以属于多条规则）
+        self._term_rules: List[List[int]] = [[] for _ in self.automaton.patterns]
+        lookup = {pattern: i for i, pattern in enumerate(self.automaton.patterns)}
+        for rule_id, rule in enumerate(rules):
+            for term in {term.lower() for term in rule.terms if term}:
+                self._term_rules[lookup[term]].append(rule_id)
+
+    @classmethod
+    def from_config(cls, watch_config: Dict) -> "Watchlist":
+        """从 watchlist 配置创建"""
+        rules = [
+            WatchRule(
+                name=rule.get("name") or ", ".join(rule.get("terms", [])[:3]),
+                terms=tuple(str(term) for term in rule.get("terms", [])),
+                min_score=rule.get("min_score", 0),
+                mute_domains=frozenset(domain.lower() for domain in rule.get("mute_domains", [])),
+            )
+            for rule in watch_config.get("rules", [])
+        ]
+        mute = watch_config.get("mute", {})
+        return cls(
+            rules,
+            mute_domains=mute.get("domains", []),
+            min_score=mute.get("min_score", 0),
+            word_boundary=watch_config.get("word_boundary", True),
+        )
+
+    def _bounded(self, text: str, start: int, end: int) -> bool:
+        """命中的英文词两侧不连着 ASCII 字母数字（中文没有词边界，CJK 字符两侧不检查）"""
+        if not self.word_boundary:
+            return True
+        if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def match(self, item) -> List[WatchHit]:
+        """扫描单个条目，返回命中的规则（每条规则最多一个）"""
+        key, title, text, url, score, source = _fields(item)
+        domain = _domain(url)
+        if _domain_muted(domain, self.mute_domains):
+            return []
+        if score is not None and score < self.min_score:
+            return []
+
+        text = text.lower()
+        hits: Dict[int, WatchHit] = {}
+        for start, end, pattern_id in self.automaton.iter_matches(text):
+            if not self._bounded(text, start, end):
+                continue
+            for rule_id in self._term_rules[pattern_id]:
+                if rule_id in hits:
+                    continue
+                rule = self.rules[rule_id]
+                if score is not None and score < rule.min_score:
+                    continue
+                if rule.mute_domains and _domain_muted(domain, rule.mute_domains):
+                    continue
+                hits[rule_id] = WatchHit(rule.name, self.automaton.patterns[pattern_id], key, title, url, source)
+        return list(hits.values())
+
+    def scan(self, items: Iterable) -> List[WatchHit]:
+        """扫描所有条目"""
+        hits = []
+        count = 0
+        for item in items:
+            hits.extend(self.match(item))
+            count += 1
+        METRICS.inc("watchlist_items_scanned_total", count)
+        METRICS.inc("watchlist_hits_total", len(hits))
+        return hits
+
+
+def iter_items(data: Dict) -> Iterator:
+    """遍历 generator.generate 所需数据中的全部条目"""
+    yield from data.get("hn_stories", [])
+    yield from data.get("ph_posts", [])
+    for feed in data.get("newsletters", []):
+        yield from feed.get("articles", [])
+
+
+class AlertLog:
+    """已提醒记录（JSON 文件），同一规则对同一条目在 ttl 内只提醒一次"""
+
+    def __init__(self, path: Path, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._seen: Dict[str, Dict[str, float]] = {}
+        if self.path.exists():
+            try:
+                self._seen = json.loads(self.path.read_text(encoding="utf-8"))
+            except (ValueError, OSError) as e:
+                print(f"Ignoring unreadable alert log {self.path}: {e}")
+
+    def fresh(self, hits: List[WatchHit]) -> List[WatchHit]:
+        """过滤掉已提醒过的命中，并把新的命中记入日志"""
+        now = time.time()
+        fresh = []
+        for hit in hits:
+            seen = self._seen.setdefault(hit.rule, {})
+            if now - seen.get(hit.key, 0) < self.ttl:
+                continue
+            seen[hit.key] = now
+            fresh.append(hit)
+        return fresh
+
+    def save(self) -> None:
+        """清理过期记录后写回"""
+        now = time.time()
+        self._seen = {
+            rule: kept
+            for rule, seen in self._seen.items()
+            if (kept := {key: ts for key, ts in seen.items() if now - ts < self.ttl})
+        }
+        atomic_write(self.path, json.dumps(self._seen, ensure_ascii=False))
+
+
+def send_alerts(hits: List[WatchHit], notifier: "Notifier", max_lines: int = 5) -> int:
+    """每条规则合并为一条通知后台投递，返回通知数"""
+    by_rule: Dict[str, List[WatchHit]] = {}
+    for hit in hits:
+        by_rule.setdefault(hit.rule, []).append(hit)
+
+    for rule, rule_hits in by_rule.items():
+        lines = [f"[{hit.term}] {hit.title}" for hit in rule_hits[:max_lines]]
+        if len(rule_hits) > max_lines:
+            lines.append(f"… 另有 {len(rule_hits) - max_lines} 条")
+        notifier.enqueue(f"🔔 关注: {rule} ({len(rule_hits)})", "\n".join(lines))
+    return len(by_rule)
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+离线基准测试 - 通过本地桩服务器回放录制的响应，测量抓取和生成各阶段耗时
+
+使用方法:
+    python benchmark.py --record bench.json             # 按当前配置访问真实服务并录制
+    python benchmark.py --cassette bench.json --runs 5  # 回放录制数据，跑 5 轮
+    python benchmark.py --latency 80 --jitter 40 --error-rate 0.02   # 合成数据 + 注入延迟和错误
+    python benchmark.py --cassette bench.json --json result.json     # 结果另存为 JSON
+    python benchmark.py --memory 100000                 # 条目模型内存和访问开销对比
+    python benchmark.py --startup                       # 命令行启动耗时和导入耗时排行
+    python benchmark.py --render 20000                  # 整体拼接 vs 流式写出的吞吐和峰值内存
+"""
+
+import sys
+import json
+import time
+import subprocess
+import tempfile
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.table import Table
+
+from daily_digest.metrics import METRICS
+from daily_digest.models import Story
+from daily_digest.transport import Cassette, use_transport, MODE_RECORD, MODE_STUB, MODE_LIVE
+from daily_digest.stubserver import StubServer, synthetic_cassette
+
+from fetch_digest import load_config, create_generator, fetch_hacker_news, fetch_product_hunt, fetch_newsletters
+
+
+console = Console()
+
+STAGES = ("hacker_news", "product_hunt", "newsletters", "generate")
+
+
+def run_once(config: dict, date: datetime) -> dict:
+    """完整跑一轮抓取和生成，返回本轮的阶段耗时和请求统计"""
+    METRICS.reset()
+    data = {}
+    errors = []
+
+    begin = time.perf_counter()
+    for stage, fetch in (
+        ("hacker_news", fetch_hacker_news),
+        ("product_hunt", fetch_product_hunt),
+        ("newsletters", fetch_newsletters),
+    ):
+        try:
+            with METRICS.span(stage):
+                data[stage] = fetch(config)
+        except Exception as e:
+            data[stage] = []
+            errors.append(f"{stage}: {e}")
+
+    with METRICS.span("generate"):
+        create_generator(config).generate(
+            hn_stories=data["hacker_news"],
+            ph_posts=data["product_hunt"],
+            newsletters=data["newsletters"],
+            date=date,
+        )
+    stages = {"total": time.perf_counter() - begin, **METRICS.stage_durations()}
+
+    requests_total = 0
+    statuses = {}
+    for (name, labels), value in METRICS.counters.items():
+        if name == "http_requests_total":
+            status = dict(labels).get("status", "")
+            statuses[status] = statuses.get(status, 0) + value
+            requests_total += value
+
+    return {
+        "stages": stages,
+        "requests": int(requests_total),
+        "statuses": statuses,
+        "items": {stage: len(data[stage]) for stage in data},
+        "errors": errors,
+    }
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(runs: list) -> dict:
+    """汇总多轮结果：每个阶段的中位数、p95、最小、最大耗时（秒）"""
+    summary = {}
+    for stage in ("total",) + STAGES:
+        values = [run["stages"].get(stage, 0.0) for run in runs]
+        summary[stage] = {
+            "median": statistics.median(values),
+            "p95": _percentile(values, 95),
+            "min": min(values),
+            "max": max(values),
+        }
+    return summary
+
+
+def _measure(build) -> tuple:
+    """返回 (结果, 分配的字节数, 构建耗时)"""
+    tracemalloc.start()
+    begin = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - begin
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def memory_benchmark(count: int) -> dict:
+    """对比 count 条 story 用 dict 和 Story 表示时的内存、排序和字段访问耗时"""
+    def items():
+        for i in range(count):
+            yield {
+                "id": 40_000_000 + i,
+                "type": "story",
+                "title": f"Story {i}",
+                "url": f"https://example.com/{i}",
+                "score": (i * 7919) % 1000,
+                "descendants": i % 300,
+                "by": "bench",
+                "time": 1_700_000_000 + i,
+            }
+
+    def as_dict(item):
+        # 改用 Story 之前 HackerNewsAPI._format_item 输出的结构
+        return {
+            "id": item.get("id"),
+            "title": item.get("title", ""),
+            "url": item.get("url", f"https://news.ycombinator.com/item?id={item.get('id')}"),
+            "hn_url": f"https://news.ycombinator.com/item?id={item.get('id')}",
+            "score": item.get("score", 0),
+            "comments": item.get("descendants", 0),
+            "author": item.get("by", ""),
+            "time": item.get("time", 0),
+        }
+
+    results = {}
+    for kind, build, access in (
+        ("dict", lambda: [as_dict(item) for item in items()],
+         lambda rows: sum(row.get("score", 0) + row.get("comments", 0) for row in rows)),
+        ("Story", lambda: [Story.from_item(item) for item in items()],
+         lambda rows: sum(row.score + row.comments for row in rows)),
+    ):
+        rows, size, build_time = _measure(build)
+
+        begin = time.perf_counter()
+        if kind == "dict":
+            sorted(rows, key=lambda row: row.get("score", 0), reverse=True)
+        else:
+            sorted(rows, key=lambda row: row.score, reverse=True)
+        sort_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        access(rows)
+        access_time = time.perf_counter() - begin
+
+        results[kind] = {
+            "bytes": size,
+            "bytes_per_item": size / count,
+            "build": build_time,
+            "sort": sort_time,
+            "access": access_time,
+        }
+        del rows
+
+    return results
+
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# 需要快速启动的命令（Obsidian shell hook 等场景）
+STARTUP_COMMANDS = {
+    "python (baseline)": ["-c", "pass"],
+    "process_marks -q --stats": [str(SCRIPTS_DIR / "process_marks.py"), "-q", "--stats"],
+    "process_marks --stats": [str(SCRIPTS_DIR / "process_marks.py"), "--stats"],
+    "fetch_digest --help": [str(SCRIPTS_DIR / "fetch_digest.py"), "--help"],
+}
+
+
+def import_profile(argv: list, top: int = 10, exclude: frozenset = frozenset()) -> List[tuple]:
+    """用 python -X importtime 运行命令，返回累计导入耗时最高的顶层模块 [(模块, 毫秒)]"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        capture_output=True, text=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # 只看顶层导入（缩进表示被谁导入）
+        if not name.startswith("  ") and name.strip() not in exclude:
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:top]
+
+
+def startup_benchmark(config_path: Optional[Path], runs: int) -> Dict[str, Dict]:
+    """多次运行各快速命令，统计墙钟时间（毫秒）和导入耗时排行"""
+    # 解释器自身启动时导入的模块（site 等）不计入
+    baseline = frozenset(name for name, _ in import_profile(["-c", "pass"], top=1000))
+    results = {}
+    for name, argv in STARTUP_COMMANDS.items():
+        if config_path and argv[0] != "-c":
+            argv = argv + ["--config", str(config_path)]
+        times = []
+        for _ in range(runs):
+            begin = time.perf_counter()
+            subprocess.run([sys.executable, *argv], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append((time.perf_counter() - begin) * 1000)
+        results[name] = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "imports": import_profile(argv, exclude=baseline) if argv[0] != "-c" else [],
+        }
+    return results
+
+
+RENDER_MODES = ("buffered", "streaming")
+
+
+def _render_inputs(count: int) -> dict:
+    """count 条合成条目：80% HN，其余平均分给 10 个订阅源"""
+    from daily_digest.models import Article
+
+    hn_count = count * 4 // 5
+    stories = [
+        Story(
+            id=40_000_000 + i,
+            title=f"Synthetic story {i} about systems performance",
+            url=f"https://example.com/story/{i}",
+            score=(i * 7919) % 1000,
+            comments=i % 300,
+            time=1_700_000_000 + i,
+        )
+        for i in range(hn_count)
+    ]
+    per_feed = (count - hn_count) // 10
+    newsletters = [
+        {
+            "name": f"Feed {j}",
+            "url": f"https://feed{j}.example.com/rss",
+            "articles": [
+                Article(
+                    title=f"Feed {j} article {i}",
+                    url=f"https://feed{j}.example.com/{i}",
+                    summary="Synthetic newsletter summary. " * 8,
+                    published="2025-01-15T08:00:00",
+                )
+                for i in range(per_feed)
+            ],
+        }
+        for j in range(10)
+    ]
+    return {"hn_stories": stories, "newsletters": newsletters}
+
+
+def render_once(count: int, mode: str) -> dict:
+    """在当前进程中生成一次 count 条的摘要（四种格式），返回耗时、输出大小和峰值 RSS 增量
+
+    buffered 为改用流式写出之前的做法：渲染为完整字符串后经写前日志写入。
+    峰值 RSS 是进程级的，所以每种方式在单独的子进程中运行。
+    """
+    import resource
+    from daily_digest.generator import DigestGenerator
+    from daily_digest.journal import locked_journal
+    from daily_digest.render import FORMAT_MARKDOWN, build_digest, render
+
+    data = _render_inputs(count)
+    date = datetime(2025, 1, 15)
+    with tempfile.TemporaryDirectory() as vault:
+        generator = DigestGenerator(vault_path=vault, formats=["html", "json_feed", "rss"])
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        begin = time.perf_counter()
+        if mode == "streaming":
+            generator.generate(date=date, **data)
+        else:
+            digest = build_digest(date_str="2025-01-15", ph_posts=[], **data)
+            file_path = generator.layout.path_for(date)
+            outputs = render(digest, generator._renderers(file_path))
+            with locked_journal(generator.digest_dir) as journal:
+                journal.stage(file_path, outputs.pop(FORMAT_MARKDOWN))
+                for fmt, content in outputs.items():
+                    journal.stage(generator.get_export_path("2025-01-15", fmt), content)
+        elapsed = time.perf_counter() - begin
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        size = sum(path.stat().st_size for path in Path(vault).rglob("2025-01-15.*"))
+
+    # Linux 上 ru_maxrss 单位为 KiB，macOS 上为字节
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "items": count,
+        "seconds": elapsed,
+        "items_per_second": count / elapsed,
+        "output_bytes": size,
+        "peak_rss_growth": (peak - base) * scale,
+    }
+
+
+def render_benchmark(count: int, runs: int) -> Dict[str, Dict]:
+    """每种方式跑 runs 次（各自独立子进程），取耗时中位数和最大 RSS 增量"""
+    results = {}
+    for mode in RENDER_MODES:
+        samples = []
+        for _ in range(runs):
+            proc = subprocess.run(
+                [sys.executable, __file__, "--render", str(count), "--render-mode", mode],
+                capture_output=True, text=True, check=True,
+            )
+            samples.append(json.loads(proc.stdout))
+        seconds = statistics.median(sample["seconds"] for sample in samples)
+        results[mode] = {
+            "seconds": seconds,
+            "items_per_second": count / seconds,
+            "output_bytes": samples[0]["output_bytes"],
+            "peak_rss_growth": max(sample["peak_rss_growth"] for sample in samples),
+        }
+    return results
+
+
+def record(config: dict, path: Path) -> None:
+    """访问真实服务跑一轮，把所有响应录制到 cassette"""
+    cassette = Cassette(path)
+    use_transport(MODE_RECORD, cassette)
+    try:
+        with tempfile.TemporaryDirectory() as vault:
+            result = run_once({**config, "vault_path": vault}, datetime.now())
+    finally:
+        use_transport(MODE_LIVE)
+    cassette.save()
+
+    console.print(f"[green]✓ 已录制 {len(cassette.entries)} 个响应到 {path}[/green]")
+    for error in result["errors"]:
+        console.print(f"[yellow]  {error}[/yellow]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线测量摘要流程的性能")
+    parser.add_argument("--config", type=str, help="配置文件路径")
+    parser.add_argument("--cassette", type=str, help="回放录制的响应（默认使用合成数据）")
+    parser.add_argument("--record", type=str, metavar="PATH", help="访问真实服务，把响应录制到 PATH 后退出")
+    parser.add_argument("--runs", type=int, default=3, help="运行轮数 (默认: 3)")
+    parser.add_argument("--warmup", type=int, default=1, help="不计入结果的预热轮数 (默认: 1)")
+    parser.add_argument("--latency", type=float, default=0, help="每个响应注入的延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0, help="在固定延迟上随机增加 0~N 毫秒")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回 503 的响应比例")
+    parser.add_argument("--seed", type=int, default=0, help="延迟和错误注入的随机数种子")
+    parser.add_argument("--date", type=str, help="摘要日期 (YYYY-MM-DD，默认: 今天)")
+    parser.add_argument("--json", type=str, metavar="PATH", help="结果另存为 JSON")
+    parser.add_argument("--memory", type=int, metavar="N", help="对比 N 条条目在不同模型下的内存开销后退出")
+    parser.add_argument("--startup", action="store_true", help="测量命令行启动耗时和导入耗时后退出")
+    parser.add_argument("--render", type=int, metavar="N", help="对比 N 条条目整体拼接与流式写出的渲染开销后退出")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.startup:
+        results = startup_benchmark(Path(args.config) if args.config else None, max(args.runs, 5))
+        baseline = results["python (baseline)"]["median"]
+        table = Table(title="命令行启动耗时 (毫秒)")
+        table.add_column("命令")
+        for column in ("中位数", "最小", "超出基准"):
+            table.add_column(column, justify="right")
+        table.add_column("最慢的导入")
+        for name, values in results.items():
+            table.add_row(
+                name,
+                f"{values['median']:.0f}",
+                f"{values['min']:.0f}",
+                f"{values['median'] - baseline:.0f}",
+                ", ".join(f"{module} {ms:.0f}" for module, ms in values["imports"][:4]),
+            )
+        console.print(table)
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        return
+
+    if args.memory:
+        results = memory_benchmark(args.memory)
+        table = Table(title=f"{args.memory:,} 条 story 的条目模型开销")
+        table.add_column("模型")
+        for column in ("内存", "字节/条", "构建 ms", "排序 ms", "访问 ms"):
+            table.add_column(column, justify="right")
+        for kind, values in results.items():
+            table.add_row(
+                kind,
+                f"{values['bytes'] / 1024 / 1024:.1f} MiB",
+                f"{values['bytes_per_item']:.0f}",
+                f"{values['build'] * 1000:.1f}",
+                f"{values['sort'] * 1000:.1f}",
+                f"{values['access'] * 1000:.1f}",
+            )
+        console.print(table)
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        return
+
+    if args.render and args.render_mode:
+        print(json.dumps(render_once(args.render, args.render_mode)))
+        return
+
+    if args.render:
+        results = render_benchmark(args.render, args.runs)
+        table = Table(title=f"渲染 {args.render:,} 条到 4 种格式（{args.runs} 轮中位数）")
+        table.add_column("方式")
+        for column in ("耗时", "条/秒", "输出大小", "峰值 RSS 增量"):
+            table.add_column(column, justify="right")
+        for mode, values in results.items():
+            table.add_row(
+                mode,
+                f"{values['seconds'] * 1000:.0f} ms",
+                f"{values['items_per_second']:,.0f}",
+                f"{values['output_bytes'] / 1024 / 1024:.1f} MiB",
+                f"{values['peak_rss_growth'] / 1024 / 1024:.1f} MiB",
+            )
+        console.print(table)
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        return
+
+    config_path = Path(args.config) if args.config else None
+    config = load_config(config_path)
+
+    if args.record:
+        record(config, Path(args.record))
+        return
+
+    if args.cassette:
+        cassette = Cassette(Path(args.cassette))
+        if not cassette.entries:
+            console.print(f"[red]{args.cassette} 中没有录制的响应[/red]")
+            sys.exit(1)
+        source = args.cassette
+    else:
+        cassette = synthetic_cassette(config)
+        source = "合成数据"
+
+    date = datetime.strptime(args.date, "%Y-%m-%d") if args.date else datetime.now()
+    server = StubServer(
+        cassette,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    console.print(
+        f"[bold]基准测试[/bold] {source}: {len(cassette.entries)} 个响应，"
+        f"延迟 {args.latency:g}ms ±{args.jitter:g}ms，错误率 {args.error_rate:g}"
+    )
+
+    runs = []
+    with server, tempfile.TemporaryDirectory() as vault:
+        use_transport(MODE_STUB, stub_url=server.url)
+        bench_config = {**config, "vault_path": vault}
+        try:
+            for index in range(args.warmup + args.runs):
+                result = run_once(bench_config, date)
+                warmup = index < args.warmup
+                console.print(
+                    f"  {'预热' if warmup else f'第 {index - args.warmup + 1} 轮'}: "
+                    f"{result['stages']['total'] * 1000:.1f}ms，{result['requests']} 个请求"
+                    + (f"，[yellow]{len(result['errors'])} 个错误[/yellow]" if result["errors"] else "")
+                )
+                if not warmup:
+                    runs.append(result)
+        finally:
+            use_transport(MODE_LIVE)
+
+    if not runs:
+        return
+
+    summary = summarize(runs)
+    table = Table(title=f"各阶段耗时，共 {len(runs)} 轮 (毫秒)")
+    table.add_column("阶段")
+    for column in ("中位数", "p95", "最小", "最大"):
+        table.add_column(column, justify="right")
+    for stage, values in summary.items():
+        table.add_row(stage, *(f"{values[key] * 1000:.1f}" for key in ("median", "p95", "min", "max")))
+    console.print(table)
+
+    last = runs[-1]
+    statuses = ", ".join(f"{status}: {count:g}" for status, count in sorted(last["statuses"].items()))
+    console.print(f"每轮请求数: {last['requests']} ({statuses})")
+    console.print("条目数: " + ", ".join(f"{stage} {count}" for stage, count in last["items"].items()))
+    if server.stats["missing"]:
+        console.print(f"[yellow]{server.stats['missing']} 个请求未录制[/yellow]")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "source": source,
+            "latency_ms": args.latency,
+            "jitter_ms": args.jitter,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "summary": summary,
+            "runs": runs,
+            "stub": server.stats,
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        console.print(f"[green]✓ 结果已写入 {args.json}[/green]")
+
+
+if __name__ == "__main__":
+    main()
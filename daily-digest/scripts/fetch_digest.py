@@ -6,26 +6,47 @@
     python fetch_digest.py                    # 生成今日摘要
     python fetch_digest.py --date 2025-01-20  # 指定日期
     python fetch_digest.py --no-notify        # 不发送通知
+    python fetch_digest.py --daemon           # 常驻，按 notification.time 定时生成
+    python fetch_digest.py --refresh          # 只更新今日摘要中 HN 的分数/评论数/星级
+    python fetch_digest.py --sample-velocity  # 采样一次 HN 候选条目的分数（供 cron 定期运行）
+    python fetch_digest.py --from 2025-01-01 --to 2025-01-31  # 回填历史摘要
+    python fetch_digest.py --profiles alice.yaml bob.yaml     # 多人共享一次抓取
+    python fetch_digest.py --profiles team/*.yaml --mail      # 并把各自的摘要发邮件
 """
 
 import sys
 import argparse
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING
 
 # 添加父目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import yaml
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from daily_digest.config import load_yaml
+from daily_digest.metrics import METRICS
 
-from daily_digest.sources import HackerNewsAPI, ProductHuntAPI, NewsletterFetcher
-from daily_digest.generator import DigestGenerator
-from daily_digest.notifier import send_daily_notification
+if TYPE_CHECKING:
+    # 生成器（渲染、sqlite3）和通知在实际运行时才导入，--help 等不必加载
+    from daily_digest.generator import DigestGenerator
+    from daily_digest.sources import HackerNewsAPI, ProductHuntAPI, NewsletterFetcher
+    from daily_digest.velocity import VelocityStore
 
 
-console = Console()
+class _LazyConsole:
+    """首次输出时才导入 rich"""
+    
+    _console = None
+    
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
 
 
 def load_config(config_path: Path = None) -> dict:
@@ -40,6 +61,7 @@ def load_config(config_path: Path = None) -> dict:
             "vault_path": "~/Obsidian/MyVault",
             "digest_dir": "Daily Digest",
             "archive_dir": "Daily Digest/Archive",
+            "digest_layout": "flat",
             "sources": {
                 "hacker_news": {"enabled": True, "limit": 20, "categories": ["top"]},
                 "product_hunt": {"enabled": True, "limit": 10},
@@ -48,12 +70,80 @@ def load_config(config_path: Path = None) -> dict:
             "notification": {"enabled": True, "method": "system"},
         }
     
-    with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return load_yaml(config_path)
+
+
+def create_generator(config: dict) -> "DigestGenerator":
+    """根据配置创建生成器"""
+    from daily_digest.generator import DigestGenerator
+    
+    return DigestGenerator(
+        vault_path=config.get("vault_path", "~/Obsidian/MyVault"),
+        digest_dir=config.get("digest_dir", "Daily Digest"),
+        layout=config.get("digest_layout", "flat"),
+        formats=config.get("exports", {}).get("formats", []),
+        base_url=config.get("exports", {}).get("base_url", ""),
+    )
+
+
+def record_source(source: str, items: int, ok: bool) -> None:
+    """记录数据源的条目数和是否抓取成功"""
+    METRICS.set("items", items, source=source)
+    METRICS.set("source_ok", int(ok), source=source)
+
+
+def write_metrics(config: dict, success: bool = True, date: str = "", **extra) -> None:
+    """按 metrics 配置写出 JSON 运行报告和 Prometheus textfile（路径中的 {date} 会被替换）"""
+    metrics_config = config.get("metrics", {})
+    json_path = metrics_config.get("json")
+    prometheus_path = metrics_config.get("prometheus")
+    if not (json_path or prometheus_path):
+        return
+    
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        METRICS.write(
+            json_path=json_path.format(date=date) if json_path else None,
+            prometheus_path=prometheus_path.format(date=date) if prometheus_path else None,
+            success=success,
+            date=date,
+            **extra,
+        )
+    except OSError as e:
+        console.print(f"[yellow]⚠ 指标写入失败: {e}[/yellow]")
+
+
+def open_velocity_store(config: dict, generator: "DigestGenerator"):
+    """按配置打开分数采样存储（未启用时返回 None）"""
+    velocity_config = config.get("velocity", {})
+    if not velocity_config.get("enabled", False):
+        return None
+    
+    from daily_digest.velocity import VelocityStore, VELOCITY_DIR
+    
+    return VelocityStore(
+        generator.digest_dir / VELOCITY_DIR,
+        retention_days=velocity_config.get("retention_days", 3),
+        max_bytes=int(velocity_config.get("max_mb", 16) * 1024 * 1024),
+    )
+
+
+def create_sampler(config: dict, store):
+    """创建 HN 候选条目采样器（使用不带缓存的独立客户端）"""
+    from daily_digest.sources.hackernews import HackerNewsAPI
+    from daily_digest.velocity import VelocitySampler
+    
+    velocity_config = config.get("velocity", {})
+    return VelocitySampler(
+        HackerNewsAPI(),
+        store,
+        categories=velocity_config.get("categories", ["top", "new"]),
+        pool_size=velocity_config.get("pool_size", 100),
+    )
 
 
-def fetch_hacker_news(config: dict) -> list:
-    """抓取 Hacker News"""
+def fetch_hacker_news(config: dict, hn: "HackerNewsAPI" = None, velocity: "VelocityStore" = None) -> list:
+    """抓取 Hacker News（提供采样存储时按分数 + 上升速度排序）"""
     hn_config = config.get("sources", {}).get("hacker_news", {})
     
     if not hn_config.get("enabled", True):
@@ -62,7 +152,9 @@ def fetch_hacker_news(config: dict) -> list:
     limit = hn_config.get("limit", 20)
     categories = hn_config.get("categories", ["top"])
     
-    hn = HackerNewsAPI()
+    if hn is None:
+        from daily_digest.sources.hackernews import HackerNewsAPI
+        hn = HackerNewsAPI()
     all_stories = []
     
     for category in categories:
@@ -72,15 +164,22 @@ def fetch_hacker_news(config: dict) -> list:
     # 去重并按 score 排序
     seen = set()
     unique_stories = []
-    for s in sorted(all_stories, key=lambda x: x.get("score", 0), reverse=True):
-        if s["id"] not in seen:
-            seen.add(s["id"])
+    for s in sorted(all_stories, key=lambda x: x.score, reverse=True):
+        if s.id not in seen:
+            seen.add(s.id)
             unique_stories.append(s)
     
+    if velocity is not None:
+        from daily_digest.velocity import annotate
+        
+        annotate(unique_stories, velocity)
+        weight = config.get("velocity", {}).get("rank_weight", 1.0)
+        unique_stories.sort(key=lambda s: s.score + weight * s.velocity, reverse=True)
+    
     return unique_stories[:limit]
 
 
-def fetch_product_hunt(config: dict) -> list:
+def fetch_product_hunt(config: dict, ph: "ProductHuntAPI" = None) -> list:
     """抓取 Product Hunt"""
     ph_config = config.get("sources", {}).get("product_hunt", {})
     
@@ -90,11 +189,13 @@ def fetch_product_hunt(config: dict) -> list:
     limit = ph_config.get("limit", 10)
     token = ph_config.get("token")  # 可选
     
-    ph = ProductHuntAPI(token=token)
+    if ph is None:
+        from daily_digest.sources.producthunt import ProductHuntAPI
+        ph = ProductHuntAPI(token=token)
     return ph.get_today_posts(limit=limit)
 
 
-def fetch_newsletters(config: dict) -> list:
+def fetch_newsletters(config: dict, nf: "NewsletterFetcher" = None) -> list:
     """抓取 Newsletters"""
     nl_config = config.get("sources", {}).get("newsletters", {})
     
@@ -105,11 +206,296 @@ def fetch_newsletters(config: dict) -> list:
     if not feeds:
         return []
     
-    nf = NewsletterFetcher()
-    nf.add_feeds(feeds)
+    if nf is None:
+        from daily_digest.sources.newsletter import NewsletterFetcher
+        nf = NewsletterFetcher()
+        nf.add_feeds(feeds)
     return nf.fetch_all(days=1)
 
 
+def check_watchlist(config: dict, generator: "DigestGenerator", data: dict, notifier=None, watchlist=None) -> list:
+    """扫描抓取到的全部条目，命中关注词的新条目立即推送，返回新的命中
+    
+    notifier 为 None（--no-notify）时只输出到终端，不记入已提醒记录。
+    """
+    watch_config = config.get("watchlist", {})
+    if not watch_config.get("rules"):
+        return []
+    
+    from rich.markup import escape
+    from daily_digest.watchlist import ALERT_LOG, AlertLog, Watchlist, iter_items, send_alerts
+    
+    watchlist = watchlist or Watchlist.from_config(watch_config)
+    with METRICS.span("watchlist"):
+        hits = watchlist.scan(iter_items(data))
+        log = AlertLog(generator.digest_dir / ALERT_LOG, ttl=watch_config.get("dedupe_days", 7) * 86400)
+        fresh = log.fresh(hits)
+    
+    for hit in fresh:
+        console.print(f"[magenta]🔔 {escape(hit.rule)}[/magenta] [dim]{escape(hit.term)}[/dim] {escape(hit.title)}")
+    if notifier is not None:
+        if fresh:
+            send_alerts(fresh, notifier)
+        # 通知进入投递队列后再记为已提醒
+        log.save()
+    return fresh
+
+
+def run_daemon(config: dict, generator: "DigestGenerator", args) -> None:
+    """常驻模式：复用客户端连接池，提前预抓取，到点生成并推送"""
+    from daily_digest.notifier import create_notifier, send_daily_notification
+    from daily_digest.scheduler import DigestScheduler
+    from daily_digest.sources import HackerNewsAPI, ProductHuntAPI, NewsletterFetcher
+    
+    notify_config = config.get("notification", {})
+    daemon_config = config.get("daemon", {})
+    sources_config = config.get("sources", {})
+    
+    # 客户端在进程内常驻，HTTP 连接池和 item 缓存保持热状态
+    hn = HackerNewsAPI(cache_ttl=daemon_config.get("cache_ttl", 300))
+    ph = ProductHuntAPI(token=sources_config.get("product_hunt", {}).get("token"))
+    nf = NewsletterFetcher()
+    nf.add_feeds(sources_config.get("newsletters", {}).get("feeds", []))
+    
+    # 关注词自动机只编译一次
+    watchlist = None
+    if config.get("watchlist", {}).get("rules"):
+        from daily_digest.watchlist import Watchlist
+        watchlist = Watchlist.from_config(config["watchlist"])
+    
+    def log(message: str):
+        console.print(f"[dim]{datetime.now():%H:%M:%S}[/dim] {message}")
+    
+    # 后台定期采样 HN 候选条目的分数，生成时按上升速度排序
+    velocity = open_velocity_store(config, generator)
+    sampler = None
+    if velocity is not None:
+        sampler = create_sampler(config, velocity)
+        sampler.start(
+            config["velocity"].get("interval_minutes", 10) * 60,
+            log=lambda message: log(f"[yellow]⚠ {message}[/yellow]"),
+        )
+    
+    def fetch() -> dict:
+        data = {"hn_stories": [], "ph_posts": [], "newsletters": []}
+        for key, source, name, func, client in [
+            ("hn_stories", "hacker_news", "Hacker News", partial(fetch_hacker_news, velocity=velocity), hn),
+            ("ph_posts", "product_hunt", "Product Hunt", fetch_product_hunt, ph),
+            ("newsletters", "newsletters", "Newsletters", fetch_newsletters, nf),
+        ]:
+            try:
+                with METRICS.span(source):
+                    data[key] = func(config, client)
+                record_source(source, len(data[key]), True)
+            except Exception as e:
+                record_source(source, 0, False)
+                log(f"[red]✗ {name}: {e}[/red]")
+        # 关注词提醒在抓取后立即发出，不等到点生成
+        if watchlist is not None:
+            alert_notifier = notifier if notify_config.get("enabled", True) and not args.no_notify else None
+            check_watchlist(config, generator, data, alert_notifier, watchlist)
+        return data
+    
+    # 常驻进程的后台投递队列，推送失败会在后台重试，不影响下一轮调度
+    notifier = create_notifier(notify_config)
+    
+    def publish(data: dict, run_at: datetime):
+        with METRICS.span("generate"):
+            file_path = generator.generate(date=run_at, **data)
+        log(f"[green]✓ 摘要已保存到[/green] {file_path}")
+        if args.weekly:
+            generator.generate_weekly_index(run_at)
+        if notify_config.get("enabled", True) and not args.no_notify:
+            send_daily_notification(file_path, notifier=notifier, background=True)
+        # 每轮写出本轮指标后重新计数
+        write_metrics(config, success=True, date=run_at.strftime("%Y-%m-%d"))
+        METRICS.reset()
+    
+    scheduler = DigestScheduler(
+        run_time=notify_config.get("time", "09:00"),
+        fetch=fetch,
+        publish=publish,
+        prefetch_lead=timedelta(minutes=daemon_config.get("prefetch_minutes", 10)),
+        max_age=timedelta(minutes=daemon_config.get("max_age_minutes", 30)),
+        log=log,
+    )
+    
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        console.print("\n[dim]守护进程已停止[/dim]")
+    finally:
+        if sampler is not None:
+            sampler.stop()
+
+
+def run_refresh(generator: "DigestGenerator", target_date: datetime) -> None:
+    """重新获取已生成摘要中 HN 条目的分数和评论数"""
+    from daily_digest.refresh import refresh_digest
+    from daily_digest.sources.hackernews import HackerNewsAPI
+    
+    file_path = generator.get_digest_path(target_date)
+    if not file_path.exists():
+        console.print(f"[yellow]⚠ 摘要不存在: {file_path}[/yellow]")
+        return
+    
+    with console.status("刷新 Hacker News 分数..."):
+        result = refresh_digest(file_path, generator.digest_dir, HackerNewsAPI())
+    console.print(
+        f"[green]✓ 已刷新[/green] {file_path.name}: "
+        f"{result['items']} 条 HN 条目, 获取 {result['fetched']} 条, 更新 {result['updated']} 条"
+    )
+
+
+def run_backfill(config: dict, generator: "DigestGenerator", start: datetime, end: datetime, concurrency: int) -> dict:
+    """回填日期范围内的摘要及周汇总，返回 Backfill.run 的结果"""
+    from daily_digest.backfill import Backfill
+    
+    sources_config = config.get("sources", {})
+    hn_config = sources_config.get("hacker_news", {})
+    ph_config = sources_config.get("product_hunt", {})
+    nl_config = sources_config.get("newsletters", {})
+    
+    hn = ph = nf = None
+    if hn_config.get("enabled", True):
+        from daily_digest.sources.hackernews import HackerNewsAPI
+        hn = HackerNewsAPI(cache_ttl=3600)
+    if ph_config.get("enabled", True):
+        from daily_digest.sources.producthunt import ProductHuntAPI
+        ph = ProductHuntAPI(token=ph_config.get("token"))
+    if nl_config.get("enabled", False) and nl_config.get("feeds"):
+        from daily_digest.sources.newsletter import NewsletterFetcher
+        nf = NewsletterFetcher()
+        nf.add_feeds(nl_config["feeds"])
+    
+    backfill = Backfill(
+        generator,
+        hn=hn,
+        ph=ph,
+        nf=nf,
+        hn_limit=hn_config.get("limit", 20),
+        hn_categories=hn_config.get("categories", ["top"]),
+        ph_limit=ph_config.get("limit", 10),
+        max_workers=concurrency,
+    )
+    
+    def on_day(day: datetime, path, error):
+        if error:
+            console.print(f"[red]✗ {day:%Y-%m-%d}: {error}[/red]")
+        else:
+            console.print(f"[green]✓ {day:%Y-%m-%d}[/green] {path}")
+    
+    with METRICS.span("backfill", days=(end - start).days + 1):
+        result = backfill.run(start, end, on_day=on_day)
+    write_metrics(config, success=not result["errors"], date=end.strftime("%Y-%m-%d"), mode="backfill")
+    
+    console.print(
+        f"\n[bold green]✅ 已回填 {len(result['days'])} 天[/bold green]，"
+        f"周汇总 {len(result['weekly'])} 份"
+    )
+    if result["errors"]:
+        console.print(f"[red]失败 {len(result['errors'])} 天[/red]")
+    return result
+
+
+def send_profile_mails(profiles: dict, results: dict, target_date: datetime) -> None:
+    """把每个配置的摘要（HTML + Markdown 正文）发给其 email.to，所有邮件复用 SMTP 连接"""
+    from rich.table import Table
+    from daily_digest.mailer import BulkMailer
+    from daily_digest.render import HtmlEmailRenderer, build_digest, render
+    
+    date_str = target_date.strftime("%Y-%m-%d")
+    mails = []
+    for name, result in results.items():
+        recipients = profiles[name].get("email", {}).get("to") or []
+        if "error" in result or not recipients:
+            continue
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        html = render(build_digest(date_str, **result["data"]), [HtmlEmailRenderer()])["html"]
+        text = result["path"].read_text(encoding="utf-8")
+        for to in recipients:
+            mails.append({
+                "to": to,
+                "name": name,
+                "subject": f"📰 每日摘要 - {date_str}",
+                "text": text,
+                "html": html,
+            })
+    
+    if not mails:
+        return
+    
+    mailer = BulkMailer.from_env(pool_size=2)
+    table = Table(title="📧 邮件发送结果")
+    table.add_column("收件人")
+    table.add_column("状态")
+    table.add_column("尝试次数", justify="right")
+    for result in mailer.send_all(mails):
+        status = "[green]✓[/green]" if result["ok"] else f"[red]✗ {result['code'] or ''} {result['error']}[/red]"
+        table.add_row(result["to"], status, str(result["attempts"]))
+    console.print(table)
+
+
+def run_profiles(paths: list, args, target_date: datetime) -> None:
+    """多个配置共享一次抓取，分别筛选并渲染到各自的 vault"""
+    from daily_digest.notifier import create_notifier, send_daily_notification
+    from daily_digest.profiles import ProfileRunner
+    
+    # 以配置中的 name 为名称，未设置时用命令行给出的路径（每人一个 config.yaml 时不会重名）
+    profiles = {}
+    generators = {}
+    sources = {}
+    for path in paths:
+        resolved = Path(path).resolve()
+        config = load_config(resolved)
+        name = str(config.get("name") or path)
+        if resolved in sources.values():
+            console.print(f"[red]✗ 配置文件重复: {path}[/red]")
+            sys.exit(1)
+        if name in profiles:
+            console.print(f"[red]✗ 配置名称重复: {name}（{sources[name]} 与 {resolved}），请在配置中设置不同的 name[/red]")
+            sys.exit(1)
+        sources[name] = resolved
+        profiles[name] = config
+        generators[name] = create_generator(config)
+    
+    runner = ProfileRunner(profiles, generators, max_workers=args.concurrency)
+    notifiers = {}
+    
+    def on_error(source: str, error: Exception):
+        console.print(f"[red]✗ {source}: {error}[/red]")
+    
+    def on_profile(name: str, result: dict):
+        if "error" in result:
+            console.print(f"[red]✗ {name}: {result['error']}[/red]")
+            return
+        console.print(f"[green]✓ {name}[/green] {result['path']}")
+        notify_config = profiles[name].get("notification", {})
+        if notify_config.get("enabled", True) and not args.no_notify:
+            notifiers[name] = create_notifier(notify_config)
+            send_daily_notification(result["path"], notifier=notifiers[name], background=True)
+        if args.weekly:
+            generators[name].generate_weekly_index(target_date)
+    
+    with METRICS.span("profiles", profiles=len(profiles)):
+        results = runner.run(date=target_date, on_profile=on_profile, on_error=on_error)
+    ok = sum(1 for result in results.values() if "error" not in result)
+    console.print(f"\n[bold green]✅ 已为 {ok}/{len(results)} 个配置生成摘要[/bold green]\n")
+    
+    if args.mail:
+        send_profile_mails(profiles, results, target_date)
+    
+    for name, notifier in notifiers.items():
+        flush_timeout = profiles[name].get("notification", {}).get("flush_timeout", 60)
+        if not notifier.flush(timeout=flush_timeout):
+            console.print(f"[yellow]⚠ {name}: 部分通知未能送达[/yellow]")
+    
+    success = all("error" not in result for result in results.values())
+    for config in profiles.values():
+        write_metrics(config, success=success, date=target_date.strftime("%Y-%m-%d"), mode="profiles")
+
+
 def main():
     parser = argparse.ArgumentParser(description="生成每日信息摘要")
     parser.add_argument("--date", type=str, help="指定日期 (YYYY-MM-DD)")
@@ -117,8 +503,19 @@ def main():
     parser.add_argument("--no-notify", action="store_true", help="不发送通知")
     parser.add_argument("--open", action="store_true", help="生成后立即打开")
     parser.add_argument("--weekly", action="store_true", help="同时生成周汇总")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行，按 notification.time 定时生成")
+    parser.add_argument("--from", dest="from_date", type=str, help="回填起始日期 (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", type=str, help="回填结束日期 (YYYY-MM-DD)，默认今天")
+    parser.add_argument("--concurrency", type=int, default=4, help="回填时同时生成的天数 / 多配置时同时渲染的配置数")
+    parser.add_argument("--profiles", nargs="+", metavar="CONFIG", help="多个配置文件，数据源只抓取一次")
+    parser.add_argument("--mail", action="store_true", help="多配置时把摘要发送到各配置的 email.to")
+    parser.add_argument("--refresh", action="store_true", help="只刷新已生成摘要中 HN 条目的分数、评论数和星级")
+    parser.add_argument("--sample-velocity", action="store_true", help="采样一次 HN 候选条目的分数和评论数后退出")
     args = parser.parse_args()
     
+    if args.to_date and not (args.from_date or args.date):
+        parser.error("--to 需要与 --from（或 --date）一起使用")
+    
     # 解析日期
     if args.date:
         target_date = datetime.strptime(args.date, "%Y-%m-%d")
@@ -129,15 +526,49 @@ def main():
     
     console.print(f"\n[bold blue]📰 Daily Digest - {date_str}[/bold blue]\n")
     
+    if args.profiles:
+        run_profiles(args.profiles, args, target_date)
+        return
+    
     # 加载配置
     config_path = Path(args.config) if args.config else None
     config = load_config(config_path)
     
     # 创建生成器
-    generator = DigestGenerator(
-        vault_path=config.get("vault_path", "~/Obsidian/MyVault"),
-        digest_dir=config.get("digest_dir", "Daily Digest"),
-    )
+    generator = create_generator(config)
+    
+    if args.daemon:
+        run_daemon(config, generator, args)
+        return
+    
+    if args.refresh:
+        run_refresh(generator, target_date)
+        return
+    
+    velocity = open_velocity_store(config, generator)
+    if args.sample_velocity:
+        if velocity is None:
+            console.print("[yellow]⚠ 未启用 velocity，请在配置中设置 velocity.enabled: true[/yellow]")
+            return
+        count = create_sampler(config, velocity).sample_once()
+        usage = velocity.usage()
+        console.print(
+            f"[green]✓ 已采样 {count} 条[/green] "
+            f"[dim](共 {usage['samples']} 次采样, {usage['segments']} 个分段, {usage['bytes'] / 1024:.1f} KiB)[/dim]"
+        )
+        return
+    
+    # 指定了历史日期时按回填处理，抓取的是当天的数据而非今天的
+    if args.from_date or args.to_date or (args.date and target_date.date() != datetime.now().date()):
+        start = datetime.strptime(args.from_date, "%Y-%m-%d") if args.from_date else target_date
+        end = datetime.strptime(args.to_date, "%Y-%m-%d") if args.to_date else (
+            target_date if args.date else datetime.now()
+        )
+        run_backfill(config, generator, start, end, args.concurrency)
+        return
+    
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from daily_digest.notifier import create_notifier, send_daily_notification
     
     hn_stories = []
     ph_posts = []
@@ -151,62 +582,95 @@ def main():
         # 抓取 Hacker News
         task = progress.add_task("抓取 Hacker News...", total=None)
         try:
-            hn_stories = fetch_hacker_news(config)
+            with METRICS.span("hacker_news"):
+                hn_stories = fetch_hacker_news(config, velocity=velocity)
+            record_source("hacker_news", len(hn_stories), True)
             progress.update(task, description=f"[green]✓ Hacker News ({len(hn_stories)} 条)[/green]")
         except Exception as e:
+            record_source("hacker_news", 0, False)
             progress.update(task, description=f"[red]✗ Hacker News: {e}[/red]")
         progress.remove_task(task)
         
         # 抓取 Product Hunt
         task = progress.add_task("抓取 Product Hunt...", total=None)
         try:
-            ph_posts = fetch_product_hunt(config)
+            with METRICS.span("product_hunt"):
+                ph_posts = fetch_product_hunt(config)
+            record_source("product_hunt", len(ph_posts), True)
             progress.update(task, description=f"[green]✓ Product Hunt ({len(ph_posts)} 条)[/green]")
         except Exception as e:
+            record_source("product_hunt", 0, False)
             progress.update(task, description=f"[red]✗ Product Hunt: {e}[/red]")
         progress.remove_task(task)
         
         # 抓取 Newsletters
         task = progress.add_task("抓取 Newsletters...", total=None)
         try:
-            newsletters = fetch_newsletters(config)
+            with METRICS.span("newsletters"):
+                newsletters = fetch_newsletters(config)
             article_count = sum(len(f.get("articles", [])) for f in newsletters)
+            record_source("newsletters", article_count, True)
             progress.update(task, description=f"[green]✓ Newsletters ({article_count} 篇)[/green]")
         except Exception as e:
+            record_source("newsletters", 0, False)
             progress.update(task, description=f"[red]✗ Newsletters: {e}[/red]")
         progress.remove_task(task)
         
+        # 关注词提醒（抓取完立即发出）
+        notify_config = config.get("notification", {})
+        notifier = None
+        if notify_config.get("enabled", True) and not args.no_notify:
+            notifier = create_notifier(notify_config)
+        check_watchlist(
+            config,
+            generator,
+            {"hn_stories": hn_stories, "ph_posts": ph_posts, "newsletters": newsletters},
+            notifier,
+        )
+        
         # 生成文档
         task = progress.add_task("生成文档...", total=None)
-        file_path = generator.generate(
-            hn_stories=hn_stories,
-            ph_posts=ph_posts,
-            newsletters=newsletters,
-            date=target_date,
-        )
+        try:
+            with METRICS.span("generate"):
+                file_path = generator.generate(
+                    hn_stories=hn_stories,
+                    ph_posts=ph_posts,
+                    newsletters=newsletters,
+                    date=target_date,
+                )
+        except Exception:
+            write_metrics(config, success=False, date=date_str)
+            raise
         progress.update(task, description=f"[green]✓ 文档已生成[/green]")
         progress.remove_task(task)
     
     console.print(f"\n[bold green]✅ 摘要已保存到:[/bold green] {file_path}")
     
-    # 发送通知
-    notify_config = config.get("notification", {})
-    if notify_config.get("enabled", True) and not args.no_notify:
-        method = notify_config.get("method", "system")
-        send_daily_notification(file_path, method=method)
-        console.print("[dim]📬 通知已发送[/dim]")
+    # 发送通知（后台投递，不阻塞后续步骤）
+    if notifier:
+        with METRICS.span("notify"):
+            send_daily_notification(file_path, notifier=notifier, background=True)
+        console.print("[dim]📬 通知已在后台发送[/dim]")
     
     # 生成周汇总
     if args.weekly:
-        weekly_path = generator.generate_weekly_index(target_date)
+        with METRICS.span("weekly"):
+            weekly_path = generator.generate_weekly_index(target_date)
         console.print(f"[bold green]📅 周汇总已保存到:[/bold green] {weekly_path}")
     
     # 打开文件
     if args.open:
         from daily_digest.notifier import Notifier
-        notifier = Notifier()
-        notifier.open_in_obsidian(file_path)
+        Notifier().open_in_obsidian(file_path)
+    
+    # 退出前等待后台投递（含重试）结束
+    if notifier:
+        with METRICS.span("notify_flush"):
+            delivered = notifier.flush(timeout=notify_config.get("flush_timeout", 60))
+        if not delivered:
+            console.print("[yellow]⚠ 部分通知未能送达[/yellow]")
     
+    write_metrics(config, success=True, date=date_str)
     console.print()
 
 
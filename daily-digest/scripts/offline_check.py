@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+离线自检 - 通过本地桩服务器验证依赖外部服务的流程，失败时以非零状态退出
+
+使用方法:
+    python offline_check.py backfill                          # 合成数据回填 10 天，检查每日摘要和周汇总
+    python offline_check.py backfill --days 14 --concurrency 2
+    python offline_check.py backfill --cassette rec.json --from 2025-01-01 --to 2025-01-07
+    python offline_check.py mail                              # 桩 SMTP 限流 / 拒收，检查每个收件人的发送结果
+    python offline_check.py search                            # 在临时索引中检查中英文检索
+"""
+
+import sys
+import tempfile
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from daily_digest.backfill import date_range
+from daily_digest.generator import get_week_range
+from daily_digest.transport import Cassette, use_transport, MODE_STUB, MODE_LIVE
+from daily_digest.stubserver import StubServer, backfill_cassette
+from daily_digest.stubsmtp import StubSMTPServer
+from daily_digest.mailer import BulkMailer
+from daily_digest.search import ArchiveIndex
+
+from fetch_digest import load_config, create_generator, run_backfill
+
+
+console = Console()
+
+
+def check_backfill(config: dict, start: datetime, end: datetime, cassette_path: str = None, concurrency: int = 4) -> List[Tuple[str, bool, str]]:
+    """在临时 vault 中回填 [start, end]，返回 [(检查项, 是否通过, 说明)]"""
+    hn_config = config.get("sources", {}).get("hacker_news", {})
+    days = date_range(start, end)
+
+    expected = {}
+    if cassette_path:
+        cassette = Cassette(Path(cassette_path))
+    else:
+        cassette, expected = backfill_cassette(
+            days,
+            categories=hn_config.get("categories", ["top"]),
+            limit=hn_config.get("limit", 20),
+        )
+
+    checks = []
+    with StubServer(cassette) as server, tempfile.TemporaryDirectory() as vault:
+        use_transport(MODE_STUB, stub_url=server.url)
+        check_config = {
+            **config,
+            "vault_path": vault,
+            "sources": {
+                "hacker_news": {**hn_config, "enabled": True},
+                "product_hunt": {"enabled": True, "limit": 5, "token": "offline-check"},
+                "newsletters": {"enabled": False},
+            },
+            "metrics": {},
+        }
+        generator = create_generator(check_config)
+        try:
+            result = run_backfill(check_config, generator, start, end, concurrency)
+        finally:
+            use_transport(MODE_LIVE)
+
+        checks.append(("回填无错误", not result["errors"], ", ".join(sorted(result["errors"])) or f"{len(result['days'])} 天"))
+        checks.append(("请求都已录制", server.stats["missing"] == 0, f"{server.stats['missing']} 个未录制"))
+
+        # 每天都有摘要，且只包含当天的 HN 条目
+        for day in days:
+            date_str = day.strftime("%Y-%m-%d")
+            path = generator.layout.find(day)
+            if path is None:
+                checks.append((f"摘要 {date_str}", False, "文件不存在"))
+                continue
+            content = path.read_text(encoding="utf-8")
+            missing = [title for title in expected.get(date_str, []) if title not in content]
+            foreign = [
+                other for other, titles in expected.items()
+                if other != date_str and any(title in content for title in titles)
+            ]
+            ok = not missing and not foreign
+            detail = f"缺少 {len(missing)} 条" if missing else (f"混入 {', '.join(foreign)}" if foreign else path.name)
+            checks.append((f"摘要 {date_str}", ok, detail))
+
+        # 涉及的每一周都有周汇总（与 Backfill.plan 同序），并链接到范围内的每一天
+        weeks: Dict[datetime, List[str]] = {}
+        for day in days:
+            weeks.setdefault(get_week_range(day)[0], []).append(day.strftime("%Y-%m-%d"))
+        for (week_start, day_strs), path in zip(sorted(weeks.items()), result["weekly"]):
+            name = f"周汇总 {week_start:%Y-%m-%d}"
+            if not path.exists():
+                checks.append((name, False, "文件不存在"))
+                continue
+            content = path.read_text(encoding="utf-8")
+            unlinked = [day_str for day_str in day_strs if f"- [[{day_str}]]" not in content]
+            checks.append((name, not unlinked, f"未链接 {', '.join(unlinked)}" if unlinked else path.name))
+        if len(result["weekly"]) != len(weeks):
+            checks.append(("周汇总数量", False, f"{len(result['weekly'])} 份，应为 {len(weeks)} 份"))
+
+    return checks
+
+
+def check_mail(retries: int = 3) -> List[Tuple[str, bool, str]]:
+    """通过桩 SMTP 服务器批量发送，返回 [(检查项, 是否通过, 说明)]"""
+    # 收件人: (桩服务器前几次 RCPT 的错误码, 是否应发送成功, 最终状态码, 尝试次数)
+    cases = {
+        "ok@example.com": ([], True, 250, 1),
+        "slow@example.com": ([451, 451], True, 250, 3),
+        "busy@example.com": ([421], True, 250, 2),
+        "gone@example.com": ([], False, 550, 1),
+        "limit@example.com": ([451] * (retries + 1), False, 451, retries + 1),
+    }
+    throttle = {to: codes for to, (codes, *_) in cases.items() if codes}
+    mails = [{"to": to, "subject": "offline check", "text": f"hello {to}"} for to in cases]
+
+    checks = []
+    with StubSMTPServer(throttle=throttle, reject=["gone@example.com"]) as server:
+        mailer = BulkMailer(
+            server.host, server.port, sender="digest@example.com", starttls=False,
+            retries=retries, retry_delay=0.01, timeout=5,
+        )
+        for result in mailer.send_all(mails):
+            _, ok, code, attempts = cases[result["to"]]
+            actual = (result["ok"], result["code"], result["attempts"])
+            checks.append((
+                f"收件人 {result['to']}",
+                actual == (ok, code, attempts),
+                f"ok={actual[0]} code={actual[1]} attempts={actual[2]}（应为 ok={ok} code={code} attempts={attempts}）",
+            ))
+
+        delivered = sorted(to for message in server.messages for to in message["to"])
+        expected = sorted(to for to, (_, ok, *_) in cases.items() if ok)
+        checks.append(("每封邮件只投递一次", delivered == expected, ", ".join(delivered)))
+
+        # 服务器不支持 STARTTLS 属于永久错误，不应重试
+        result = BulkMailer(
+            server.host, server.port, sender="digest@example.com", starttls=True,
+            retries=retries, retry_delay=0.01, timeout=5,
+        ).send(mails[0])
+        checks.append((
+            "永久错误不重试",
+            not result["ok"] and result["attempts"] == 1,
+            f"attempts={result['attempts']} {result['error']}",
+        ))
+
+    return checks
+
+
+def check_search() -> List[Tuple[str, bool, str]]:
+    """在临时收藏索引中检索中英文关键词，返回 [(检查项, 是否通过, 说明)]"""
+    items = [
+        {"title": "如何用Rust编写高性能服务器", "url": "https://example.com/rust", "summary": "从零实现一个异步 HTTP 服务器", "source": "Hacker News"},
+        {"title": "Show HN: A tiny Python profiler", "url": "https://example.com/py", "summary": "采样分析器，开销很低", "source": "Hacker News"},
+        {"title": "产品发布：开源的笔记应用", "url": "https://example.com/notes", "summary": "支持 Markdown 和双向链接", "source": "Product Hunt"},
+    ]
+    # 查询: 应命中的链接（按相关度，只检查集合）
+    cases = {
+        "Rust": {"https://example.com/rust"},
+        "rust 性能": {"https://example.com/rust"},
+        "性能": {"https://example.com/rust"},
+        "服务器": {"https://example.com/rust"},
+        "如何用": {"https://example.com/rust"},
+        "开源 笔记": {"https://example.com/notes"},
+        "分析器": {"https://example.com/py"},
+        "profil": {"https://example.com/py"},
+        "markdown": {"https://example.com/notes"},
+        "性能 笔记": set(),
+    }
+
+    checks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ArchiveIndex(Path(tmp) / ".search.db")
+        index.add_items("2025-01-20", items)
+        for query, expected in cases.items():
+            results = index.search(query)
+            urls = {row["url"] for row in results}
+            checks.append((f"检索 {query}", urls == expected, f"{len(results)} 条命中"))
+        snippet = next(iter(index.search("异步")), {}).get("snippet", "")
+        checks.append(("摘要片段不含分词标记", snippet == "从零实现一个**异步** HTTP 服务器", snippet))
+        index.close()
+
+    return checks
+
+
+def report(title: str, checks: List[Tuple[str, bool, str]]) -> bool:
+    """输出检查结果，全部通过时返回 True"""
+    table = Table(title=title)
+    table.add_column("检查项")
+    table.add_column("结果")
+    table.add_column("说明")
+    for name, ok, detail in checks:
+        table.add_row(name, "[green]✓[/green]" if ok else "[red]✗[/red]", escape(detail))
+    console.print(table)
+    failed = sum(1 for _, ok, _ in checks if not ok)
+    if failed:
+        console.print(f"[red]✗ {failed}/{len(checks)} 项检查失败[/red]")
+    else:
+        console.print(f"[green]✓ {len(checks)} 项检查全部通过[/green]")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通过本地桩服务器离线自检")
+    parser.add_argument("--config", type=str, help="配置文件路径（只使用数据源设置，输出写入临时目录）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="回填日期范围并检查每日摘要和周汇总")
+    backfill_parser.add_argument("--cassette", type=str, help="回放录制的响应（默认使用合成数据）")
+    backfill_parser.add_argument("--from", dest="from_date", type=str, help="起始日期 (YYYY-MM-DD)")
+    backfill_parser.add_argument("--to", dest="to_date", type=str, help="结束日期 (YYYY-MM-DD)")
+    backfill_parser.add_argument("--days", type=int, default=10, help="未指定 --from 时回填截至昨天的天数 (默认: 10)")
+    backfill_parser.add_argument("--concurrency", type=int, default=4, help="同时回填的天数")
+
+    mail_parser = subparsers.add_parser("mail", help="通过桩 SMTP 服务器检查限流重试和拒收")
+    mail_parser.add_argument("--retries", type=int, default=3, help="限流后的重试次数 (默认: 3)")
+
+    subparsers.add_parser("search", help="在临时收藏索引中检查中英文检索")
+
+    args = parser.parse_args()
+    config = load_config(Path(args.config) if args.config else None)
+
+    if args.command == "backfill":
+        if args.cassette and not args.from_date:
+            parser.error("--cassette 需要用 --from/--to 指定录制时的日期范围")
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        end = datetime.strptime(args.to_date, "%Y-%m-%d") if args.to_date else today - timedelta(days=1)
+        start = datetime.strptime(args.from_date, "%Y-%m-%d") if args.from_date else end - timedelta(days=args.days - 1)
+        ok = report(
+            f"回填自检 {start:%Y-%m-%d} ~ {end:%Y-%m-%d}",
+            check_backfill(config, start, end, args.cassette, args.concurrency),
+        )
+    elif args.command == "mail":
+        ok = report("邮件发送自检", check_mail(args.retries))
+    elif args.command == "search":
+        ok = report("收藏检索自检", check_search())
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,15 @@
 使用方法:
     python process_marks.py              # 处理所有摘要文件
     python process_marks.py --stats      # 显示统计信息
+    python process_marks.py --trend month --since 2025-01-01   # 阅读趋势（按周/月汇总）
     python process_marks.py --cleanup    # 清理空文件
+    python process_marks.py --watch      # 持续监听，保存后立即处理
+    python process_marks.py --migrate    # 按 digest_layout 迁移已有摘要文件
+    python process_marks.py search rust --since 2025-01-01 --source "Hacker News"
+    python process_marks.py compact --days 30   # 压缩 30 天前的摘要和收藏
+    python process_marks.py check-links         # 检查并标注失效链接
+    python process_marks.py snapshot            # 为已有收藏补抓离线快照
+    python process_marks.py -q --file 2025-01-20.md   # 纯文本输出，适合 Obsidian shell hook
 """
 
 import sys
@@ -15,14 +23,24 @@ from pathlib import Path
 # 添加父目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import yaml
-from rich.console import Console
-from rich.table import Table
-
+from daily_digest.config import load_yaml
 from daily_digest.processor import MarkProcessor
+from daily_digest.layout import DATE_FILE_PATTERN
+
+
+class _LazyConsole:
+    """首次输出时才导入 rich（--quiet 模式下完全不加载）"""
+    
+    _console = None
+    
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
 
 
-console = Console()
+console = _LazyConsole()
 
 
 def load_config(config_path: Path = None) -> dict:
@@ -35,16 +53,22 @@ def load_config(config_path: Path = None) -> dict:
             "vault_path": "~/Obsidian/MyVault",
             "digest_dir": "Daily Digest",
             "archive_dir": "Daily Digest/Archive",
+            "digest_layout": "flat",
         }
     
-    with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return load_yaml(config_path)
 
 
-def show_stats(processor: MarkProcessor):
+def show_stats(processor: MarkProcessor, quiet: bool = False):
     """显示统计信息"""
     stats = processor.get_stats()
     
+    if quiet:
+        print(f"摘要文件数 {stats['total_files']}, 未读条目 {stats['unread_items']}, 已归档收藏 {stats['starred_items']}")
+        return
+    
+    from rich.table import Table
+    
     table = Table(title="📊 Daily Digest 统计")
     table.add_column("指标", style="cyan")
     table.add_column("数值", style="green")
@@ -56,14 +80,95 @@ def show_stats(processor: MarkProcessor):
     console.print(table)
 
 
-def process_all(processor: MarkProcessor):
+def _percent(value) -> str:
+    return f"{value:.0%}" if value is not None else "-"
+
+
+def _days(value) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def show_trend(processor: MarkProcessor, period: str = "week", since: str = None, quiet: bool = False):
+    """显示阅读趋势：按周期汇总、各来源阅读率和当前积压"""
+    store = processor.stats
+    rows = store.rollup(period, since=since)
+    sources = store.by_source(since=since)
+    backlog = store.backlog()
+    
+    if quiet:
+        for row in rows:
+            print(
+                f"{row['period']}: 生成 {row['generated']}, 已读 {row['read']}, 跳过 {row['skipped']}, "
+                f"收藏 {row['starred']}, 阅读率 {_percent(row['read_rate'])}"
+            )
+        print(f"积压 {backlog['pending']} 条, 最早 {backlog['oldest'] or '-'}, 平均 {_days(backlog['avg_age'])} 天")
+        return
+    
+    if not rows:
+        console.print("[dim]还没有统计数据（生成摘要和处理标记后开始记录）[/dim]")
+        return
+    
+    from rich.table import Table
+    
+    title = {"day": "按天", "week": "按周", "month": "按月"}[period]
+    table = Table(title=f"📈 阅读趋势（{title}）")
+    table.add_column("周期", style="cyan", no_wrap=True)
+    table.add_column("生成", justify="right")
+    table.add_column("已读", style="green", justify="right")
+    table.add_column("跳过", style="red", justify="right")
+    table.add_column("收藏", style="yellow", justify="right")
+    table.add_column("阅读率", justify="right")
+    table.add_column("平均等待(天)", style="dim", justify="right")
+    for row in rows:
+        table.add_row(
+            row["period"],
+            str(row["generated"]),
+            str(row["read"]),
+            str(row["skipped"]),
+            str(row["starred"]),
+            _percent(row["read_rate"]),
+            _days(row["avg_wait"]),
+        )
+    console.print(table)
+    
+    table = Table(title="📚 各来源")
+    table.add_column("来源", style="magenta")
+    table.add_column("生成", justify="right")
+    table.add_column("阅读率", style="green", justify="right")
+    table.add_column("收藏率", style="yellow", justify="right")
+    table.add_column("平均等待(天)", style="dim", justify="right")
+    for row in sources:
+        table.add_row(
+            row["source"],
+            str(row["generated"]),
+            _percent(row["read_rate"]),
+            _percent(row["star_rate"]),
+            _days(row["avg_wait"]),
+        )
+    console.print(table)
+    
+    console.print(
+        f"积压: [bold]{backlog['pending']}[/bold] 条未处理"
+        + (f"，最早 {backlog['oldest']}，平均 {_days(backlog['avg_age'])} 天" if backlog["pending"] else "")
+    )
+
+
+def process_all(processor: MarkProcessor, quiet: bool = False):
     """处理所有文件"""
     results = processor.process_all()
     
+    if quiet:
+        removed = sum(result.get("removed", 0) for result in results)
+        starred = sum(result.get("starred", 0) for result in results)
+        print(f"处理结果: {len(results)} 个文件, 删除 {removed} 条, 归档 {starred} 条")
+        return
+    
     if not results:
         console.print("[dim]没有需要处理的标记[/dim]")
         return
     
+    from rich.table import Table
+    
     table = Table(title="✅ 处理结果")
     table.add_column("文件", style="cyan")
     table.add_column("已读删除", style="red")
@@ -99,15 +204,209 @@ def cleanup(processor: MarkProcessor):
         console.print("[dim]没有需要清理的文件[/dim]")
 
 
+def watch(processor: MarkProcessor, poll: bool = False):
+    """监听目录，文件保存后立即处理标记"""
+    from daily_digest.watcher import MarkWatcher
+    
+    watcher = MarkWatcher(processor, use_inotify=not poll)
+    
+    def on_result(result: dict):
+        name = Path(result["path"]).name
+        if "error" in result:
+            console.print(f"[red]✗ {name}: {result['error']}[/red]")
+            return
+        console.print(
+            f"[green]✓ {name}[/green]: 删除 {result.get('removed', 0)} 条, "
+            f"归档 {result.get('starred', 0)} 条"
+        )
+    
+    console.print(f"[dim]监听中: {processor.digest_dir} (Ctrl+C 退出)[/dim]")
+    try:
+        watcher.run(on_result=on_result)
+    except KeyboardInterrupt:
+        console.print("\n[dim]已停止监听[/dim]")
+
+
+def migrate(processor: MarkProcessor):
+    """把已有摘要迁移到配置的布局"""
+    moved = processor.layout.migrate()
+    
+    if moved:
+        console.print(f"[green]已迁移 {len(moved)} 个文件到 {processor.layout.layout} 布局[/green]")
+    else:
+        console.print("[dim]没有需要迁移的文件[/dim]")
+
+
+def search(processor: MarkProcessor, args):
+    """全文检索收藏"""
+    index = processor.index
+    index.sync(processor.archive_dir)
+    
+    results = index.search(
+        " ".join(args.query),
+        since=args.since,
+        until=args.until,
+        source=args.source,
+        limit=args.limit,
+    )
+    
+    if not results:
+        console.print("[dim]没有找到匹配的收藏[/dim]")
+        return
+    
+    from rich.markup import escape
+    from rich.table import Table
+    
+    table = Table(title=f"🔍 搜索结果 ({len(results)})")
+    table.add_column("日期", style="cyan", no_wrap=True)
+    table.add_column("来源", style="magenta")
+    table.add_column("标题", style="green")
+    table.add_column("链接", style="blue")
+    
+    for row in results:
+        title = escape(row["title"])
+        if row["snippet"]:
+            title += f"\n[dim]{escape(row['snippet'])}[/dim]"
+        table.add_row(row["date"], escape(row["source"]), title, escape(row["url"]))
+    
+    console.print(table)
+
+
+def compact(processor: MarkProcessor, days: int):
+    """把旧文件压缩为月度归档包"""
+    from daily_digest.compactor import Compactor
+    
+    results = Compactor(processor).compact(days=days)
+    
+    if not results:
+        console.print(f"[dim]没有超过 {days} 天需要压缩的文件[/dim]")
+        return
+    
+    from rich.table import Table
+    
+    table = Table(title="🗜️ 压缩结果")
+    table.add_column("月份", style="cyan")
+    table.add_column("摘要", style="green")
+    table.add_column("收藏", style="yellow")
+    table.add_column("压缩包", style="dim")
+    
+    for result in results:
+        table.add_row(
+            result["month"],
+            str(result["digests"]),
+            str(result["starred"]),
+            result["bundle"].name,
+        )
+    
+    console.print(table)
+
+
+def check_links(processor: MarkProcessor, args):
+    """检查摘要和收藏中的链接，并标注失效/重定向"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from rich.table import Table
+    from daily_digest.linkcheck import LinkChecker, extract_urls, annotate_files
+    
+    files = list(processor.layout.iter_digests()) + sorted(processor.archive_dir.glob("*-starred.md"))
+    urls = extract_urls(files)
+    
+    checker = LinkChecker(
+        cache_path=processor.archive_dir / ".linkcheck.json",
+        ttl=args.ttl_hours * 3600,
+        max_workers=args.workers,
+        per_host=args.per_host,
+    )
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        task = progress.add_task(f"检查 {len(urls)} 个链接...", total=len(urls))
+        results = checker.check_all(urls, on_result=lambda r: progress.advance(task))
+    
+    dead = [r for r in results.values() if r["dead"]]
+    redirected = [r for r in results.values() if r["redirected"]]
+    
+    table = Table(title="🔗 链接检查")
+    table.add_column("状态", style="cyan")
+    table.add_column("链接", style="blue")
+    for result in dead:
+        table.add_row(f"[red]{result.get('error') or result['status']}[/red]", result["url"])
+    for result in redirected:
+        table.add_row("[yellow]重定向[/yellow]", f"{result['url']} → {result['final_url']}")
+    if dead or redirected:
+        console.print(table)
+    
+    console.print(f"共 {len(results)} 个链接: 失效 {len(dead)}, 重定向 {len(redirected)}")
+    
+    if not args.dry_run:
+        changed = annotate_files(processor.digest_dir, files, results)
+        console.print(f"[dim]已标注 {len(changed)} 个文件[/dim]")
+
+
+def build_snapshotter(config: dict, archive_dir: Path, force: bool = False):
+    """按配置创建后台快照抓取器（未启用时返回 None）"""
+    snapshot_config = config.get("snapshots", {})
+    if not (force or snapshot_config.get("enabled", False)):
+        return None
+    
+    from daily_digest.snapshot import Snapshotter, SnapshotStore, SNAPSHOT_DIR
+    
+    return Snapshotter(
+        SnapshotStore(archive_dir / SNAPSHOT_DIR),
+        max_workers=snapshot_config.get("max_workers", 4),
+        max_assets=snapshot_config.get("max_assets", 20),
+    )
+
+
+def snapshot_all(processor: MarkProcessor):
+    """为所有收藏条目补抓快照"""
+    from daily_digest.search import extract_items
+    
+    for archive_file in sorted(processor.archive_dir.glob("*-starred.md")):
+        items = extract_items(archive_file.read_text(encoding="utf-8"))
+        processor.snapshot_items(archive_file, items)
+
+
 def main():
     parser = argparse.ArgumentParser(description="处理 Daily Digest 标记")
     parser.add_argument("--config", type=str, help="配置文件路径")
     parser.add_argument("--stats", action="store_true", help="显示统计信息")
+    parser.add_argument(
+        "--trend", nargs="?", const="week", choices=["day", "week", "month"],
+        help="显示阅读趋势，按 day/week/month 汇总（默认 week）",
+    )
+    parser.add_argument("--since", type=str, help="--trend 的起始日期 (YYYY-MM-DD)")
     parser.add_argument("--cleanup", action="store_true", help="清理空文件")
     parser.add_argument("--file", type=str, help="处理指定文件")
+    parser.add_argument("--watch", action="store_true", help="持续监听目录并自动处理标记")
+    parser.add_argument("--poll", action="store_true", help="监听时使用轮询（不使用 inotify）")
+    parser.add_argument("--migrate", action="store_true", help="按 digest_layout 迁移摘要文件")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出一行纯文本结果（不加载 rich，启动更快）")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    search_parser = subparsers.add_parser("search", help="全文检索已归档的收藏")
+    search_parser.add_argument("query", nargs="+", help="检索关键词")
+    search_parser.add_argument("--since", type=str, help="起始日期 (YYYY-MM-DD)")
+    search_parser.add_argument("--until", type=str, help="结束日期 (YYYY-MM-DD)")
+    search_parser.add_argument("--source", type=str, help="来源过滤，如 \"Hacker News\"")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多返回条数")
+    
+    compact_parser = subparsers.add_parser("compact", help="把旧摘要和收藏压缩为月度归档包")
+    compact_parser.add_argument("--days", type=int, help="保留最近多少天的文件（默认读取 retention.compact_after_days）")
+    
+    links_parser = subparsers.add_parser("check-links", help="检查并标注失效或重定向的链接")
+    links_parser.add_argument("--workers", type=int, default=32, help="全局并发数")
+    links_parser.add_argument("--per-host", type=int, default=4, help="单个 host 并发上限")
+    links_parser.add_argument("--ttl-hours", type=float, default=168, help="检查结果缓存时长（小时）")
+    links_parser.add_argument("--dry-run", action="store_true", help="只检查，不修改文件")
+    
+    subparsers.add_parser("snapshot", help="为已有收藏补抓离线快照")
     args = parser.parse_args()
     
-    console.print("\n[bold blue]📋 Daily Digest 标记处理器[/bold blue]\n")
+    if not args.quiet:
+        console.print("\n[bold blue]📋 Daily Digest 标记处理器[/bold blue]\n")
     
     # 加载配置
     config_path = Path(args.config) if args.config else None
@@ -118,25 +417,60 @@ def main():
         vault_path=config.get("vault_path", "~/Obsidian/MyVault"),
         digest_dir=config.get("digest_dir", "Daily Digest"),
         archive_dir=config.get("archive_dir", "Daily Digest/Archive"),
+        layout=config.get("digest_layout", "flat"),
+    )
+    processor.snapshotter = build_snapshotter(
+        config, processor.archive_dir, force=args.command == "snapshot"
     )
     
-    if args.stats:
-        show_stats(processor)
+    if args.command == "snapshot":
+        snapshot_all(processor)
+    elif args.command == "search":
+        search(processor, args)
+    elif args.command == "check-links":
+        check_links(processor, args)
+    elif args.command == "compact":
+        days = args.days or config.get("retention", {}).get("compact_after_days", 30)
+        compact(processor, days)
+    elif args.stats:
+        show_stats(processor, quiet=args.quiet)
+    elif args.trend:
+        show_trend(processor, args.trend, since=args.since, quiet=args.quiet)
     elif args.cleanup:
         cleanup(processor)
+    elif args.migrate:
+        migrate(processor)
+    elif args.watch:
+        process_all(processor)
+        watch(processor, poll=args.poll)
     elif args.file:
         file_path = Path(args.file)
         if not file_path.is_absolute():
-            file_path = processor.digest_dir / args.file
+            found = DATE_FILE_PATTERN.match(file_path.name) and processor.layout.find(file_path.stem)
+            file_path = found or processor.digest_dir / args.file
         
         result = processor.process_file(file_path)
-        console.print(f"处理结果: 删除 {result.get('removed', 0)} 条, 归档 {result.get('starred', 0)} 条")
+        message = f"处理结果: 删除 {result.get('removed', 0)} 条, 归档 {result.get('starred', 0)} 条"
+        if args.quiet:
+            print(message)
+        else:
+            console.print(message)
     else:
-        process_all(processor)
-        console.print()
-        show_stats(processor)
+        process_all(processor, quiet=args.quiet)
+        if not args.quiet:
+            console.print()
+            show_stats(processor)
     
-    console.print()
+    if processor.snapshotter is not None and args.quiet:
+        processor.snapshotter.wait()
+    elif processor.snapshotter is not None:
+        with console.status("等待后台快照完成..."):
+            processor.snapshotter.wait()
+        if processor.snapshotter.saved:
+            console.print(f"[dim]📸 已保存 {processor.snapshotter.saved} 个快照[/dim]")
+    
+    if not args.quiet:
+        console.print()
 
 
 if __name__ == "__main__":
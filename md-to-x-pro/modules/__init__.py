@@ -7,6 +7,8 @@ from .image_generator import (
     GeminiImageGenerator,
     ImageGenerationResult,
     ImageConfig,
+    ImageBatch,
+    ImageCache,
     ImagePromptGenerator,
 )
 from .html_generator import HTMLGenerator, HTMLCardConfig, SocialMediaOptimizer
@@ -20,6 +22,8 @@ __all__ = [
     "GeminiImageGenerator",
     "ImageGenerationResult",
     "ImageConfig",
+    "ImageBatch",
+    "ImageCache",
     "ImagePromptGenerator",
     "HTMLGenerator",
     "HTMLCardConfig",
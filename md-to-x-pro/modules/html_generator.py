@@ -282,6 +282,19 @@ class HTMLGenerator:
         # 获取hashtags
         hashtags_html = " ".join(card_data.get("hashtags", []))
 
+        # 配图：尚未生成完的图片先显示占位，页面脚本定时重试加载
+        if image_path and card_data.get("image_pending"):
+            image_html = f'''<div class="tweet-image tweet-image-pending">
+                <div class="image-placeholder">🎨 配图生成中…</div>
+                <img data-src="{image_path}" alt="配图">
+            </div>'''
+        elif image_path and card_data.get("has_images"):
+            image_html = f'''<div class="tweet-image">
+                <img src="{image_path}" alt="配图" onerror="this.parentElement.style.display='none'">
+            </div>'''
+        else:
+            image_html = ""
+
         html = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -315,9 +328,7 @@ class HTMLGenerator:
             </div>
 
             <!-- 配图 -->
-            {f'''<div class="tweet-image">
-                <img src="{image_path}" alt="配图" onerror="this.parentElement.style.display='none'">
-            </div>''' if image_path and card_data.get("has_images") else ""}
+            {image_html}
 
             <!-- 核心要点 -->
             <div class="tweet-content">
@@ -838,6 +849,27 @@ class HTMLGenerator:
             transform: scale(1.05);
         }
 
+        .tweet-image-pending {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        }
+
+        .tweet-image-pending img {
+            display: none;
+        }
+
+        .image-placeholder {
+            font-size: 16px;
+            color: #9ca3af;
+            animation: pulse 1.5s ease-in-out infinite;
+        }
+
+        @keyframes pulse {
+            0%, 100% { opacity: 0.4; }
+            50% { opacity: 1; }
+        }
+
         .tweet-content {
             padding: 28px;
         }
@@ -939,6 +971,29 @@ class HTMLGenerator:
                 point.style.opacity = '0';
                 point.style.animation = `fadeInUp 0.5s ease ${index * 0.1}s forwards`;
             });
+
+            // 生成中的配图：每5秒重试加载一次，成功后替换占位
+            document.querySelectorAll('.tweet-image-pending img[data-src]').forEach(function(img) {
+                const container = img.parentElement;
+                let attempts = 0;
+                const tryLoad = function() {
+                    const probe = new Image();
+                    probe.onload = function() {
+                        img.src = probe.src;
+                        container.querySelector('.image-placeholder').remove();
+                        container.classList.remove('tweet-image-pending');
+                    };
+                    probe.onerror = function() {
+                        if (++attempts < 60) {
+                            setTimeout(tryLoad, 5000);
+                        } else {
+                            container.style.display = 'none';
+                        }
+                    };
+                    probe.src = img.dataset.src + '?t=' + Date.now();
+                };
+                tryLoad();
+            });
         });
 
         // 添加淡入动画
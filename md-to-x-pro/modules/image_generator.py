@@ -6,9 +6,14 @@
 """
 
 import base64
+import hashlib
 import json
 import logging
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -44,6 +49,102 @@ class ImageConfig:
             self.response_modalities = ["IMAGE"]
 
 
+class ImageCache:
+    """
+    本地图片缓存（按内容寻址）
+
+    键是请求端点和请求体的 SHA-256（包含提示词、模型、宽高比和图片尺寸），
+    值是生成的图片文件。命中时更新文件修改时间，总大小超过 max_bytes 时
+    按修改时间从最久未使用的开始删除。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，默认 $XDG_CACHE_HOME/md-to-x-pro/images
+            max_bytes: 缓存总大小上限
+        """
+        if cache_dir is None:
+            base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            cache_dir = Path(base) / "md-to-x-pro" / "images"
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(endpoint: str, payload: Dict) -> str:
+        """根据端点和请求体计算缓存键"""
+        canonical = json.dumps(
+            {"endpoint": endpoint, "payload": payload},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    def get(self, key: str, output_path: str) -> bool:
+        """命中时把缓存的图片复制到 output_path 并返回 True"""
+        path = self._path(key)
+        try:
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, output_path)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return False
+        with self._lock:
+            self.stats["hits"] += 1
+        return True
+
+    def put(self, key: str, image_path: str) -> None:
+        """把生成的图片存入缓存，超出大小上限时淘汰最久未使用的图片"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f".{key}.{threading.get_ident()}.tmp"
+            shutil.copyfile(image_path, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"写入图片缓存失败: {e}")
+            return
+        with self._lock:
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def summary(self) -> str:
+        """缓存统计摘要"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+        return (
+            f"命中 {stats['hits']}，未命中 {stats['misses']}（命中率 {rate}），"
+            f"写入 {stats['stores']}，淘汰 {stats['evictions']}"
+        )
+
+
 class GeminiImageGenerator:
     """Gemini 图片生成器主类"""
 
@@ -72,17 +173,27 @@ class GeminiImageGenerator:
     # 支持的图片尺寸
     SUPPORTED_SIZES = ["1K", "2K", "4K"]
 
-    def __init__(self, api_key: Optional[str] = None, use_pro_model: bool = False):
+    # 单次请求超时（秒）
+    REQUEST_TIMEOUT = 60
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        use_pro_model: bool = False,
+        cache: Optional[ImageCache] = None,
+    ):
         """
         初始化图片生成器
 
         Args:
             api_key: Gemini API Key，如果不提供则无法生成图片
             use_pro_model: 是否使用pro模型（支持4K分辨率）
+            cache: 图片缓存，默认使用 ImageCache()；用 set_cache_enabled(False) 关闭
         """
         self.api_key = api_key
         self.config = ImageConfig()
         self.use_pro_model = use_pro_model
+        self.cache = cache if cache is not None else ImageCache()
 
     def set_api_key(self, api_key: str):
         """设置 API Key"""
@@ -110,15 +221,27 @@ class GeminiImageGenerator:
 
         logger.info(f"图片配置已更新: {aspect_ratio}, {image_size}")
 
+    def set_cache_enabled(self, enabled: bool):
+        """开启或关闭图片缓存"""
+        if not enabled:
+            self.cache = None
+        elif self.cache is None:
+            self.cache = ImageCache()
+        logger.info(f"图片缓存已{'开启' if enabled else '关闭'}")
+
     def generate_image(
-        self, prompt: str, output_path: Optional[str] = None
+        self,
+        prompt: str,
+        output_path: Optional[str] = None,
+        timeout: Optional[float] = None,
     ) -> ImageGenerationResult:
         """
-        根据提示词生成图片
+        根据提示词生成图片（线程安全，可在多个线程中同时调用）
 
         Args:
             prompt: 图片描述提示词
             output_path: 可选的输出路径
+            timeout: 请求超时（秒），默认 REQUEST_TIMEOUT
 
         Returns:
             ImageGenerationResult: 生成结果
@@ -137,14 +260,33 @@ class GeminiImageGenerator:
             # 构建请求体
             payload = self._build_payload(prompt)
 
+            # 相同请求已生成过时直接复用缓存的图片
+            cache_key = None
+            if self.cache is not None:
+                if output_path is None:
+                    output_path = self._generate_output_path()
+                cache_key = ImageCache.make_key(self._endpoint(), payload)
+                if self.cache.get(cache_key, output_path):
+                    logger.info(f"命中图片缓存: {output_path}")
+                    with open(output_path, "rb") as f:
+                        image_data = base64.b64encode(f.read()).decode("utf-8")
+                    return ImageGenerationResult(
+                        success=True,
+                        image_path=output_path,
+                        base64_data=image_data,
+                        prompt_used=prompt,
+                    )
+
             # 发送 API 请求
-            response = self._send_request(payload)
+            response = self._send_request(payload, timeout=timeout)
 
             # 解析响应
             result = self._parse_response(response, output_path)
 
             if result.success:
                 logger.info(f"图片生成成功: {result.image_path}")
+                if cache_key is not None:
+                    self.cache.put(cache_key, result.image_path)
             else:
                 logger.error(f"图片生成失败: {result.error_message}")
 
@@ -181,11 +323,13 @@ class GeminiImageGenerator:
 
         return payload
 
-    def _send_request(self, payload: Dict) -> Dict:
+    def _endpoint(self) -> str:
+        """根据模型类型选择端点"""
+        return self.PRO_ENDPOINT if self.use_pro_model else self.API_ENDPOINT
+
+    def _send_request(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
         """发送 API 请求"""
-        # 根据模型类型选择端点
-        endpoint = self.PRO_ENDPOINT if self.use_pro_model else self.API_ENDPOINT
-        url = f"{endpoint}?key={self.api_key}"
+        url = f"{self._endpoint()}?key={self.api_key}"
 
         headers = {"Content-Type": "application/json"}
 
@@ -195,7 +339,7 @@ class GeminiImageGenerator:
             url,
             json=payload,
             headers=headers,
-            timeout=60,  # 60秒超时
+            timeout=timeout or self.REQUEST_TIMEOUT,
         )
 
         response.raise_for_status()
@@ -327,6 +471,19 @@ class GeminiImageGenerator:
 
         return results
 
+    def start_batch(self, max_workers: int = 4, deadline: float = 30.0) -> "ImageBatch":
+        """
+        创建并发生成批次
+
+        Args:
+            max_workers: 同时进行的请求数
+            deadline: 每张图片从开始请求起的等待时间（秒）
+
+        Returns:
+            ImageBatch: 生成批次
+        """
+        return ImageBatch(self, max_workers=max_workers, deadline=deadline)
+
     def edit_image(
         self, input_image_path: str, edit_prompt: str, output_path: Optional[str] = None
     ) -> ImageGenerationResult:
@@ -402,6 +559,108 @@ class GeminiImageGenerator:
         }
 
 
+class ImageBatch:
+    """
+    并发图片生成批次
+
+    最多 max_workers 个请求同时进行，每张图片从真正开始请求时起单独计算
+    截止时间。wait() 在所有图片完成或超过各自截止时间后返回，超时的图片
+    在后台继续生成（受 REQUEST_TIMEOUT 限制），之后用 wait_late() 取回。
+    """
+
+    def __init__(
+        self,
+        generator: GeminiImageGenerator,
+        max_workers: int = 4,
+        deadline: float = 30.0,
+    ):
+        """
+        初始化批次
+
+        Args:
+            generator: 图片生成器
+            max_workers: 同时进行的请求数
+            deadline: 每张图片从开始请求起的等待时间（秒）
+        """
+        self.generator = generator
+        self.max_workers = max(1, max_workers)
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="image"
+        )
+        self._futures: List[Future] = []
+        self._started: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._late: List[int] = []
+
+    def submit(self, prompt: str, output_path: str) -> int:
+        """提交一张图片，返回序号"""
+        index = len(self._futures)
+        self._futures.append(
+            self._executor.submit(self._run, index, prompt, output_path)
+        )
+        return index
+
+    def _run(self, index: int, prompt: str, output_path: str) -> ImageGenerationResult:
+        with self._lock:
+            self._started[index] = time.monotonic()
+        return self.generator.generate_image(prompt, output_path)
+
+    def _in_time(self, index: int, now: float) -> bool:
+        with self._lock:
+            started = self._started.get(index)
+        return started is not None and now < started + self.deadline
+
+    def wait(self) -> List[Optional[ImageGenerationResult]]:
+        """
+        等待所有图片完成或超过各自的截止时间
+
+        Returns:
+            List[Optional[ImageGenerationResult]]: 按提交顺序的结果，超时的为 None
+        """
+        pending = set(range(len(self._futures)))
+        while pending:
+            pending = {i for i in pending if not self._futures[i].done()}
+            now = time.monotonic()
+            in_time = [i for i in pending if self._in_time(i, now)]
+            queued = [i for i in pending if i not in self._started]
+            # 已超时仍在请求的图片占满了所有并发名额时，排队的图片也无法按时开始
+            overdue = len(pending) - len(in_time) - len(queued)
+            if not in_time and (not queued or overdue >= self.max_workers):
+                break
+
+            with self._lock:
+                deadlines = [self._started[i] + self.deadline for i in in_time]
+            timeout = max(0.0, min(deadlines) - now) if deadlines else 0.05
+            wait(
+                [self._futures[i] for i in pending],
+                timeout=timeout,
+                return_when=FIRST_COMPLETED,
+            )
+
+        self._late = sorted(pending)
+        if not self._late:
+            self._executor.shutdown(wait=False)
+        for index in self._late:
+            logger.warning(f"图片 {index + 1} 超过 {self.deadline:g} 秒仍未完成，稍后补上")
+        return [
+            None if i in pending else self._futures[i].result()
+            for i in range(len(self._futures))
+        ]
+
+    @property
+    def late(self) -> List[int]:
+        """wait() 返回时尚未完成的图片序号"""
+        return list(self._late)
+
+    def wait_late(self) -> Dict[int, ImageGenerationResult]:
+        """阻塞等待超时的图片完成，返回 {序号: 结果}"""
+        results = {index: self._futures[index].result() for index in self._late}
+        self._late = []
+        self._executor.shutdown(wait=False)
+        return results
+
+
 class ImagePromptGenerator:
     """图片提示词生成器"""
 
@@ -9,9 +9,12 @@ import os
 import sys
 import argparse
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import logging
 
+if TYPE_CHECKING:
+    from modules.image_generator import ImageBatch
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -47,6 +50,8 @@ class DocumentToHTMLConverter:
         output_dir: str = "output",
         aspect_ratio: str = "16:9",
         generate_images: bool = True,
+        image_concurrency: int = 4,
+        image_deadline: float = 30.0,
     ) -> Dict:
         """
         执行文档到HTML的转换
@@ -57,6 +62,8 @@ class DocumentToHTMLConverter:
             output_dir: 输出目录
             aspect_ratio: 图片宽高比
             generate_images: 是否生成图片
+            image_concurrency: 同时生成的图片数
+            image_deadline: 每张图片的等待时间（秒），超时的卡片先用占位生成HTML
 
         Returns:
             Dict: 转换结果
@@ -110,11 +117,18 @@ class DocumentToHTMLConverter:
             )
             logger.info(f"AI提炼完成，生成 {len(refined_cards)} 张卡片")
 
-            # 4. 生成图片（如果需要）
+            # 4. 并发生成图片（如果需要），超过截止时间的图片在后台继续生成
             image_paths = []
+            pending_paths = {}
+            batch = None
             if generate_images and self.image_generator.api_key:
                 logger.info("开始生成配套图片...")
-                image_paths = self._generate_images_for_refined_cards(refined_cards, output_dir)
+                image_paths, pending_paths, batch = self._generate_images_for_refined_cards(
+                    refined_cards,
+                    output_dir,
+                    max_workers=image_concurrency,
+                    deadline=image_deadline,
+                )
                 result["images_generated"] = image_paths
 
             # 5. 生成HTML文件
@@ -122,51 +136,22 @@ class DocumentToHTMLConverter:
             output_path = Path(output_dir)
             output_path.mkdir(parents=True, exist_ok=True)
 
-            # 为每个卡片生成单独的HTML文件
+            # 为每个卡片生成单独的HTML文件（图片未完成的卡片先显示占位）
             for i, card in enumerate(refined_cards):
-                card_number = i + 1
-                # 获取对应的图片路径
-                image_path = image_paths[i] if i < len(image_paths) else None
-
-                # 构建单张卡片的数据（推文风格）
-                single_card_data = {
-                    "card_number": card_number,
-                    "total_cards": len(refined_cards),
-                    "title": card.get("title", ""),
-                    "subtitle": card.get("subtitle", ""),
-                    "key_points": card.get("key_points", []),
-                    "insight": card.get("insight", ""),
-                    "hashtags": card.get("hashtags", []),
-                    "image_path": image_path,
-                    "has_images": bool(image_path),
-                    "is_tweet_style": True  # 标记为推文风格
-                }
-
-                # 生成单张卡片的HTML
-                html_content = self.html_generator._generate_tweet_style_card(single_card_data)
-                output_file = output_path / f"beautiful_content_{card_number}.html"
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(html_content)
-
-                result["output_files"].append(str(output_file))
-                logger.info(f"生成卡片 {card_number}: {output_file}")
+                if i in pending_paths:
+                    output_file = self._write_card_html(
+                        refined_cards, i, pending_paths[i], output_path, pending=True
+                    )
+                else:
+                    image_path = image_paths[i] if i < len(image_paths) else None
+                    output_file = self._write_card_html(
+                        refined_cards, i, image_path, output_path
+                    )
+                result["output_files"].append(output_file)
 
             # 生成完整页面
-            # 将DocumentSection对象转换为字典
-            sections_dict = [
-                {"title": sec.title, "content": sec.content, "level": sec.level}
-                for sec in document.sections[:20]
-            ]
-            full_page_file = self.html_generator.generate_standalone_page(
-                {
-                    "title": document.title,
-                    "summary": document.summary,
-                    "sections": sections_dict,
-                    "keywords": document.keywords,
-                    "total_cards": 4,
-                    "image_paths": result["images_generated"],
-                },
-                str(output_path / "complete_content.html"),
+            full_page_file = self._write_complete_page(
+                document, result["images_generated"], output_path
             )
             result["output_files"].append(full_page_file)
 
@@ -178,6 +163,22 @@ class DocumentToHTMLConverter:
             )
             result["output_files"].append(tweet_file)
 
+            # 7. 等待超时的图片，完成后更新对应卡片和完整页面
+            if batch is not None and pending_paths:
+                logger.info(f"等待 {len(pending_paths)} 张超时图片...")
+                for i, image_result in batch.wait_late().items():
+                    if image_result.success:
+                        image_paths[i] = image_result.image_path
+                        logger.info(f"卡片 {i + 1} 图片已补上: {image_result.image_path}")
+                    else:
+                        logger.warning(f"卡片 {i + 1} 图片生成失败: {image_result.error_message}")
+                    self._write_card_html(refined_cards, i, image_paths[i], output_path)
+                self._write_complete_page(document, image_paths, output_path)
+
+            if batch is not None and self.image_generator.cache is not None:
+                result["image_cache"] = self.image_generator.cache.summary()
+                logger.info(f"图片缓存: {result['image_cache']}")
+
             result["success"] = True
             logger.info("转换完成!")
 
@@ -226,38 +227,117 @@ class DocumentToHTMLConverter:
         return image_paths
 
     def _generate_images_for_refined_cards(
-        self, refined_cards: List[Dict], output_dir: str
-    ) -> List[str]:
+        self,
+        refined_cards: List[Dict],
+        output_dir: str,
+        max_workers: int = 4,
+        deadline: float = 30.0,
+    ) -> Tuple[List[str], Dict[int, str], "ImageBatch"]:
         """
-        为提炼后的卡片生成配套图片
+        为提炼后的卡片并发生成配套图片
 
         Args:
             refined_cards: AI提炼后的卡片数据列表
             output_dir: 输出目录
+            max_workers: 同时生成的图片数
+            deadline: 每张图片的等待时间（秒）
 
         Returns:
-            List[str]: 生成的图片路径列表
+            Tuple: (图片路径列表（失败或超时为空字符串）,
+                    {超时卡片序号: 预期图片路径}, 生成批次)
         """
-        image_paths = []
         images_dir = Path(output_dir) / "images"
         images_dir.mkdir(parents=True, exist_ok=True)
 
+        batch = self.image_generator.start_batch(max_workers=max_workers, deadline=deadline)
+        output_paths = []
         for i, card in enumerate(refined_cards):
             # 使用卡片中自带的image_prompt
             prompt = card.get("image_prompt", f"Professional illustration for card {i+1}")
+            output_paths.append(str(images_dir / f"card_{i + 1}_image.png"))
+            batch.submit(prompt, output_paths[i])
 
-            # 生成图片
-            output_path = str(images_dir / f"card_{i + 1}_image.png")
-            result = self.image_generator.generate_image(prompt, output_path)
-
-            if result.success:
+        image_paths = []
+        pending_paths = {}
+        for i, result in enumerate(batch.wait()):
+            if result is None:
+                pending_paths[i] = output_paths[i]
+                image_paths.append("")
+            elif result.success:
                 image_paths.append(result.image_path)
                 logger.info(f"卡片 {i + 1} 图片生成成功: {result.image_path}")
             else:
                 logger.warning(f"卡片 {i + 1} 图片生成失败: {result.error_message}")
                 image_paths.append("")
 
-        return image_paths
+        return image_paths, pending_paths, batch
+
+    def _write_card_html(
+        self,
+        refined_cards: List[Dict],
+        index: int,
+        image_path: Optional[str],
+        output_path: Path,
+        pending: bool = False,
+    ) -> str:
+        """
+        生成单张推文风格卡片的HTML文件
+
+        Args:
+            refined_cards: AI提炼后的卡片数据列表
+            index: 卡片序号（从0开始）
+            image_path: 图片路径
+            output_path: 输出目录
+            pending: 图片是否仍在生成（显示占位）
+
+        Returns:
+            str: HTML文件路径
+        """
+        card = refined_cards[index]
+        card_number = index + 1
+
+        # 构建单张卡片的数据（推文风格）
+        single_card_data = {
+            "card_number": card_number,
+            "total_cards": len(refined_cards),
+            "title": card.get("title", ""),
+            "subtitle": card.get("subtitle", ""),
+            "key_points": card.get("key_points", []),
+            "insight": card.get("insight", ""),
+            "hashtags": card.get("hashtags", []),
+            "image_path": image_path,
+            "has_images": bool(image_path),
+            "image_pending": pending,
+            "is_tweet_style": True  # 标记为推文风格
+        }
+
+        # 生成单张卡片的HTML
+        html_content = self.html_generator._generate_tweet_style_card(single_card_data)
+        output_file = output_path / f"beautiful_content_{card_number}.html"
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(html_content)
+
+        logger.info(f"生成卡片 {card_number}: {output_file}")
+        return str(output_file)
+
+    def _write_complete_page(self, document, image_paths: List[str], output_path: Path) -> str:
+        """生成包含所有内容的完整页面，返回文件路径"""
+        # 将DocumentSection对象转换为字典
+        sections_dict = [
+            {"title": sec.title, "content": sec.content, "level": sec.level}
+            for sec in document.sections[:20]
+        ]
+        return self.html_generator.generate_standalone_page(
+            {
+                "title": document.title,
+                "summary": document.summary,
+                "sections": sections_dict,
+                "keywords": document.keywords,
+                "total_cards": 4,
+                "image_paths": image_paths,
+            },
+            str(output_path / "complete_content.html"),
+        )
 
     def _generate_tweets(
         self,
@@ -445,6 +525,8 @@ class DocumentToHTMLConverter:
                         print(f"   {i}. {img}")
                     else:
                         print(f"   {i}. (图片生成失败)")
+                if result.get("image_cache"):
+                    print(f"   图片缓存: {result['image_cache']}")
 
             print("\n💡 提示:")
             print("   - 4张卡片可以用于Twitter连续分享")
@@ -468,6 +550,8 @@ class DocumentToHTMLConverter:
   python main.py document.md --api-key YOUR_KEY
   python main.py document.docx --aspect-ratio 1:1
   python main.py document.txt --no-images
+  python main.py document.md -k YOUR_KEY --image-concurrency 2 --image-deadline 45
+  python main.py document.md -k YOUR_KEY --no-cache
             """,
         )
 
@@ -480,12 +564,27 @@ class DocumentToHTMLConverter:
             "--aspect-ratio", "-r", default="16:9", help="图片宽高比 (默认: 16:9)"
         )
         parser.add_argument("--no-images", action="store_true", help="不生成图片")
+        parser.add_argument(
+            "--image-concurrency", type=int, default=4, help="同时生成的图片数 (默认: 4)"
+        )
+        parser.add_argument(
+            "--image-deadline",
+            type=float,
+            default=30.0,
+            help="每张图片的等待秒数，超时的卡片先用占位生成 (默认: 30)",
+        )
+        parser.add_argument(
+            "--no-cache", action="store_true", help="不使用本地图片缓存，全部重新生成"
+        )
         parser.add_argument(
             "--interactive", "-i", action="store_true", help="交互式模式"
         )
 
         args = parser.parse_args()
 
+        if args.no_cache:
+            self.image_generator.set_cache_enabled(False)
+
         if args.interactive:
             self.interactive_mode()
         else:
@@ -495,6 +594,8 @@ class DocumentToHTMLConverter:
                 output_dir=args.output,
                 aspect_ratio=args.aspect_ratio,
                 generate_images=not args.no_images,
+                image_concurrency=args.image_concurrency,
+                image_deadline=args.image_deadline,
             )
             self._display_results(result)
 